@@ -0,0 +1,176 @@
+"""
+Compares the concurrent-request throughput of the read endpoints under WSGI and ASGI.
+
+The WSGI deployment is gunicorn with sync workers serving `drf_project.wsgi`; the ASGI one is uvicorn serving
+`drf_project.asgi`, where the reads are async views. Both run the same number of worker processes on the
+benchmark settings (`benchmarks/settings.py`: a database of their own and no throttling), and are loaded in
+turn by `--concurrency` keep-alive clients, each sending its next request as soon as the previous one is
+answered.
+
+Usage: python benchmarks/asgi_vs_wsgi.py [--workers 2] [--concurrency 32] [--duration 10] [--todo-lists 50]
+
+gunicorn and uvicorn must be installed (see requirements.txt).
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from todo_app.models import Task, TodoList, User  # noqa: E402
+from todo_app.touches import coalesce_touches  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def seed(todo_lists, tasks):
+    """Creates the benchmark user and its todo lists once, returning its token and the endpoint paths."""
+    call_command("migrate", verbosity=0)
+    user, _ = User.objects.get_or_create(username="benchmark", defaults={"email": "benchmark@example.com"})
+    token, _ = Token.objects.get_or_create(user=user)
+
+    with coalesce_touches():
+        for number in range(TodoList.objects.filter(owner=user).count(), todo_lists):
+            todo_list = TodoList.objects.create(name=f"List {number}", owner=user)
+            Task.objects.bulk_create(
+                [Task(name=f"Task {task}", done=task % 3 == 0, todo_list=todo_list) for task in range(tasks)]
+            )
+
+    todo_list = TodoList.objects.filter(owner=user).order_by("name").first()
+    task = Task.objects.filter(todo_list=todo_list).first()
+
+    return token.key, {
+        "todo lists": "/api/todo-lists/",
+        "todo list": f"/api/todo-lists/{todo_list.id}/",
+        "filter todo lists": "/api/todo-lists/filter?archived=false&pagination=cursor",
+        "tasks": f"/api/todo-lists/{todo_list.id}/tasks/",
+        "task": f"/api/todo-lists/{todo_list.id}/tasks/{task.id}/",
+        "filter tasks": f"/api/todo-lists/{todo_list.id}/tasks/filter?done=false",
+    }
+
+
+def server_command(deployment, port, workers):
+    if deployment == "wsgi":
+        return ["gunicorn", "drf_project.wsgi", "--bind", f"{HOST}:{port}", "--workers", str(workers)]
+
+    return ["uvicorn", "drf_project.asgi:application", "--host", HOST, "--port", str(port), "--workers", str(workers)]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(deployment, workers):
+    port = free_port()
+    env = {**os.environ, "DJANGO_ALLOWED_HOSTS": HOST, "TODO_APP_ASYNC_READS": "1" if deployment == "asgi" else "0"}
+    server = subprocess.Popen(
+        server_command(deployment, port, workers),
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return server, port
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError(f"The {deployment} server didn't start.")
+
+
+def load(port, path, token, concurrency, duration):
+    """Sends requests from `concurrency` clients for `duration` seconds, returning the latencies and errors."""
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+    headers = {"Authorization": f"Token {token}"}
+
+    def client():
+        connection = http.client.HTTPConnection(HOST, port, timeout=30)
+
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as error:
+                errors.append(error)
+                connection.close()
+                continue
+
+            latencies.append(time.perf_counter() - started)
+
+            if response.status != 200:
+                errors.append(response.status)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return latencies, errors
+
+
+def report(deployment, name, latencies, errors, duration):
+    latencies = sorted(latencies) or [0]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{deployment:<5} {name:<18} {len(latencies) / duration:>9.1f} req/s"
+        f"   p50 {statistics.median(latencies) * 1000:>7.1f} ms   p99 {p99 * 1000:>7.1f} ms   errors {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint and deployment.")
+    parser.add_argument("--todo-lists", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=20, help="Tasks per todo list.")
+    parser.add_argument("--deployment", choices=["wsgi", "asgi"], action="append", help="Defaults to both.")
+    args = parser.parse_args()
+
+    token, paths = seed(args.todo_lists, args.tasks)
+
+    for deployment in args.deployment or ["wsgi", "asgi"]:
+        server, port = start_server(deployment, args.workers)
+
+        try:
+            for name, path in paths.items():
+                load(port, path, token, args.concurrency, 1)  # warm up
+                latencies, errors = load(port, path, token, args.concurrency, args.duration)
+                report(deployment, name, latencies, errors, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
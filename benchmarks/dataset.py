@@ -0,0 +1,205 @@
+"""
+Generates a synthetic dataset of users, todo lists and tasks in the benchmark database, with bulk inserts.
+
+Accounts are skewed like real ones: the number of todo lists per user and of tasks per todo list follow a
+Zipf-like distribution with exponent `--skew` (0 spreads them evenly), so a few users and lists are much
+bigger than the median ones. Task counters are written along with the todo lists, and tasks are inserted
+without building model instances, with one `executemany` per batch of `--batch-size` (`COPY`, through
+`todo_app.imports.insert_tasks`, on PostgreSQL), each in its own transaction. The same arguments and
+`--seed` always generate the same dataset.
+
+Usage: python benchmarks/dataset.py [--users 10000] [--todo-lists 100000] [--tasks 5000000] [--skew 1.1]
+       [--reset]
+
+`--reset` empties the whole benchmark database first.
+
+The database is the one of `benchmarks/settings.py` (BENCHMARK_SQL_*, benchmark.sqlite3 by default).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import DEFAULT_DB_ALIAS, connections, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from todo_app.imports import insert_tasks  # noqa: E402
+from todo_app.models import Task, TodoList, User  # noqa: E402
+from todo_app.search import install_sqlite_search_index  # noqa: E402
+
+USERNAME_PREFIX = "synthetic-"
+PASSWORD = "synthetic-password"
+TASK_COLUMNS = ["id", "name", "done", "todo_list", "created"]
+
+
+def skewed_counts(total, buckets, skew):
+    """Splits `total` over `buckets` in proportion to 1 / rank ** skew, largest first."""
+    if buckets <= 0:
+        return []
+
+    weights = [1 / rank**skew for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+
+    for index in range(total - sum(counts)):
+        counts[index % buckets] += 1
+
+    return counts
+
+
+def generate(users, todo_lists, tasks, skew=1.1, done_ratio=0.3, seed=0, batch_size=10000, log=print):
+    """Generates the dataset and returns the number of users, todo lists and tasks created."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    started = time.monotonic()
+
+    password = make_password(PASSWORD)
+    created_users = User.objects.bulk_create(
+        [
+            User(
+                username=f"{USERNAME_PREFIX}{number:06d}",
+                email=f"{USERNAME_PREFIX}{number}@example.com",
+                password=password,
+            )
+            for number in range(users)
+        ],
+        batch_size=batch_size,
+    )
+    log(f"{len(created_users)} users in {time.monotonic() - started:.1f} s")
+
+    # The biggest accounts get the most lists, and the biggest lists land on random accounts.
+    owners = [
+        user.pk for user, count in zip(created_users, skewed_counts(todo_lists, users, skew)) for _ in range(count)
+    ]
+    task_counts = skewed_counts(tasks, todo_lists, skew)
+    rng.shuffle(task_counts)
+
+    lists = []
+
+    for number, (owner_id, count) in enumerate(zip(owners, task_counts)):
+        lists.append(
+            TodoList(
+                id=uuid.UUID(int=rng.getrandbits(128)),
+                name=f"List {number}",
+                owner_id=owner_id,
+                archived=rng.random() < 0.1,
+                task_count=count,
+                done_count=int(count * done_ratio),
+            )
+        )
+
+    with transaction.atomic():
+        TodoList.objects.bulk_create(lists, batch_size=batch_size)
+
+        # `updated` is set on insert: spread it over the last year, so orderings on it are realistic.
+        for todo_list in lists:
+            todo_list.updated = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+        TodoList.objects.bulk_update(lists, ["updated"], batch_size=batch_size)
+
+    log(f"{len(lists)} todo lists in {time.monotonic() - started:.1f} s")
+
+    batch = []
+    created_tasks = 0
+    connection = connections[DEFAULT_DB_ALIAS]
+
+    if connection.vendor == "sqlite":
+        # Indexing the task names row by row costs more than the inserts: the index is rebuilt at the end.
+        with connection.cursor() as cursor:
+            for trigger in ["insert", "delete", "update"]:
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{Task._meta.db_table}_fts_{trigger}"')
+
+    for todo_list in lists:
+        for number in range(todo_list.task_count):
+            batch.append(
+                (
+                    uuid.UUID(int=rng.getrandbits(128)),
+                    f"Task {number}",
+                    number < todo_list.done_count,
+                    todo_list.id,
+                    todo_list.updated - timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+                )
+            )
+
+            if len(batch) == batch_size:
+                created_tasks += _insert(batch)
+                batch = []
+
+                if created_tasks % (batch_size * 50) == 0:
+                    log(f"{created_tasks} tasks in {time.monotonic() - started:.1f} s")
+
+    created_tasks += _insert(batch)
+    log(f"{created_tasks} tasks in {time.monotonic() - started:.1f} s")
+
+    if connection.vendor == "sqlite":
+        install_sqlite_search_index(connection)
+        log(f"Search index rebuilt in {time.monotonic() - started:.1f} s")
+
+    return len(created_users), len(lists), created_tasks
+
+
+def _insert(tasks):
+    """Inserts (id, name, done, todo list id, created) rows: one `executemany`, or `COPY` on PostgreSQL."""
+    # The connection itself, as every attribute read through `django.db.connection` costs a lookup.
+    connection = connections[DEFAULT_DB_ALIAS]
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            insert_tasks(
+                [
+                    Task(id=id, name=name, done=done, todo_list_id=todo_list_id, created=created)
+                    for id, name, done, todo_list_id, created in tasks
+                ],
+                DEFAULT_DB_ALIAS,
+            )
+        else:
+            fields = [Task._meta.get_field(name) for name in TASK_COLUMNS]
+            rows = [[field.get_db_prep_save(value, connection) for field, value in zip(fields, task)] for task in tasks]
+            columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+            placeholders = ", ".join(["%s"] * len(fields))
+
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {connection.ops.quote_name(Task._meta.db_table)} ({columns}) VALUES ({placeholders})",
+                    rows,
+                )
+
+    return len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--todo-lists", type=int, default=100000)
+    parser.add_argument("--tasks", type=int, default=5000000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the account and list sizes.")
+    parser.add_argument("--done-ratio", type=float, default=0.3, help="Share of the tasks of a list that are done.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per INSERT batch.")
+    parser.add_argument("--reset", action="store_true", help="Empty the benchmark database first.")
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+
+    if args.reset:
+        call_command("flush", interactive=False, verbosity=0)
+    elif User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+        parser.error("The benchmark database already has a synthetic dataset, use --reset to replace it.")
+
+    generate(args.users, args.todo_lists, args.tasks, args.skew, args.done_ratio, args.seed, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Benchmarks every endpoint of `todo_app/urls.py` in-process, against the synthetic dataset.
+
+Requests go through the whole Django stack (middleware, authentication, throttling, views, rendering) with
+a test client, one at a time, as the user `--user` of the dataset generated by `benchmarks/dataset.py` (the
+user with the most todo lists by default), authenticated with a token. Every endpoint gets `--requests`
+timed requests after a few warm-up ones (fewer for the slow ones, like token authentication or the export),
+and its report gives the p50, p95 and p99 latencies, the throughput and the SQL queries and time per
+request. Writes clean up after themselves: the rows they create are deleted and bulk updated tasks are
+restored once the run is over.
+
+Results are written to a JSON file, which `compare` checks against the results of a previous run, flagging
+the endpoints whose p95 latency grew by more than `--threshold` or which run more queries:
+
+    python benchmarks/endpoints.py run --output after.json [--baseline before.json]
+    python benchmarks/endpoints.py compare before.json after.json
+
+Both exit with status 1 when a regression is flagged.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from functools import cached_property
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import DEFAULT_DB_ALIAS, connections  # noqa: E402
+from django.urls import URLPattern, URLResolver  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from todo_app import urls  # noqa: E402
+from todo_app.models import Task, TodoList, User  # noqa: E402
+from todo_app.touches import coalesce_touches  # noqa: E402
+
+from dataset import PASSWORD, USERNAME_PREFIX  # noqa: E402
+
+PREFIX = "benchmark-"
+WARM_UP_REQUESTS = 3
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries of a request and the time they take."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class Context:
+    """The user the requests are made as, the rows the endpoints read and write, and the API clients."""
+
+    def __init__(self, username):
+        self.user = User.objects.get(username=username)
+        self.admin, _ = User.objects.get_or_create(username=f"{PREFIX}admin", defaults={"is_staff": True})
+        self.client = self.token_client(self.user)
+        self.admin_client = self.token_client(self.admin)
+        self.todo_list = TodoList.objects.filter(owner=self.user).order_by("-task_count").first()
+
+        if self.todo_list is None:
+            raise SystemExit(f"{username} has no todo list, generate the dataset with benchmarks/dataset.py.")
+
+        self.task = Task.objects.filter(todo_list=self.todo_list).order_by("created").first()
+        self.bulk_tasks = list(Task.objects.filter(todo_list=self.todo_list).order_by("created")[:20])
+        self.todo_list_path = f"/api/todo-lists/{self.todo_list.id}/"
+
+    @staticmethod
+    def token_client(user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get_or_create(user=user)[0].key}")
+
+        return client
+
+    def scratch_todo_list(self, iteration):
+        return TodoList.objects.create(name=f"{PREFIX}{iteration}", owner=self.user)
+
+    def scratch_task(self, iteration):
+        with coalesce_touches():
+            return Task.objects.create(name=f"{PREFIX}{iteration}", todo_list=self.todo_list)
+
+    @cached_property
+    def profile_id(self):
+        """A profile of a todo list list request, stored (and left) in `TODO_APP_PROFILE_DIR`."""
+        return self.admin_client.get("/api/todo-lists/", HTTP_X_PROFILE="1")["X-Profile-Id"]
+
+    def revocable_client(self, iteration):
+        user, _ = User.objects.get_or_create(username=f"{PREFIX}revoke")
+
+        return self.token_client(user)
+
+    def import_body(self, iteration):
+        lines = [{"todo_list_name": f"{PREFIX}import-{iteration}", "task_name": f"Task {n}"} for n in range(100)]
+
+        return "\n".join(json.dumps(line) for line in lines)
+
+    def clean_up(self):
+        """Deletes what the writes created and restores the tasks the bulk updates changed."""
+        self.client.patch(
+            f"{self.todo_list_path}tasks/bulk",
+            [{"id": str(task.id), "done": task.done} for task in self.bulk_tasks],
+            format="json",
+        )
+
+        with coalesce_touches():
+            Task.objects.filter(todo_list=self.todo_list, name__startswith=PREFIX).delete()
+            TodoList.objects.filter(owner=self.user, name__startswith=PREFIX).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+
+# (name, method, iterations cap, request): the request of an iteration is built, untimed, by
+# `request(context, iteration)`; the name is the URL name, followed by the method when it serves several.
+ENDPOINTS = [
+    ("health", "get", None, lambda ctx, i: {"path": "/health/"}),
+    ("metrics", "get", None, lambda ctx, i: {"path": "/metrics/", "client": ctx.admin_client}),
+    ("profiles", "get", None, lambda ctx, i: {"path": "/profiles/", "client": ctx.admin_client}),
+    (
+        "profile-detail",
+        "get",
+        None,
+        lambda ctx, i: {"path": f"/profiles/{ctx.profile_id}/", "client": ctx.admin_client},
+    ),
+    (
+        "profile-pstats",
+        "get",
+        None,
+        lambda ctx, i: {"path": f"/profiles/{ctx.profile_id}/pstats", "client": ctx.admin_client},
+    ),
+    ("rest_framework:login", "get", None, lambda ctx, i: {"path": "/api-auth/login/"}),
+    ("rest_framework:logout", "post", None, lambda ctx, i: {"path": "/api-auth/logout/", "client": APIClient()}),
+    (
+        "api_token_auth",
+        "post",
+        10,
+        lambda ctx, i: {"path": "/api-token-auth/", "data": {"username": ctx.user.username, "password": PASSWORD}},
+    ),
+    (
+        "api_token_revoke",
+        "post",
+        None,
+        lambda ctx, i: {"path": "/api-token-revoke/", "client": ctx.revocable_client(i)},
+    ),
+    (
+        "create-user",
+        "post",
+        10,
+        lambda ctx, i: {
+            "path": "/users/",
+            "data": {"username": f"{PREFIX}user-{i}-{time.monotonic_ns()}", "password": "benchmark"},
+            "client": ctx.admin_client,
+        },
+    ),
+    ("todo-lists-list", "get", None, lambda ctx, i: {"path": "/api/todo-lists/"}),
+    ("todo-lists-list cursor", "get", None, lambda ctx, i: {"path": "/api/todo-lists/?pagination=cursor"}),
+    ("todo-lists-list", "post", None, lambda ctx, i: {"path": "/api/todo-lists/", "data": {"name": f"{PREFIX}{i}"}}),
+    ("todo-lists-detail", "get", None, lambda ctx, i: {"path": ctx.todo_list_path}),
+    ("todo-lists-detail", "patch", None, lambda ctx, i: {"path": ctx.todo_list_path, "data": {"archived": False}}),
+    (
+        "todo-lists-detail",
+        "delete",
+        None,
+        lambda ctx, i: {"path": f"/api/todo-lists/{ctx.scratch_todo_list(i).id}/"},
+    ),
+    ("filter-todo-lists", "get", None, lambda ctx, i: {"path": "/api/todo-lists/filter?archived=false"}),
+    ("search-tasks", "get", None, lambda ctx, i: {"path": "/api/tasks/search?search=123"}),
+    ("tasks-list", "get", None, lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/"}),
+    (
+        "tasks-list",
+        "post",
+        None,
+        lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/", "data": {"name": f"{PREFIX}{i}-{time.monotonic_ns()}"}},
+    ),
+    ("tasks-detail", "get", None, lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/{ctx.task.id}/"}),
+    (
+        "tasks-detail",
+        "patch",
+        None,
+        lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/{ctx.task.id}/", "data": {"done": ctx.task.done}},
+    ),
+    (
+        "tasks-detail",
+        "delete",
+        None,
+        lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/{ctx.scratch_task(i).id}/"},
+    ),
+    ("filter-tasks", "get", None, lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/filter?done=false"}),
+    ("filter-tasks stream", "get", 20, lambda ctx, i: {"path": f"{ctx.todo_list_path}tasks/filter?stream=true"}),
+    (
+        "bulk-update-tasks",
+        "patch",
+        None,
+        lambda ctx, i: {
+            "path": f"{ctx.todo_list_path}tasks/bulk",
+            "data": [{"id": str(task.id), "done": i % 2 == 0} for task in ctx.bulk_tasks],
+        },
+    ),
+    ("export", "get", 5, lambda ctx, i: {"path": "/api/export/ndjson"}),
+    (
+        "import",
+        "post",
+        20,
+        lambda ctx, i: {"path": "/api/import", "data": ctx.import_body(i), "content_type": "application/x-ndjson"},
+    ),
+    ("schema", "get", 3, lambda ctx, i: {"path": "/api/schema/"}),
+    ("swagger-ui", "get", None, lambda ctx, i: {"path": "/api/docs/"}),
+]
+
+
+def url_names(patterns, namespace=""):
+    """Names of every URL of the patterns, prefixed with their namespace."""
+    names = set()
+
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f"{namespace}{pattern.namespace}:" if pattern.namespace else namespace
+            names |= url_names(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(f"{namespace}{pattern.name}")
+
+    return names
+
+
+def percentile(latencies, fraction):
+    """Nearest-rank percentile of sorted latencies."""
+    return latencies[max(0, math.ceil(fraction * len(latencies)) - 1)]
+
+
+def send(ctx, method, request):
+    client = request.get("client", ctx.client)
+    kwargs = {"format": "json"} if "content_type" not in request else {"content_type": request["content_type"]}
+    response = getattr(client, method)(request["path"], request.get("data"), **kwargs)
+
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+
+    return response.status_code, size
+
+
+def run_endpoint(ctx, method, requests, request):
+    """Times `requests` requests, after the warm-up ones, and returns the report of the endpoint."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    latencies = []
+    queries = []
+    sql_seconds = []
+    errors = 0
+    size = 0
+
+    for iteration in range(-WARM_UP_REQUESTS, requests):
+        built = request(ctx, iteration)
+        counter = QueryCounter()
+
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            status, size = send(ctx, method, built)
+            elapsed = time.perf_counter() - started
+
+        if iteration < 0:
+            continue
+
+        latencies.append(elapsed)
+        queries.append(counter.queries)
+        sql_seconds.append(counter.seconds)
+        errors += status >= 400
+
+    latencies.sort()
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / requests * 1000, 3),
+        "throughput_rps": round(requests / sum(latencies), 1),
+        "queries": round(sum(queries) / requests, 2),
+        "queries_max": max(queries),
+        "sql_ms": round(sum(sql_seconds) / requests * 1000, 3),
+        "response_bytes": size,
+    }
+
+
+def dataset_meta(ctx):
+    def git_revision():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "created": timezone.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connections[DEFAULT_DB_ALIAS].vendor,
+        "users": User.objects.filter(username__startswith=USERNAME_PREFIX).count(),
+        "todo_lists": TodoList.objects.count(),
+        "tasks": Task.objects.count(),
+        "user": ctx.user.username,
+        "user_todo_lists": TodoList.objects.filter(owner=ctx.user).count(),
+        "todo_list_tasks": ctx.todo_list.task_count,
+    }
+
+
+def run(args):
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    ctx = Context(args.user)
+    covered = {name.split(" ")[0] for name, *_ in ENDPOINTS}
+    missing = url_names(urls.urlpatterns) - covered
+
+    if missing:
+        print(f"Endpoints without a benchmark: {', '.join(sorted(missing))}", file=sys.stderr)
+
+    results = {"meta": dataset_meta(ctx), "endpoints": {}}
+    print(
+        f"{'endpoint':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'sql ms':>9}{'errors':>8}"
+    )
+
+    try:
+        for name, method, cap, request in ENDPOINTS:
+            key = f"{name} {method.upper()}"
+
+            if args.only and not any(only in key for only in args.only):
+                continue
+
+            report = run_endpoint(ctx, method, min(args.requests, cap or args.requests), request)
+            results["endpoints"][key] = report
+            print(
+                f"{key:<34}{report['p50_ms']:>9.1f}{report['p95_ms']:>9.1f}{report['p99_ms']:>9.1f}"
+                f"{report['throughput_rps']:>9.1f}{report['queries']:>9.1f}{report['sql_ms']:>9.1f}"
+                f"{report['errors']:>8}"
+            )
+    finally:
+        ctx.clean_up()
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"Results written to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            return report_regressions(json.load(file), results, args.threshold, args.min_ms)
+
+    return 0
+
+
+def find_regressions(baseline, current, threshold, min_ms):
+    """Lists the endpoints slower at p95 by more than `threshold` (and `min_ms`), or running more queries."""
+    regressions = []
+
+    for key, report in current["endpoints"].items():
+        before = baseline["endpoints"].get(key)
+
+        if before is None:
+            continue
+
+        if report["p95_ms"] > before["p95_ms"] * (1 + threshold) and report["p95_ms"] - before["p95_ms"] > min_ms:
+            regressions.append(f"{key}: p95 {before['p95_ms']:.1f} ms -> {report['p95_ms']:.1f} ms")
+
+        if report["queries"] > before["queries"]:
+            regressions.append(f"{key}: queries {before['queries']} -> {report['queries']}")
+
+    return regressions
+
+
+def report_regressions(baseline, current, threshold, min_ms):
+    for key in sorted(set(baseline["endpoints"]) ^ set(current["endpoints"])):
+        print(f"{key}: only in {'the baseline' if key in baseline['endpoints'] else 'the current run'}")
+
+    regressions = find_regressions(baseline, current, threshold, min_ms)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    if not regressions:
+        print(f"No regression against the baseline of {baseline['meta']['created']}.")
+
+    return 1 if regressions else 0
+
+
+def compare(args):
+    with open(args.baseline) as baseline, open(args.current) as current:
+        return report_regressions(json.load(baseline), json.load(current), args.threshold, args.min_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark the endpoints.")
+    run_parser.add_argument("--user", default=f"{USERNAME_PREFIX}000000", help="Username the requests are made as.")
+    run_parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint.")
+    run_parser.add_argument("--only", action="append", help="Only run the endpoints whose name contains this.")
+    run_parser.add_argument("--output", default="benchmark-results.json", help="JSON file of the results.")
+    run_parser.add_argument("--baseline", help="Results of a previous run to compare with.")
+
+    compare_parser = commands.add_parser("compare", help="Compare the results of two runs.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for command_parser in [run_parser, compare_parser]:
+        command_parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated p95 increase, 0.2 = 20%%.")
+        command_parser.add_argument("--min-ms", type=float, default=1.0, help="Tolerated p95 increase, in ms.")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the JSON renderer and parser of the project with DRF's stock ones on a page of 20 tasks.
+
+Usage: python benchmarks/json_renderers.py [--number 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "drf_project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import io  # noqa: E402
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from todo_app.api.parsers import ORJSONParser  # noqa: E402
+from todo_app.api.renderers import ORJSONRenderer  # noqa: E402
+from todo_app.api.serializers import TaskSerializer  # noqa: E402
+from todo_app.models import Task, TodoList  # noqa: E402
+
+
+def task_page(size=20):
+    """A page of tasks as the task list endpoint renders it, and the same rows with raw UUIDs and datetimes."""
+    todo_list = TodoList(name="Groceries")
+    tasks = [Task(name=f"Task number {number}", done=number % 3 == 0, todo_list=todo_list) for number in range(size)]
+    serialized = {"count": size, "next": None, "previous": None, "results": TaskSerializer(tasks, many=True).data}
+    raw = [{"id": task.id, "name": task.name, "done": task.done, "created": task.created} for task in tasks]
+
+    return serialized, raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000, help="Calls timed for each case.")
+    number = parser.parse_args().number
+
+    serialized, raw = task_page()
+    body = JSONRenderer().render(serialized)
+    assert ORJSONRenderer().render(serialized) == body, "Renderers disagree"
+
+    cases = [
+        ("render serialized page", lambda renderer: renderer.render(serialized), JSONRenderer, ORJSONRenderer),
+        ("render raw rows", lambda renderer: renderer.render(raw), JSONRenderer, ORJSONRenderer),
+        ("parse page", lambda parser: parser.parse(io.BytesIO(body)), JSONParser, ORJSONParser),
+    ]
+
+    print(f"{'case':<24}{'stock (us)':>12}{'orjson (us)':>13}{'speedup':>10}")
+
+    for name, call, stock_class, fast_class in cases:
+        stock, fast = stock_class(), fast_class()
+        stock_time = min(timeit.repeat(lambda: call(stock), number=number, repeat=3)) / number * 1e6
+        fast_time = min(timeit.repeat(lambda: call(fast), number=number, repeat=3)) / number * 1e6
+        print(f"{name:<24}{stock_time:>12.1f}{fast_time:>13.1f}{stock_time / fast_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
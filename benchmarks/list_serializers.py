@@ -0,0 +1,114 @@
+"""
+Compares the per-row CPU cost of the list serializers with their `values()` fast path.
+
+The model serializer path builds a model instance per row, like a queryset does, and serializes it; the
+fast path represents the `values()` dict of the row. No database is involved.
+
+Usage: python benchmarks/list_serializers.py [--rows 20] [--number 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "drf_project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from todo_app.api.serializers import (  # noqa: E402
+    TaskSerializer,
+    TaskValuesSerializer,
+    TodoListSerializer,
+    TodoListValuesSerializer,
+)
+from todo_app.models import Task, TodoList, User  # noqa: E402
+
+
+def task_rows(count):
+    todo_list_id = uuid.uuid4()
+
+    return [
+        {"id": uuid.uuid4(), "name": f"Task {number}", "done": number % 2 == 0, "created": timezone.now()}
+        | {"todo_list_id": todo_list_id}
+        for number in range(count)
+    ]
+
+
+def todo_list_rows(count):
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"List {number}",
+            "owner__username": "someone",
+            "archived": False,
+            "task_count": 3,
+            "done_count": 1,
+            "updated": timezone.now(),
+        }
+        for number in range(count)
+    ]
+
+
+def tasks_from_rows(rows):
+    fields = ["id", "name", "done", "todo_list_id", "created"]
+
+    return [Task.from_db("default", fields, [row[field] for field in fields]) for row in rows]
+
+
+def todo_lists_from_rows(rows):
+    fields = ["id", "name", "owner_id", "archived", "updated", "task_count", "done_count"]
+    owner = User(id=1, username="someone")
+    todo_lists = []
+
+    for row in rows:
+        todo_list = TodoList.from_db("default", fields, [row["id"], row["name"], 1, False, row["updated"], 3, 1])
+        todo_list.owner = owner
+        todo_list._prefetched_objects_cache = {"todo_tasks": TodoList.todo_tasks.rel.related_model.objects.none()}
+        todo_lists.append(todo_list)
+
+    return todo_lists
+
+
+class PageTodoListValuesSerializer(TodoListValuesSerializer):
+    """Skips the task names query, which the model serializer path doesn't run either."""
+
+    def get_task_names(self, rows):
+        return {row["id"]: [] for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20, help="Rows per page.")
+    parser.add_argument("--number", type=int, default=2000, help="Pages timed for each case.")
+    args = parser.parse_args()
+
+    tasks, todo_lists = task_rows(args.rows), todo_list_rows(args.rows)
+    cases = [
+        (
+            "tasks",
+            lambda: TaskSerializer(tasks_from_rows(tasks), many=True).data,
+            lambda: TaskValuesSerializer(tasks).data,
+        ),
+        (
+            "todo lists",
+            lambda: TodoListSerializer(todo_lists_from_rows(todo_lists), many=True).data,
+            lambda: PageTodoListValuesSerializer(todo_lists).data,
+        ),
+    ]
+
+    print(f"{'rows':<12}{'model (us/row)':>16}{'values (us/row)':>17}{'speedup':>10}")
+
+    for name, model_path, values_path in cases:
+        model_time = min(timeit.repeat(model_path, number=args.number, repeat=3)) / args.number / args.rows * 1e6
+        values_time = min(timeit.repeat(values_path, number=args.number, repeat=3)) / args.number / args.rows * 1e6
+        print(f"{name:<12}{model_time:>16.2f}{values_time:>17.2f}{model_time / values_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
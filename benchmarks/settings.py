@@ -0,0 +1,15 @@
+"""
+Settings of the benchmarked deployments: the project settings on a database of their own, without throttling.
+
+The database is configured like the project one, from the BENCHMARK_SQL_* environment variables (see
+drf_project/database.py), and defaults to the SQLite file benchmark.sqlite3.
+"""
+from drf_project.database import database_from_env
+from drf_project.settings import *  # noqa: F401, F403
+from drf_project.settings import BASE_DIR, REST_FRAMEWORK
+
+DEBUG = False
+
+DATABASES = {"default": database_from_env("BENCHMARK_SQL_", default_name=BASE_DIR / "benchmark.sqlite3")}
+
+REST_FRAMEWORK = {**REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
@@ -0,0 +1,9 @@
+"""
+URL configuration of the ASGI deployment, routing the async read endpoints (see `todo_app.async_urls`).
+
+It is used instead of `drf_project.urls` when `TODO_APP_ASYNC_READS` is set.
+"""
+from django.contrib import admin
+from django.urls import include, path
+
+urlpatterns = [path("admin/", admin.site.urls), path("", include("todo_app.async_urls"))]
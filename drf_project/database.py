@@ -0,0 +1,64 @@
+"""
+Database settings read from the environment.
+
+`database_from_env("SQL_")` builds a `DATABASES` entry from `SQL_ENGINE`, `SQL_DATABASE`, `SQL_USER`,
+`SQL_PASSWORD`, `SQL_HOST` and `SQL_PORT` (SQLite on `default_name` when no engine is set), plus:
+
+- `SQL_CONN_MAX_AGE`: seconds a connection is kept open and reused across requests (default 60, `none` to
+  keep it forever, 0 to close it after every request). `SQL_CONN_HEALTH_CHECKS` (default on) checks a
+  reused connection at the start of every request and reconnects when it went away.
+- `SQL_STATEMENT_TIMEOUT`: milliseconds after which PostgreSQL cancels a statement (default 30000, 0 for no
+  limit).
+- `SQL_POOL=pgbouncer`: the host is a PgBouncer in transaction pooling mode. Server-side cursors are turned
+  off, as they can't outlive a transaction there, and the statement timeout isn't sent as a startup
+  parameter, which PgBouncer refuses; set it on the role instead (`ALTER ROLE ... SET statement_timeout`).
+- `SQL_SQLITE_TIMEOUT`: seconds SQLite waits for a lock before raising "database is locked" (default 20).
+
+The SQLite PRAGMAs are set per connection (see `TODO_APP_SQLITE_PROFILE` and `todo_app.database`).
+"""
+import os
+
+POSTGRESQL_ENGINES = ("django.db.backends.postgresql", "django.contrib.gis.db.backends.postgis")
+POOLS = ("", "pgbouncer")
+
+
+def _int_or_none(value):
+    return None if value.lower() == "none" else int(value)
+
+
+def database_from_env(prefix, default_name, environ=os.environ):
+    """Returns the `DATABASES` entry configured by the `<prefix>*` environment variables."""
+
+    def get(name, default=""):
+        return environ.get(prefix + name) or default
+
+    engine = get("ENGINE", "django.db.backends.sqlite3")
+    pool = get("POOL").lower()
+
+    if pool not in POOLS:
+        raise ValueError(f"Invalid {prefix}POOL {pool!r}, expected one of {POOLS}.")
+
+    database = {
+        "ENGINE": engine,
+        "NAME": get("DATABASE", default_name),
+        "USER": get("USER"),
+        "PASSWORD": get("PASSWORD"),
+        "HOST": get("HOST"),
+        "PORT": get("PORT"),
+        "CONN_MAX_AGE": _int_or_none(get("CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": bool(int(get("CONN_HEALTH_CHECKS", "1"))),
+        "OPTIONS": {},
+    }
+
+    if engine.endswith("sqlite3"):
+        database["OPTIONS"]["timeout"] = float(get("SQLITE_TIMEOUT", "20"))
+    elif engine in POSTGRESQL_ENGINES:
+        statement_timeout = int(get("STATEMENT_TIMEOUT", "30000"))
+
+        if statement_timeout and pool != "pgbouncer":
+            database["OPTIONS"]["options"] = f"-c statement_timeout={statement_timeout}"
+
+        if pool == "pgbouncer":
+            database["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+    return database
@@ -0,0 +1,83 @@
+"""
+gunicorn configuration of the production deployment:
+
+    gunicorn -c python:drf_project.gunicorn_config
+
+Workers and threads are sized from the cores available to the process, the application is loaded once in
+the master (`preload_app`) and warmed up there before the workers are forked, so they share its code and
+caches copy-on-write, and workers are recycled after a jittered number of requests to cap memory growth.
+
+Every value can be overridden from the environment (see env-template.txt).
+"""
+import os
+
+
+def available_cores():
+    """Cores the process may run on, which can be fewer than the machine has (e.g. in a container)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def server_settings(environ, cores):
+    """gunicorn settings read from `environ`, with workers and threads sized for `cores`."""
+
+    def env_int(name, default):
+        return int(environ.get(name) or default)
+
+    threads = env_int("GUNICORN_THREADS", 4)
+    max_requests = env_int("GUNICORN_MAX_REQUESTS", 2000)
+
+    return {
+        "bind": environ.get("GUNICORN_BIND", "0.0.0.0:8000"),
+        # One worker per core plus one, each with a few threads to keep the core busy while requests wait on
+        # the database.
+        "workers": env_int("GUNICORN_WORKERS", cores + 1),
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "max_requests": max_requests,
+        "max_requests_jitter": env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10),
+        "timeout": env_int("GUNICORN_TIMEOUT", 30),
+        "graceful_timeout": env_int("GUNICORN_GRACEFUL_TIMEOUT", 30),
+        "keepalive": env_int("GUNICORN_KEEPALIVE", 5),
+        "accesslog": environ.get("GUNICORN_ACCESSLOG", "-"),
+    }
+
+
+wsgi_app = "drf_project.wsgi:application"
+preload_app = True
+errorlog = "-"
+
+# gunicorn reads its settings from the names of this module.
+globals().update(server_settings(os.environ, available_cores()))
+
+# The worker heartbeat goes to memory rather than to a possibly slow container filesystem.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+warm_up_enabled = bool(int(os.environ.get("GUNICORN_WARM_UP") or 1))
+
+
+def _warm_up(log):
+    from todo_app.warmup import warm_up
+
+    log.info("Warmed up in %.2fs", warm_up())
+
+
+def when_ready(server):
+    # With `preload_app` the application is already loaded in the master: warm it up once, before forking.
+    if warm_up_enabled and server.cfg.preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if warm_up_enabled and not worker.cfg.preload_app:
+        _warm_up(worker.log)
+
+
+def worker_exit(server, worker):
+    # The metrics aggregated since the last flush would be lost with the worker.
+    from todo_app.metrics import recorder
+
+    recorder.flush()
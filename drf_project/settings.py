@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 import os
 from pathlib import Path
 
+from .database import database_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "todo_app.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,9 +57,15 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "todo_app.middleware.ProfilingMiddleware",
+    "todo_app.middleware.ReplicaRoutingMiddleware",
+    "todo_app.middleware.TodoListTouchMiddleware",
 ]
 
-ROOT_URLCONF = "drf_project.urls"
+# The ASGI deployment serves the read endpoints with async views (see todo_app.api.views.async_reads)
+TODO_APP_ASYNC_READS = bool(int(os.environ.get("TODO_APP_ASYNC_READS", default=0)))
+
+ROOT_URLCONF = "drf_project.async_urls" if TODO_APP_ASYNC_READS else "drf_project.urls"
 
 TEMPLATES = [
     {
@@ -80,10 +89,55 @@ WSGI_APPLICATION = "drf_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# Configured from the SQL_* environment variables (see drf_project/database.py), SQLite by default
+DATABASES = {"default": database_from_env("SQL_", default_name=BASE_DIR / "db.sqlite3")}
+
+# Read replicas of the default database, e.g. "replica1,replica2", each configured from its
+# SQL_<ALIAS>_* environment variables; safe-method requests read from them (see todo_app.routers)
+TODO_APP_DB_REPLICAS = [alias for alias in os.environ.get("TODO_APP_DB_REPLICAS", default="").split(",") if alias]
+
+for alias in TODO_APP_DB_REPLICAS:
+    DATABASES[alias] = {
+        **database_from_env(f"SQL_{alias.upper()}_", default_name=BASE_DIR / f"{alias}.sqlite3"),
+        "TEST": {"MIRROR": "default"},
+    }
+
+# Shards of the todo lists and tasks, by owner, e.g. "default,shard1,shard2", each but default configured from
+# its SQL_<ALIAS>_* environment variables; off when empty (see todo_app.sharding)
+TODO_APP_SHARDS = [alias for alias in os.environ.get("TODO_APP_SHARDS", default="").split(",") if alias]
+
+for alias in TODO_APP_SHARDS:
+    if alias not in DATABASES:
+        DATABASES[alias] = database_from_env(f"SQL_{alias.upper()}_", default_name=BASE_DIR / f"{alias}.sqlite3")
+
+DATABASE_ROUTERS = ["todo_app.routers.ShardRouter", "todo_app.routers.ReplicaRouter"]
+
+# Replica picked per request: "round_robin" or "least_lag", skipping replicas behind by more than
+# TODO_APP_REPLICA_MAX_LAG seconds, measured every TODO_APP_REPLICA_LAG_INTERVAL seconds
+TODO_APP_REPLICA_POLICY = os.environ.get("TODO_APP_REPLICA_POLICY", default="round_robin")
+TODO_APP_REPLICA_MAX_LAG = float(os.environ.get("TODO_APP_REPLICA_MAX_LAG", default=10))
+TODO_APP_REPLICA_LAG_INTERVAL = float(os.environ.get("TODO_APP_REPLICA_LAG_INTERVAL", default=5))
+
+# Seconds the reads of a user stay on the primary after they write, and the cache keeping that,
+# shared by every process
+TODO_APP_REPLICA_PIN_SECONDS = int(os.environ.get("TODO_APP_REPLICA_PIN_SECONDS", default=5))
+TODO_APP_REPLICA_PIN_CACHE = os.environ.get("TODO_APP_REPLICA_PIN_CACHE", default="default")
+
+# PRAGMAs run on every new SQLite connection: "wal" for single-node installs, "" for SQLite's defaults
+# (see todo_app.database)
+TODO_APP_SQLITE_PROFILE = os.environ.get("TODO_APP_SQLITE_PROFILE", default="wal")
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+
+# Shared by the workers, as they invalidate each other's entries (see todo_app.checks): files in
+# CACHE_LOCATION by default, for a single host; e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# and CACHE_LOCATION=redis://cache:6379 to share it between hosts
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": os.environ.get("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", default=str(BASE_DIR / "cache")),
     }
 }
 
@@ -132,16 +186,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Rest framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
-        "rest_framework.authentication.SessionAuthentication",
+        "todo_app.api.authentication.CachedTokenAuthentication",
+        "todo_app.api.authentication.SessionAuthentication",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "todo_app.api.renderers.ORJSONRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "todo_app.api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "todo_app.api.throttling.MinuteRateThrottle",
-        "todo_app.api.throttling.DailyRateThrottle",
+        "todo_app.api.throttling.AnonRateThrottle",
+        "todo_app.api.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "10/hour", "user_day": "10000/day", "user_minute": "200/minute"},
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
@@ -159,3 +217,48 @@ SPECTACULAR_SETTINGS = {
 }
 
 AUTH_USER_MODEL = "todo_app.User"
+
+# Bulk task endpoints settings
+TODO_APP_BULK_MAX_ITEMS = int(os.environ.get("TODO_APP_BULK_MAX_ITEMS", default=500))
+TODO_APP_BULK_BATCH_SIZE = int(os.environ.get("TODO_APP_BULK_BATCH_SIZE", default=100))
+
+# NDJSON lines validated and written per transaction by imports (see todo_app.imports)
+TODO_APP_IMPORT_BATCH_SIZE = int(os.environ.get("TODO_APP_IMPORT_BATCH_SIZE", default=1000))
+# Largest NDJSON upload accepted by the import endpoint, in bytes
+TODO_APP_IMPORT_MAX_BYTES = int(os.environ.get("TODO_APP_IMPORT_MAX_BYTES", default=10 * 1024 * 1024))
+
+# Rows fetched and serialized at a time when a list is streamed with ?stream=true
+TODO_APP_STREAM_CHUNK_SIZE = int(os.environ.get("TODO_APP_STREAM_CHUNK_SIZE", default=500))
+
+# Refresh TodoList.updated when its tasks change (see todo_app.touches)
+TODO_APP_TOUCH_TODO_LISTS = bool(int(os.environ.get("TODO_APP_TOUCH_TODO_LISTS", default=1)))
+
+# Cache keeping the owner of every todo list checked by the permissions (see todo_app.ownership)
+TODO_APP_OWNERSHIP_CACHE = os.environ.get("TODO_APP_OWNERSHIP_CACHE", default="default")
+TODO_APP_OWNERSHIP_CACHE_TIMEOUT = int(os.environ.get("TODO_APP_OWNERSHIP_CACHE_TIMEOUT", default=300))
+
+# Store shared by the workers to count requests for throttling (see todo_app.api.throttling)
+TODO_APP_THROTTLE_STORE = os.environ.get(
+    "TODO_APP_THROTTLE_STORE", default="todo_app.api.throttling.SQLiteThrottleStore"
+)
+TODO_APP_THROTTLE_SQLITE_PATH = os.environ.get("TODO_APP_THROTTLE_SQLITE_PATH", default=BASE_DIR / "throttle.sqlite3")
+
+# Token authentication: cache of verified tokens and token lifetime in seconds, 0 to never expire
+# (see todo_app.api.authentication)
+TODO_APP_TOKEN_CACHE = os.environ.get("TODO_APP_TOKEN_CACHE", default="default")
+TODO_APP_TOKEN_CACHE_TIMEOUT = int(os.environ.get("TODO_APP_TOKEN_CACHE_TIMEOUT", default=300))
+TODO_APP_TOKEN_TTL = int(os.environ.get("TODO_APP_TOKEN_TTL", default=0))
+
+# Per-request metrics: Server-Timing header and histograms aggregated in the process, flushed every
+# TODO_APP_METRICS_FLUSH_INTERVAL seconds to a store shared by the workers (see todo_app.metrics)
+TODO_APP_METRICS = bool(int(os.environ.get("TODO_APP_METRICS", default=1)))
+TODO_APP_METRICS_STORE = os.environ.get("TODO_APP_METRICS_STORE", default="todo_app.metrics.SQLiteMetricsStore")
+TODO_APP_METRICS_SQLITE_PATH = os.environ.get("TODO_APP_METRICS_SQLITE_PATH", default=BASE_DIR / "metrics.sqlite3")
+TODO_APP_METRICS_FLUSH_INTERVAL = float(os.environ.get("TODO_APP_METRICS_FLUSH_INTERVAL", default=10))
+
+# Request profiles: asked by staff users (X-Profile: 1) or sampled, one request in
+# TODO_APP_PROFILE_SAMPLE_RATE per view (0 to turn sampling off), keeping the last TODO_APP_PROFILE_RING_SIZE
+# profiles of each kind in TODO_APP_PROFILE_DIR (see todo_app.profiling)
+TODO_APP_PROFILE_DIR = os.environ.get("TODO_APP_PROFILE_DIR", default=BASE_DIR / "profiles")
+TODO_APP_PROFILE_SAMPLE_RATE = int(os.environ.get("TODO_APP_PROFILE_SAMPLE_RATE", default=0))
+TODO_APP_PROFILE_RING_SIZE = int(os.environ.get("TODO_APP_PROFILE_RING_SIZE", default=100))
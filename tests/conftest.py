@@ -1,7 +1,58 @@
 import pytest
+from django.core.cache import caches
 from rest_framework.test import APIClient
 
+from todo_app.api.throttling import get_throttle_store
+from todo_app.metrics import get_metrics_store, recorder
 from todo_app.models import Task, TodoList, User
+from todo_app.profiling import sampler
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Fixture emptying every cache after each test, as cached rows outlive the test database transaction.
+    """
+    yield
+
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings):
+    """
+    Fixture counting throttled requests in memory, starting every test with no request counted.
+    """
+    settings.TODO_APP_THROTTLE_STORE = "todo_app.api.throttling.LocMemThrottleStore"
+    store = get_throttle_store()
+    store.clear()
+
+    return store
+
+
+@pytest.fixture(autouse=True)
+def metrics_store(settings):
+    """
+    Fixture keeping the request metrics in memory, starting every test with no request recorded.
+    """
+    settings.TODO_APP_METRICS_STORE = "todo_app.metrics.LocMemMetricsStore"
+    store = get_metrics_store()
+    store.clear()
+    recorder.clear()
+
+    return store
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(settings, tmp_path):
+    """
+    Fixture storing request profiles in a temporary directory, with no request sampled yet.
+    """
+    settings.TODO_APP_PROFILE_DIR = tmp_path / "profiles"
+    sampler.clear()
+
+    return settings.TODO_APP_PROFILE_DIR
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,21 @@
+"""
+Settings of the test suite: the project settings, plus two SQLite databases the sharding tests use as shards
+along with `default` (sharding itself stays off unless a test turns it on), and a local memory cache, as the
+tests run in a single process.
+"""
+from drf_project.database import database_from_env
+from drf_project.settings import *  # noqa: F401, F403
+from drf_project.settings import BASE_DIR, DATABASES
+
+TEST_SHARDS = ["default", "shard1", "shard2"]
+
+DATABASES = {
+    **DATABASES,
+    **{
+        alias: database_from_env(f"SQL_{alias.upper()}_", default_name=BASE_DIR / f"{alias}.sqlite3")
+        for alias in TEST_SHARDS[1:]
+    },
+}
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SILENCED_SYSTEM_CHECKS = ["todo_app.E001"]
@@ -0,0 +1,190 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+
+from todo_app.api import streaming
+from todo_app.models import Task, TodoList
+from todo_app.touches import coalesce_touches
+
+ASYNC_URLS = override_settings(ROOT_URLCONF="drf_project.async_urls")
+
+
+@pytest.fixture
+def todo_lists_with_tasks(create_user, create_todo_list, create_task):
+    user = create_user()
+
+    for number in range(3):
+        with coalesce_touches():
+            todo_list = create_todo_list(f"List {number}", user, archived=number == 1)
+
+            for task_number in range(4):
+                create_task(f"Task {task_number}", todo_list, done=task_number % 2 == 0)
+
+    return user
+
+
+def _async_request(client, method, path, **kwargs):
+    async def request():
+        return await getattr(client, method)(path, **kwargs)
+
+    with ASYNC_URLS:
+        return async_to_sync(request)()
+
+
+def _async_get(user, path, **kwargs):
+    client = AsyncClient()
+    client.force_login(user)
+
+    return _async_request(client, "get", path, **kwargs)
+
+
+def _paths():
+    todo_list = TodoList.objects.get(name="List 0")
+    task = Task.objects.filter(todo_list=todo_list).first()
+
+    return {
+        "todo-lists": "/api/todo-lists/",
+        "todo-lists-cursor": "/api/todo-lists/?pagination=cursor&page_size=2",
+        "todo-lists-page-2": "/api/todo-lists/?page=2&page_size=2",
+        "todo-list": f"/api/todo-lists/{todo_list.id}/",
+        "filter-todo-lists": "/api/todo-lists/filter?archived=false&ordering=name",
+        "tasks": f"/api/todo-lists/{todo_list.id}/tasks/",
+        "task": f"/api/todo-lists/{todo_list.id}/tasks/{task.id}/",
+        "filter-tasks": f"/api/todo-lists/{todo_list.id}/tasks/filter?done=true&pagination=cursor",
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name",
+    [
+        "todo-lists",
+        "todo-lists-cursor",
+        "todo-lists-page-2",
+        "todo-list",
+        "filter-todo-lists",
+        "tasks",
+        "task",
+        "filter-tasks",
+    ],
+)
+def test_async_reads_match_sync_reads(todo_lists_with_tasks, create_authenticated_client, name):
+    path = _paths()[name]
+
+    expected = create_authenticated_client(todo_lists_with_tasks).get(path)
+    response = _async_get(todo_lists_with_tasks, path)
+
+    assert response.status_code == 200
+    assert response.content == expected.content
+    assert response["ETag"] == expected["ETag"]
+    assert response["Content-Type"] == expected["Content-Type"]
+
+
+@pytest.mark.django_db
+def test_async_read_not_modified(todo_lists_with_tasks):
+    path = _paths()["tasks"]
+    etag = _async_get(todo_lists_with_tasks, path)["ETag"]
+
+    response = _async_get(todo_lists_with_tasks, path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_async_reads_check_permissions(todo_lists_with_tasks, django_user_model):
+    other_user = django_user_model.objects.create_user("OtherUser", "other@test.com", "blahblah")
+    paths = _paths()
+
+    assert _async_get(other_user, paths["todo-list"]).status_code == 404
+    assert _async_get(other_user, paths["tasks"]).status_code == 403
+    assert _async_get(other_user, paths["task"]).status_code == 403
+    assert _async_request(AsyncClient(), "get", paths["tasks"]).status_code == 403
+
+
+@pytest.mark.django_db
+def test_async_read_not_found(todo_lists_with_tasks):
+    todo_list = TodoList.objects.get(name="List 0")
+
+    response = _async_get(todo_lists_with_tasks, f"/api/todo-lists/{todo_list.id}/tasks/{todo_list.id}/")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_async_urls_hand_writes_to_the_sync_views(todo_lists_with_tasks):
+    todo_list = TodoList.objects.get(name="List 0")
+    client = AsyncClient()
+    client.force_login(todo_lists_with_tasks)
+
+    response = _async_request(
+        client,
+        "post",
+        f"/api/todo-lists/{todo_list.id}/tasks/",
+        data={"name": "New task"},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 201
+    todo_list.refresh_from_db()
+    assert todo_list.task_count == 5
+
+
+@pytest.mark.django_db
+def test_async_urls_stream_with_the_sync_views(todo_lists_with_tasks, create_authenticated_client):
+    path = _paths()["filter-tasks"].replace("pagination=cursor", "stream=true")
+
+    expected = create_authenticated_client(todo_lists_with_tasks).get(path)
+    response = _async_get(todo_lists_with_tasks, path)
+
+    assert response.streaming
+    assert _async_content(response) == b"".join(expected.streaming_content)
+
+
+def _async_content(response):
+    async def content():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(content)()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ["/api/todo-lists/filter?stream=true", "/api/export/ndjson"])
+def test_asgi_streams_chunk_by_chunk(todo_lists_with_tasks, settings, monkeypatch, path):
+    settings.TODO_APP_STREAM_CHUNK_SIZE = 1
+    token = Token.objects.create(user=todo_lists_with_tasks)
+    path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query_string.encode(),
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Token {token.key}".encode())],
+    }
+    events = []
+    aiterate = streaming.aiterate
+
+    async def logged_aiterate(iterator):
+        async for item in aiterate(iterator):
+            events.append("produced")
+            yield item
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            events.append(message["status"])
+        elif message.get("body"):
+            events.append("sent")
+
+    monkeypatch.setattr(streaming, "aiterate", logged_aiterate)
+
+    with ASYNC_URLS:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+
+    assert events[0] == 200
+    # Each chunk is sent before the next one is produced, not after the whole content is read.
+    assert events[1:5] == ["produced", "sent", "produced", "sent"]
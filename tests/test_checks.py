@@ -0,0 +1,20 @@
+from todo_app.checks import check_shared_caches
+
+
+def test_invalidated_caches_must_be_shared(settings, tmp_path):
+    errors = check_shared_caches(None)
+
+    assert [(error.id, error.obj) for error in errors] == [
+        ("todo_app.E001", "TODO_APP_OWNERSHIP_CACHE"),
+        ("todo_app.E001", "TODO_APP_TOKEN_CACHE"),
+    ]
+
+    settings.TODO_APP_DB_REPLICAS = ["replica"]
+
+    assert [error.obj for error in check_shared_caches(None)][-1] == "TODO_APP_REPLICA_PIN_CACHE"
+
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)}
+    }
+
+    assert check_shared_caches(None) == []
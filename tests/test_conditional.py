@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+
+from todo_app.models import Task, TodoList, User
+from todo_app.touches import coalesce_touches, suspend_touches
+
+
+@pytest.mark.django_db
+def test_todo_list_detail_not_modified(
+    create_user, create_authenticated_client, create_todo_list, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    url = f"/api/todo-lists/{todo_list.id}/"
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"].startswith('"')
+    assert "Last-Modified" in response
+
+    # session, user, validators
+    with django_assert_num_queries(3):
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_task_change_invalidates_etag(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+
+    etag = client.get(url)["ETag"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.post(url, {"name": "Milk"}, format="json")
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_counter_changes_invalidate_validators(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    TodoList.objects.filter(pk=todo_list.pk).update(updated=timezone.now() - timedelta(days=1))
+    url = f"/api/todo-lists/{todo_list.id}/"
+
+    etag = client.get(url)["ETag"]
+
+    with coalesce_touches(), suspend_touches():
+        Task.objects.create(name="Milk", todo_list=todo_list)
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["task_count"] == 1
+
+    TodoList.objects.filter(pk=todo_list.pk).update(task_count=7)
+    response = client.get(url)
+    call_command("recount_tasks", stdout=StringIO())
+
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["task_count"] == 1
+
+
+@pytest.mark.django_db
+def test_filter_endpoints_honor_if_modified_since(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    url = reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + "?done=false"
+
+    last_modified = client.get(url)["Last-Modified"]
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/todo-lists/", "/api/todo-lists/filter?archived=false"])
+def test_deleted_todo_list_modifies_collections(create_user, create_authenticated_client, create_todo_list, url):
+    user = create_user()
+    client = create_authenticated_client(user)
+    create_todo_list("Older", user)
+    deleted = create_todo_list("Newer", user)
+    response = client.get(url)
+    last_modified = response.get("Last-Modified", http_date(time.time()))
+
+    client.delete(f"/api/todo-lists/{deleted.id}/")
+
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == status.HTTP_200_OK
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_etag_differs_between_pages_and_filters(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    create_todo_list("Super", user)
+    url = reverse("filter-todo-lists")
+
+    assert client.get(url + "?archived=false")["ETag"] != client.get(url + "?archived=true")["ETag"]
+
+
+@pytest.mark.django_db
+def test_filter_tasks_restricted_if_not_owner_of_todo_list(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list_owner = User.objects.create_user("Creator", "creator@list.com", "something")
+    todo_list = create_todo_list("Super", todo_list_owner)
+    create_task("Milk", todo_list)
+
+    response = client.get(reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert "ETag" not in response
@@ -0,0 +1,76 @@
+import pytest
+from django.db.utils import ConnectionHandler
+
+from drf_project.database import database_from_env
+
+
+def test_database_defaults_to_sqlite():
+    database = database_from_env("SQL_", default_name="db.sqlite3", environ={})
+
+    assert database["ENGINE"] == "django.db.backends.sqlite3"
+    assert database["NAME"] == "db.sqlite3"
+    assert database["CONN_MAX_AGE"] == 60
+    assert database["CONN_HEALTH_CHECKS"] is True
+    assert database["OPTIONS"] == {"timeout": 20.0}
+
+
+def test_postgresql_database_from_env():
+    environ = {
+        "SQL_ENGINE": "django.db.backends.postgresql",
+        "SQL_DATABASE": "todo_db",
+        "SQL_USER": "user",
+        "SQL_PASSWORD": "secret",
+        "SQL_HOST": "database",
+        "SQL_PORT": "5432",
+        "SQL_CONN_MAX_AGE": "none",
+        "SQL_STATEMENT_TIMEOUT": "5000",
+    }
+
+    database = database_from_env("SQL_", default_name="unused", environ=environ)
+
+    assert (database["NAME"], database["USER"], database["HOST"], database["PORT"]) == (
+        "todo_db",
+        "user",
+        "database",
+        "5432",
+    )
+    assert database["CONN_MAX_AGE"] is None
+    assert database["OPTIONS"] == {"options": "-c statement_timeout=5000"}
+    assert "DISABLE_SERVER_SIDE_CURSORS" not in database
+
+
+def test_pgbouncer_pool_disables_server_side_cursors_and_startup_options():
+    environ = {"SQL_ENGINE": "django.db.backends.postgresql", "SQL_POOL": "pgbouncer", "SQL_CONN_MAX_AGE": "0"}
+
+    database = database_from_env("SQL_", default_name="unused", environ=environ)
+
+    assert database["DISABLE_SERVER_SIDE_CURSORS"] is True
+    assert database["OPTIONS"] == {}
+    assert database["CONN_MAX_AGE"] == 0
+
+
+def test_invalid_pool():
+    with pytest.raises(ValueError):
+        database_from_env("SQL_", default_name="unused", environ={"SQL_POOL": "pgpool"})
+
+
+def _sqlite_connection(path):
+    databases = {"default": database_from_env("SQL_", default_name=str(path), environ={})}
+    connection = ConnectionHandler(databases)["default"]
+    connection.ensure_connection()
+
+    return connection
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("profile, journal_mode, synchronous", [("wal", "wal", 1), ("", "delete", 2)])
+def test_sqlite_profile_is_applied_to_new_connections(settings, tmp_path, profile, journal_mode, synchronous):
+    settings.TODO_APP_SQLITE_PROFILE = profile
+    connection = _sqlite_connection(tmp_path / "tuning.sqlite3")
+
+    try:
+        with connection.cursor() as cursor:
+            assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == journal_mode
+            assert cursor.execute("PRAGMA synchronous").fetchone()[0] == synchronous
+    finally:
+        connection.close()
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from todo_app.models import User
+
+
+@pytest.fixture
+def todo_lists_with_tasks(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk", todo_list, done=True)
+    create_task("Eggs", todo_list)
+    create_todo_list("Empty", user)
+    someone_else = User.objects.create_user("Creator", "creator@list.com", "something")
+    create_task("Dune", create_todo_list("Books", someone_else))
+
+    return user
+
+
+@pytest.mark.django_db
+def test_export_ndjson_streams_own_todo_lists_and_tasks(todo_lists_with_tasks, create_authenticated_client, settings):
+    settings.TODO_APP_STREAM_CHUNK_SIZE = 2
+    client = create_authenticated_client(todo_lists_with_tasks)
+
+    response = client.get(reverse("export", kwargs={"export_format": "ndjson"}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert response.streaming
+
+    chunks = list(response.streaming_content)
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert len(chunks) == 2
+    assert sorted((record["todo_list_name"], record["task_name"]) for record in records) == [
+        ("Empty", None),
+        ("Super", "Eggs"),
+        ("Super", "Milk"),
+    ]
+    assert {record["owner"] for record in records} == {"TestUser"}
+
+
+@pytest.mark.django_db
+def test_export_csv_has_header_and_one_row_per_task(todo_lists_with_tasks, create_authenticated_client):
+    client = create_authenticated_client(todo_lists_with_tasks)
+
+    response = client.get(reverse("export", kwargs={"export_format": "csv"}))
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    assert sorted((row["todo_list_name"], row["task_name"], row["done"]) for row in rows) == [
+        ("Empty", "", ""),
+        ("Super", "Eggs", "False"),
+        ("Super", "Milk", "True"),
+    ]
+
+
+@pytest.mark.django_db
+def test_export_unknown_format_not_found(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("export", kwargs={"export_format": "xml"}))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_export_command_exports_every_user(todo_lists_with_tasks, tmp_path):
+    out = io.StringIO()
+    call_command("export_todos", stdout=out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert sorted(record["owner"] for record in records) == ["Creator", "TestUser", "TestUser", "TestUser"]
+
+    path = tmp_path / "export.csv"
+    call_command("export_todos", "--format=csv", "--user=Creator", f"--output={path}")
+    rows = list(csv.DictReader(path.open()))
+
+    assert [(row["todo_list_name"], row["task_name"]) for row in rows] == [("Books", "Dune")]
@@ -0,0 +1,210 @@
+import io
+import json
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from todo_app import imports
+from todo_app.models import Task, TodoList, User
+
+
+def _ndjson(*records):
+    return b"".join(
+        (record if isinstance(record, bytes) else json.dumps(record).encode()) + b"\n" for record in records
+    )
+
+
+@pytest.mark.django_db
+def test_import_command_dedupes_and_reports(create_user, create_todo_list, create_task, tmp_path):
+    user = create_user()
+    create_task("Milk", create_todo_list("Super", user))
+    path = tmp_path / "import.ndjson"
+    path.write_bytes(
+        _ndjson(
+            {"owner": "TestUser", "todo_list_name": "Super", "task_name": "Milk"},
+            {"owner": "TestUser", "todo_list_name": "Super", "task_name": "Eggs", "done": True},
+            {"owner": "TestUser", "todo_list_name": "Super", "task_name": "Eggs"},
+            {"owner": "TestUser", "todo_list_name": "Books", "task_name": "Dune"},
+            {"owner": "TestUser", "todo_list_name": "Empty", "archived": True},
+            {"owner": "Nobody", "todo_list_name": "Super", "task_name": "Bread"},
+            {"owner": "TestUser", "task_name": "No list"},
+            b"{not json",
+        )
+    )
+
+    out = io.StringIO()
+    call_command("import_todos", str(path), "--batch-size=3", stdout=out, stderr=io.StringIO())
+    report = json.loads(out.getvalue())
+
+    assert {key: report[key] for key in ["lines", "created_todo_lists", "created_tasks", "duplicates", "invalid"]} == {
+        "lines": 8,
+        "created_todo_lists": 2,
+        "created_tasks": 2,
+        "duplicates": 2,
+        "invalid": 3,
+    }
+    assert [error["line"] for error in report["errors"]] == [6, 7, 8]
+    assert TodoList.objects.get(name="Empty").archived is True
+    assert (TodoList.objects.get(name="Super").task_count, TodoList.objects.get(name="Super").done_count) == (2, 1)
+    assert Task.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_import_command_resumes_from_checkpoint(create_user, tmp_path):
+    user = create_user()
+    path = tmp_path / "import.ndjson"
+    checkpoint = tmp_path / "import.checkpoint"
+    path.write_bytes(_ndjson(*[{"todo_list_name": "Super", "task_name": f"Task {number}"} for number in range(5)]))
+
+    import_batch = imports.import_batch
+    calls = []
+
+    def failing_import_batch(*args):
+        calls.append(args)
+
+        if len(calls) == 2:
+            raise RuntimeError("Connection lost")
+
+        return import_batch(*args)
+
+    with mock.patch.object(imports, "import_batch", failing_import_batch), pytest.raises(RuntimeError):
+        call_command(
+            "import_todos",
+            str(path),
+            "--user=TestUser",
+            "--batch-size=2",
+            f"--checkpoint={checkpoint}",
+            stderr=io.StringIO(),
+        )
+
+    assert json.loads(checkpoint.read_text())["lines"] == 2
+    assert Task.objects.count() == 2
+
+    stderr = io.StringIO()
+    call_command(
+        "import_todos",
+        str(path),
+        "--user=TestUser",
+        "--batch-size=2",
+        f"--checkpoint={checkpoint}",
+        stdout=io.StringIO(),
+        stderr=stderr,
+    )
+
+    assert "Resuming after line 2." in stderr.getvalue()
+    assert not checkpoint.exists()
+    assert sorted(Task.objects.values_list("name", flat=True)) == [f"Task {number}" for number in range(5)]
+    assert TodoList.objects.get(owner=user).task_count == 5
+
+
+@pytest.mark.django_db
+def test_import_endpoint_imports_for_authenticated_user(create_user, create_authenticated_client):
+    user = create_user()
+    someone_else = User.objects.create_user("Creator", "creator@list.com", "something")
+    client = create_authenticated_client(user)
+    body = _ndjson(
+        {"owner": "Creator", "todo_list_name": "Super", "task_name": "Milk"},
+        {"todo_list_name": "Super", "task_name": "Eggs"},
+    )
+
+    response = client.post(reverse("import"), data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["created_tasks"] == 2
+    assert TodoList.objects.get().owner == user
+    assert not TodoList.objects.filter(owner=someone_else).exists()
+
+
+@pytest.mark.django_db
+def test_import_endpoint_accepts_upload_and_skips_imported_lines(create_user, create_authenticated_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+    upload = io.BytesIO(
+        _ndjson({"todo_list_name": "Super", "task_name": "Milk"}, {"todo_list_name": "Super", "task_name": "Eggs"})
+    )
+    upload.name = "import.ndjson"
+
+    response = client.post(reverse("import") + "?skip_lines=1", {"file": upload}, format="multipart")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["lines"] == 2
+    assert list(Task.objects.values_list("name", flat=True)) == ["Eggs"]
+
+
+@pytest.mark.django_db
+def test_import_counts_only_inserted_tasks(create_user, create_todo_list, monkeypatch):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    insert_tasks = imports.insert_tasks
+
+    def insert_after_concurrent_write(tasks, using):
+        Task.objects.create(name="Eggs", todo_list=todo_list)
+
+        return insert_tasks(tasks, using)
+
+    monkeypatch.setattr(imports, "insert_tasks", insert_after_concurrent_write)
+
+    lines = io.BytesIO(
+        _ndjson({"todo_list_name": "Super", "task_name": "Milk"}, {"todo_list_name": "Super", "task_name": "Eggs"})
+    )
+
+    report = imports.import_ndjson(lines, 10, owner=user)
+
+    assert (report.created_tasks, report.duplicates) == (1, 1)
+    todo_list.refresh_from_db()
+    assert (todo_list.task_count, todo_list.todo_tasks.count()) == (2, 2)
+
+
+@pytest.mark.django_db
+def test_import_endpoint_rejects_large_uploads(create_user, create_authenticated_client, settings):
+    settings.TODO_APP_IMPORT_MAX_BYTES = 64
+    client = create_authenticated_client(create_user())
+    body = _ndjson(*({"todo_list_name": "Super", "task_name": f"Task {number}"} for number in range(5)))
+    upload = io.BytesIO(body)
+    upload.name = "import.ndjson"
+
+    response = client.post(reverse("import"), data=body, content_type="application/x-ndjson")
+    multipart_response = client.post(reverse("import"), {"file": upload}, format="multipart")
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert multipart_response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert not Task.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_endpoint_charges_throttle_per_batch(create_user, create_authenticated_client, settings, throttle_store):
+    settings.TODO_APP_IMPORT_BATCH_SIZE = 2
+    client = create_authenticated_client(create_user())
+    body = _ndjson(*({"todo_list_name": "Super", "task_name": f"Task {number}"} for number in range(5)))
+
+    with mock.patch.object(throttle_store, "consume", wraps=throttle_store.consume) as consume:
+        response = client.post(reverse("import") + "?skip_lines=1", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [call.args[2] for call in consume.call_args_list] == [2]
+
+
+@pytest.mark.django_db
+def test_export_can_be_imported_back(create_user, create_todo_list, create_task, create_authenticated_client):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk", todo_list, done=True)
+    create_todo_list("Empty", user)
+    client = create_authenticated_client(user)
+    export = b"".join(client.get(reverse("export", kwargs={"export_format": "ndjson"})).streaming_content)
+
+    someone_else = User.objects.create_user("Creator", "creator@list.com", "something")
+    response = create_authenticated_client(someone_else).post(
+        reverse("import"), data=export, content_type="application/x-ndjson"
+    )
+
+    assert response.data["created_todo_lists"] == 2
+    imported = Task.objects.get(todo_list__owner=someone_else)
+    assert (imported.name, imported.done, imported.created) == (
+        "Milk",
+        True,
+        Task.objects.get(todo_list=todo_list).created,
+    )
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from todo_app.api.filtersets import TaskFilterSet
+from todo_app.models import Task, TodoList
+
+sqlite_only = pytest.mark.skipif(connection.vendor != "sqlite", reason="query plans are checked with SQLite")
+
+
+def _tasks_of_list():
+    return Task.objects.filter(todo_list=uuid.uuid4())
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_tasks_of_list_ordered_by_done_use_index():
+    plan = _tasks_of_list().order_by("done").explain()
+
+    assert "USING INDEX task_list_done_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_tasks_of_list_filtered_by_created_date_use_index():
+    plan = TaskFilterSet({"created": "2023-05-01"}, queryset=_tasks_of_list()).qs.explain()
+
+    assert "USING INDEX task_list_created_idx (todo_list_id=? AND created>? AND created<?)" in plan
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_todo_lists_of_owner_ordered_by_updated_use_index(create_user):
+    plan = TodoList.objects.filter(owner=create_user()).order_by("-updated").explain()
+
+    assert "USING INDEX todolist_owner_updated_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_archived_todo_lists_of_owner_use_partial_index(create_user):
+    plan = TodoList.objects.filter(owner=create_user(), archived=True).order_by("-updated").explain()
+
+    assert "USING INDEX todolist_owner_archived_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_active_todo_lists_of_owner_use_index(create_user):
+    plan = TodoList.objects.filter(owner=create_user(), archived=False).explain()
+
+    assert "USING INDEX todolist_owner_updated_idx" in plan
+
+
+@pytest.mark.django_db(databases="__all__")
+def test_models_have_no_missing_migrations():
+    call_command("makemigrations", "todo_app", "--check", "--dry-run", verbosity=0)
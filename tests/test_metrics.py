@@ -0,0 +1,134 @@
+import re
+
+import pytest
+from django.db import connection
+from rest_framework import status
+
+from todo_app.metrics import LocMemMetricsStore, SQLiteMetricsStore, recorder, render_prometheus
+
+
+def _server_timing(response):
+    return {
+        match["name"]: float(match["duration"])
+        for match in re.finditer(r"(?P<name>\w+);dur=(?P<duration>[\d.]+)", response["Server-Timing"])
+    }
+
+
+def _samples(text, metric):
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(metric)
+    }
+
+
+@pytest.mark.django_db
+def test_responses_have_a_server_timing_header(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    todo_list = create_todo_list("List", user)
+    client = create_authenticated_client(user)
+
+    response = client.post(f"/api/todo-lists/{todo_list.id}/tasks/", {"name": "Task"}, format="json")
+    timings = _server_timing(response)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert set(timings) == {"total", "db", "serializer", "auth", "throttle"}
+    assert timings["total"] >= timings["db"] > 0
+    assert timings["serializer"] > 0 and timings["auth"] > 0 and timings["throttle"] > 0
+    assert re.search(r'db;dur=[\d.]+;desc="[1-9]\d*"', response["Server-Timing"])
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_is_admin_only(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    assert client.get("/metrics/").status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_histograms_per_view(create_user, create_authenticated_client, django_user_model):
+    client = create_authenticated_client(create_user())
+
+    for _ in range(3):
+        client.get("/api/todo-lists/")
+
+    client.post("/api/todo-lists/", {"name": "List"}, format="json")
+
+    admin = django_user_model.objects.create_user("Admin", "admin@test.com", "blahblah", is_staff=True)
+    response = create_authenticated_client(admin).get("/metrics/")
+    text = response.content.decode()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE todo_app_request_duration_seconds histogram" in text
+
+    durations = _samples(text, "todo_app_request_duration_seconds_count")
+    assert durations['todo_app_request_duration_seconds_count{view="todo-lists-list",method="GET"}'] == 3
+    assert durations['todo_app_request_duration_seconds_count{view="todo-lists-list",method="POST"}'] == 1
+
+    requests = _samples(text, "todo_app_requests_total")
+    assert requests['todo_app_requests_total{view="todo-lists-list",method="POST",status="201"}'] == 1
+
+    buckets = _samples(text, 'todo_app_db_queries_bucket{view="todo-lists-list",method="GET"')
+    assert buckets['todo_app_db_queries_bucket{view="todo-lists-list",method="GET",le="+Inf"}'] == 3
+    assert list(buckets.values()) == sorted(buckets.values())
+
+
+@pytest.mark.django_db
+def test_streamed_responses_are_measured_until_their_last_chunk(
+    create_user, create_authenticated_client, create_todo_list, create_task, metrics_store
+):
+    user = create_user()
+    create_task("Task", create_todo_list("List", user))
+    response = create_authenticated_client(user).get("/api/export/ndjson")
+
+    assert "Server-Timing" in response
+    assert not metrics_store.totals()
+
+    content = b"".join(response.streaming_content)
+    recorder.flush()
+    totals = metrics_store.totals()
+    size = totals[("response_size_bytes", ("export", "GET"))]
+    queries = totals[("db_queries", ("export", "GET"))]
+
+    assert size[-1] == len(content) > 0
+    assert queries[-1] >= 2
+
+
+@pytest.mark.django_db
+def test_query_counter_survives_execute_wrapper_blocks(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+    client.get("/api/todo-lists/")
+    installed = list(connection.execute_wrappers)
+
+    with connection.execute_wrapper(lambda execute, *args: execute(*args)):
+        pass
+
+    assert connection.execute_wrappers == installed
+    assert _server_timing(client.get("/api/todo-lists/"))["db"] > 0
+
+
+@pytest.mark.parametrize("store_class", [LocMemMetricsStore, SQLiteMetricsStore])
+def test_store_adds_up_samples(store_class, tmp_path):
+    store = store_class() if store_class is LocMemMetricsStore else store_class(tmp_path / "metrics.sqlite3")
+    key = ("requests_total", ("health", "GET", "200"))
+
+    store.add({key: [2]})
+    store.add({key: [3], ("requests_total", ("health", "HEAD", "200")): [1]})
+
+    assert store.totals()[key] == [5]
+
+    store.clear()
+    assert store.totals() == {}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    key = ("db_queries", ("tasks-list", "GET"))
+    SQLiteMetricsStore(tmp_path / "metrics.sqlite3").add({key: [0, 1, 0, 1.0]})
+    SQLiteMetricsStore(tmp_path / "metrics.sqlite3").add({key: [0, 0, 1, 3.0]})
+
+    assert SQLiteMetricsStore(tmp_path / "metrics.sqlite3").totals() == {key: [0, 1, 1, 4.0]}
+
+
+def test_prometheus_format_escapes_labels():
+    text = render_prometheus({("requests_total", ('say "hi"\\', "GET", "200")): [1234567.0]})
+
+    assert 'todo_app_requests_total{view="say \\"hi\\"\\\\",method="GET",status="200"} 1234567' in text
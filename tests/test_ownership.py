@@ -0,0 +1,78 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from todo_app.models import TodoList, User
+from todo_app.ownership import get_todo_list_owner_id
+
+
+@pytest.mark.django_db
+def test_owner_of_hot_todo_list_is_cached(create_user, create_todo_list, django_assert_num_queries):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+
+    with django_assert_num_queries(1):
+        assert get_todo_list_owner_id(todo_list.id) == user.id
+
+    with django_assert_num_queries(0):
+        assert get_todo_list_owner_id(todo_list.id) == user.id
+
+
+@pytest.mark.django_db
+def test_owner_change_and_delete_invalidate_the_cache(create_user, create_todo_list):
+    user = create_user()
+    another_user = User.objects.create_user("Creator", "creator@list.com", "something")
+    todo_list = create_todo_list("Super", user)
+    assert get_todo_list_owner_id(todo_list.id) == user.id
+
+    todo_list.owner = another_user
+    todo_list.save()
+    assert get_todo_list_owner_id(todo_list.id) == another_user.id
+
+    todo_list_id = todo_list.id
+    todo_list.delete()
+    assert get_todo_list_owner_id(todo_list_id) is None
+
+
+@pytest.mark.django_db
+def test_missing_todo_list_is_not_cached(create_user, django_assert_num_queries):
+    user = create_user()
+    todo_list = TodoList(name="Super", owner=user)
+
+    with django_assert_num_queries(1):
+        assert get_todo_list_owner_id(todo_list.id) is None
+
+    # Created by another process, which can't drop this process' entries.
+    TodoList.objects.bulk_create([todo_list])
+
+    assert get_todo_list_owner_id(todo_list.id) == user.id
+
+
+@pytest.mark.django_db
+def test_hot_todo_list_permission_check_costs_no_query(
+    create_user, create_authenticated_client, create_todo_list, create_task, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk", todo_list)
+    url = reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id})
+    client.get(url)
+
+    # session, user, validators, count, tasks
+    with django_assert_num_queries(5):
+        response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_todo_list_detail_does_not_print_owner(create_user, create_authenticated_client, create_todo_list, capsys):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    response = client.get(f"/api/todo-lists/{todo_list.id}/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,188 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from todo_app.models import Task, TodoList
+
+
+def _walk(client, url):
+    names = []
+
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        names.extend(item["name"] for item in response.data["results"])
+        url = response.data["next"]
+
+    return names
+
+
+@pytest.mark.django_db
+def test_todo_lists_cursor_walk_returns_every_list_once(create_user, create_authenticated_client):
+    user = create_user()
+    client = create_authenticated_client(user)
+    now = timezone.now()
+    same_time = now - timedelta(days=1)
+
+    TodoList.objects.bulk_create(
+        [TodoList(name=f"List {number}", owner=user) for number in range(7)]
+        + [TodoList(name=f"Tied {number}", owner=user) for number in range(3)]
+    )
+    for number in range(7):
+        TodoList.objects.filter(name=f"List {number}").update(updated=now - timedelta(hours=number))
+    TodoList.objects.filter(name__startswith="Tied").update(updated=same_time)
+
+    names = _walk(client, "/api/todo-lists/?pagination=cursor&page_size=3")
+
+    expected = list(TodoList.objects.order_by("-updated", "-id").values_list("name", flat=True))
+    assert names == expected
+    assert len(set(names)) == 10
+
+
+@pytest.mark.django_db
+def test_tasks_cursor_walk_orders_by_done_then_created(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    created = timezone.now() - timedelta(days=1)
+    Task.objects.bulk_create(
+        [
+            Task(
+                name=f"Task {number}",
+                todo_list=todo_list,
+                done=number % 2 == 0,
+                created=created + timedelta(minutes=number),
+            )
+            for number in range(9)
+        ]
+    )
+
+    names = _walk(client, f"/api/todo-lists/{todo_list.id}/tasks/?pagination=cursor&page_size=2")
+
+    assert names == ["Task 1", "Task 3", "Task 5", "Task 7", "Task 0", "Task 2", "Task 4", "Task 6", "Task 8"]
+
+
+@pytest.mark.django_db
+def test_cursor_previous_link_returns_previous_page(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    Task.objects.bulk_create([Task(name=f"Task {number}", todo_list=todo_list) for number in range(5)])
+    url = f"/api/todo-lists/{todo_list.id}/tasks/?pagination=cursor&page_size=2"
+
+    first_page = client.get(url).data
+    second_page = client.get(first_page["next"]).data
+    previous_page = client.get(second_page["previous"]).data
+
+    assert first_page["previous"] is None
+    assert previous_page["results"] == first_page["results"]
+    assert previous_page["previous"] is None
+
+
+@pytest.mark.django_db
+def test_cursor_page_skips_count_query(
+    create_user, create_authenticated_client, create_todo_list, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    create_todo_list("Super", user)
+
+    # session, user, validators, todo lists with owners, task names
+    with django_assert_num_queries(5):
+        response = client.get("/api/todo-lists/?pagination=cursor")
+
+    assert len(response.data["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_not_found(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get("/api/todo-lists/?cursor=not-a-cursor")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_page_number_pagination_stays_the_default(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    create_todo_list("Super", user)
+
+    response = client.get("/api/todo-lists/")
+
+    assert response.data["count"] == 1
+
+
+def _streamed_json(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
+@pytest.mark.django_db
+def test_filter_tasks_is_paginated(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    Task.objects.bulk_create([Task(name=f"Task {number}", todo_list=todo_list) for number in range(25)])
+
+    response = client.get(reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + "?done=false")
+
+    assert response.data["count"] == 25
+    assert len(response.data["results"]) == 10
+
+
+@pytest.mark.django_db
+def test_filter_tasks_streams_every_match_in_chunks(
+    create_user, create_authenticated_client, create_todo_list, settings, django_assert_num_queries
+):
+    settings.TODO_APP_STREAM_CHUNK_SIZE = 4
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    Task.objects.bulk_create(
+        [Task(name=f"Task {number}", todo_list=todo_list, done=number % 3 == 0) for number in range(30)]
+    )
+    url = reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + "?done=false&stream=true"
+
+    response = client.get(url)
+
+    assert response.streaming
+    assert response["Content-Type"] == "application/json"
+
+    # 20 matches in chunks of 4: 5 full chunks and an empty one
+    with django_assert_num_queries(6):
+        tasks = _streamed_json(response)
+
+    assert len(tasks) == 20
+    assert len({task["id"] for task in tasks}) == 20
+    assert all(task["done"] is False for task in tasks)
+
+
+@pytest.mark.django_db
+def test_filter_todo_lists_streams_every_match(create_user, create_authenticated_client, settings):
+    settings.TODO_APP_STREAM_CHUNK_SIZE = 2
+    user = create_user()
+    client = create_authenticated_client(user)
+    for number in range(5):
+        todo_list = TodoList.objects.create(name=f"List {number}", owner=user, archived=number == 0)
+        Task.objects.create(name="Milk", todo_list=todo_list)
+
+    response = client.get(reverse("filter-todo-lists") + "?archived=false&stream=true")
+    todo_lists = _streamed_json(response)
+
+    assert sorted(todo_list["name"] for todo_list in todo_lists) == ["List 1", "List 2", "List 3", "List 4"]
+    assert all(todo_list["todo_tasks"] == ["Milk"] for todo_list in todo_lists)
+
+
+@pytest.mark.django_db
+def test_stream_without_matches_is_an_empty_array(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    response = client.get(reverse("filter-todo-lists") + "?stream=true")
+
+    assert _streamed_json(response) == []
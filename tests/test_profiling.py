@@ -0,0 +1,170 @@
+import json
+import pstats
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from todo_app.api.authentication import CachedTokenAuthentication
+from todo_app.models import User
+
+
+@pytest.fixture
+def staff_client(create_authenticated_client):
+    return create_authenticated_client(User.objects.create_user("Staff", "staff@test.com", "blahblah", is_staff=True))
+
+
+def _stored(profile_dir, kind):
+    return sorted(path.name for path in (profile_dir / kind).glob("*.json"))
+
+
+@pytest.mark.django_db
+def test_only_staff_users_can_ask_for_a_profile(create_user, create_authenticated_client, profile_dir):
+    response = create_authenticated_client(create_user()).get("/api/todo-lists/?profile=1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "X-Profile-Id" not in response
+    assert not profile_dir.exists()
+
+
+@pytest.mark.django_db
+def test_staff_profile_captures_sql_with_its_origin(staff_client, create_todo_list, profile_dir):
+    todo_list = create_todo_list("List", User.objects.get(username="Staff"))
+
+    response = staff_client.post(
+        f"/api/todo-lists/{todo_list.id}/tasks/", {"name": "Task"}, format="json", HTTP_X_PROFILE="1"
+    )
+    profile_id = response["X-Profile-Id"]
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert _stored(profile_dir, "requested") == [f"{profile_id}.json"]
+
+    artifact = staff_client.get(f"/profiles/{profile_id}/").json()
+
+    assert (artifact["view"], artifact["method"], artifact["status"]) == ("tasks-list", "POST", 201)
+    assert artifact["query_count"] == len(artifact["queries"]) > 0
+    assert any("INSERT" in query["sql"] for query in artifact["queries"])
+    assert any(
+        frame.startswith("todo_app/api/serializers.py:") for query in artifact["queries"] for frame in query["origin"]
+    )
+    assert "cumulative" in artifact["profile"]
+
+    listed = staff_client.get("/profiles/").json()
+    assert [profile["id"] for profile in listed] == [profile_id]
+    assert "queries" not in listed[0]
+
+
+@pytest.mark.django_db
+def test_profile_stats_can_be_downloaded(staff_client, tmp_path):
+    profile_id = staff_client.get("/api/todo-lists/", HTTP_X_PROFILE="true")["X-Profile-Id"]
+
+    response = staff_client.get(f"/profiles/{profile_id}/pstats")
+    downloaded = tmp_path / "downloaded.prof"
+    downloaded.write_bytes(b"".join(response.streaming_content))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert pstats.Stats(str(downloaded)).total_calls > 0
+
+
+@pytest.mark.django_db
+def test_token_authenticated_staff_can_ask_for_a_profile(profile_dir):
+    staff = User.objects.create_user("Staff", "staff@test.com", "blahblah", is_staff=True)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=staff).key}")
+
+    assert "X-Profile-Id" in client.get("/api/todo-lists/", HTTP_X_PROFILE="1")
+
+
+@pytest.mark.django_db
+def test_asking_for_a_profile_authenticates_once(profile_dir):
+    staff = User.objects.create_user("Staff", "staff@test.com", "blahblah", is_staff=True)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=staff).key}")
+    authenticate_credentials = CachedTokenAuthentication.authenticate_credentials
+
+    with mock.patch.object(
+        CachedTokenAuthentication, "authenticate_credentials", autospec=True, side_effect=authenticate_credentials
+    ) as authenticate:
+        response = client.get("/api/todo-lists/", HTTP_X_PROFILE="1")
+
+    assert "X-Profile-Id" in response
+    assert authenticate.call_count == 1
+
+
+@pytest.mark.django_db
+def test_non_staff_requests_are_never_profiled(create_user, create_authenticated_client):
+    client = create_authenticated_client(create_user())
+
+    with mock.patch("todo_app.middleware.ProfileSession") as profile_session:
+        response = client.post("/api/todo-lists/", {"name": "List"}, format="json", HTTP_X_PROFILE="1")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert not profile_session.called
+
+
+@pytest.mark.django_db
+def test_anonymous_requests_cant_ask_for_a_profile(profile_dir):
+    response = APIClient().get("/api/todo-lists/", HTTP_X_PROFILE="1", HTTP_AUTHORIZATION="Token unknown")
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert "X-Profile-Id" not in response
+    assert not profile_dir.exists()
+
+
+@pytest.mark.django_db
+def test_profile_endpoints_are_staff_only(create_user, create_authenticated_client, staff_client):
+    client = create_authenticated_client(create_user())
+
+    assert client.get("/profiles/").status_code == status.HTTP_403_FORBIDDEN
+    assert staff_client.get("/profiles/../settings/").status_code == status.HTTP_404_NOT_FOUND
+    assert staff_client.get("/profiles/20240101T000000000000-abcdef12/").status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_streamed_responses_are_profiled_to_their_last_chunk(staff_client, create_todo_list, create_task, profile_dir):
+    create_task("Task", create_todo_list("List", User.objects.get(username="Staff")))
+    response = staff_client.get("/api/export/ndjson?profile=1")
+
+    assert not _stored(profile_dir, "requested")
+
+    b"".join(response.streaming_content)
+    artifact = json.loads((profile_dir / "requested" / f"{response['X-Profile-Id']}.json").read_text())
+
+    assert any("todo_app_task" in query["sql"] for query in artifact["queries"])
+
+
+@pytest.mark.django_db
+def test_sampled_profiles_are_kept_in_a_ring_buffer(create_user, create_authenticated_client, profile_dir, settings):
+    settings.TODO_APP_PROFILE_SAMPLE_RATE = 3
+    settings.TODO_APP_PROFILE_RING_SIZE = 2
+    client = create_authenticated_client(create_user())
+
+    sampled = [client.get("/api/todo-lists/").get("X-Profile-Id") for _ in range(9)]
+    client.get("/health/")
+
+    assert sampled[2] and sampled[5] and sampled[8]
+    assert sampled.count(None) == 6
+    assert _stored(profile_dir, "sampled") == [f"{sampled[5]}.json", f"{sampled[8]}.json"]
+    assert not list((profile_dir / "sampled").glob(f"{sampled[2]}.*"))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_are_profiled(profile_dir):
+    client = AsyncClient()
+    client.force_login(User.objects.create_user("Staff", "staff@test.com", "blahblah", is_staff=True))
+
+    async def request():
+        return await client.get("/api/todo-lists/", headers={"X-Profile": "1"})
+
+    with override_settings(ROOT_URLCONF="drf_project.async_urls"):
+        response = async_to_sync(request)()
+
+    artifact = json.loads((profile_dir / "requested" / f"{response['X-Profile-Id']}.json").read_text())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert artifact["view"] == "todo-lists-list"
+    assert artifact["query_count"] > 0
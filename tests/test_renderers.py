@@ -0,0 +1,71 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from todo_app.api.parsers import ORJSONParser
+from todo_app.api.renderers import ORJSONRenderer
+from todo_app.api.serializers import TaskSerializer
+from todo_app.models import Task, TodoList
+
+PAYLOADS = [
+    None,
+    {},
+    [],
+    {"detail": gettext_lazy("Not found.")},
+    {"name": "Café\u2028leche\u2029☕", "done": False, "count": 3, "nothing": None},
+    {"id": uuid.uuid4(), "price": Decimal("1.50"), 1: "int key", True: "bool key"},
+    {
+        "created": timezone.now(),
+        "naive": datetime.datetime(2023, 5, 1, 10, 30, 15, 123456),
+        "day": datetime.date(2023, 5, 1),
+        "time": datetime.time(10, 30, 15, 123456),
+        "timedelta": datetime.timedelta(hours=1),
+    },
+    {"results": [(1, 2), {"nested": [{"deep": [True, False]}]}], "next": None},
+]
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_renderer_output_matches_json_renderer(data):
+    assert ORJSONRenderer().render(data, "application/json") == JSONRenderer().render(data, "application/json")
+
+
+def test_renderer_output_matches_for_serialized_tasks():
+    todo_list = TodoList(name="Super")
+    tasks = [Task(name=f"Task {number} ñ", done=number % 2 == 0, todo_list=todo_list) for number in range(20)]
+    data = {"count": 20, "next": None, "previous": None, "results": TaskSerializer(tasks, many=True).data}
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize("media_type", ["application/json; indent=4", "application/json"])
+def test_renderer_falls_back_for_indent_and_big_integers(media_type):
+    data = {"big": 2**70, "name": "Milk"}
+
+    assert ORJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+
+
+@pytest.mark.parametrize(
+    "body", [b'{"name": "Caf\\u00e9", "done": true, "ids": [1, 2]}', b"[]", b'{"big": 1180591620717411303424}']
+)
+def test_parser_matches_json_parser(body):
+    assert ORJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.parametrize("body", [b'{"name": }', b'{"value": NaN}', b""])
+def test_parser_errors_match_json_parser(body):
+    with pytest.raises(ParseError) as expected:
+        JSONParser().parse(io.BytesIO(body))
+
+    with pytest.raises(ParseError) as error:
+        ORJSONParser().parse(io.BytesIO(body))
+
+    assert str(error.value) == str(expected.value)
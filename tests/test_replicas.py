@@ -0,0 +1,139 @@
+import os
+import sqlite3
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+
+from todo_app.management.commands.sync_sqlite_replicas import copy_sqlite_database
+from todo_app.middleware import ReplicaRoutingMiddleware
+from todo_app.models import TodoList, User
+from todo_app.routers import ReplicaRouter, is_pinned_to_primary, pin_to_primary, replica_reads, sqlite_replica_lag
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.TODO_APP_DB_REPLICAS = ["replica1", "replica2"]
+    settings.TODO_APP_REPLICA_POLICY = "round_robin"
+
+    return settings.TODO_APP_DB_REPLICAS
+
+
+def _request(method="get", user=None):
+    request = getattr(RequestFactory(), method)("/api/todo-lists/")
+
+    if user is not None:
+        request.user = user
+
+    return request
+
+
+def test_safe_requests_read_from_replicas_round_robin(replicas):
+    router = ReplicaRouter()
+
+    for expected in ["replica1", "replica2", "replica1"]:
+        with replica_reads(_request(user=User(pk=1))):
+            # Every read of a request goes to the same replica.
+            assert [router.db_for_read(TodoList) for _ in range(3)] == [expected] * 3
+
+    assert router.db_for_write(TodoList) == "default"
+
+
+def test_anonymous_requests_read_from_replicas(replicas):
+    with replica_reads(_request(user=AnonymousUser())):
+        assert ReplicaRouter().db_for_read(TodoList) == "replica1"
+
+
+@pytest.mark.parametrize(
+    "request_kwargs",
+    [
+        {"method": "post", "user": User(pk=1)},
+        # The user isn't known yet, e.g. while it is being authenticated.
+        {},
+        {"user": SimpleLazyObject(lambda: User(pk=1))},
+    ],
+)
+def test_reads_go_to_the_primary(replicas, request_kwargs):
+    with replica_reads(_request(**request_kwargs)):
+        assert ReplicaRouter().db_for_read(TodoList) in (None, "default")
+
+
+def test_reads_outside_requests_and_without_replicas_use_the_default_routing(replicas, settings):
+    router = ReplicaRouter()
+
+    assert router.db_for_read(TodoList) is None
+
+    settings.TODO_APP_DB_REPLICAS = []
+
+    with replica_reads(_request(user=User(pk=1))):
+        assert router.db_for_read(TodoList) is None
+
+
+def test_writers_are_pinned_to_the_primary(replicas):
+    middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+    router = ReplicaRouter()
+
+    middleware(_request("post", user=User(pk=1)))
+    middleware(_request("post", user=AnonymousUser()))
+
+    assert is_pinned_to_primary(1)
+
+    with replica_reads(_request(user=User(pk=1))):
+        assert router.db_for_read(TodoList) == "default"
+
+    with replica_reads(_request(user=User(pk=2))):
+        assert router.db_for_read(TodoList) == "replica1"
+
+
+def test_pins_expire(replicas, settings):
+    settings.TODO_APP_REPLICA_PIN_SECONDS = 0
+    pin_to_primary(1)
+
+    assert not is_pinned_to_primary(1)
+
+
+@pytest.mark.parametrize(
+    "lags, expected",
+    [
+        ({"replica1": 3.0, "replica2": 0.5}, "replica2"),
+        ({"replica1": None, "replica2": 1.0}, "replica2"),
+        ({"replica1": 30.0, "replica2": 60.0}, "default"),
+        ({"replica1": None, "replica2": None}, "default"),
+    ],
+)
+def test_least_lag_policy(replicas, settings, monkeypatch, lags, expected):
+    settings.TODO_APP_REPLICA_POLICY = "least_lag"
+    settings.TODO_APP_REPLICA_MAX_LAG = 10
+    monkeypatch.setattr("todo_app.routers.measure_lag", lambda alias: lags[alias])
+
+    with replica_reads(_request(user=User(pk=1))):
+        assert ReplicaRouter().db_for_read(TodoList) == expected
+
+
+def test_replicas_are_never_migrated(replicas):
+    router = ReplicaRouter()
+
+    assert router.allow_migrate("replica1", "todo_app") is False
+    assert router.allow_migrate("default", "todo_app") is None
+
+
+def test_sqlite_replica_copy_and_lag(tmp_path):
+    primary, replica = tmp_path / "primary.sqlite3", tmp_path / "replica.sqlite3"
+
+    with sqlite3.connect(primary) as connection:
+        connection.execute("CREATE TABLE task (name TEXT)")
+        connection.execute("INSERT INTO task VALUES ('Task')")
+
+    connection.close()
+    copy_sqlite_database(primary, replica)
+
+    with sqlite3.connect(replica) as connection:
+        assert connection.execute("SELECT name FROM task").fetchall() == [("Task",)]
+
+    connection.close()
+    os.utime(replica, (0, os.path.getmtime(primary) - 4))
+
+    assert sqlite_replica_lag(primary, replica) == pytest.approx(4)
+    assert sqlite_replica_lag(replica, primary) == 0
@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from todo_app.models import Task, User
+from todo_app.search import search
+
+sqlite_only = pytest.mark.skipif(connection.vendor != "sqlite", reason="checks the SQLite FTS5 index")
+
+
+@pytest.mark.django_db
+def test_search_all_my_tasks_across_lists(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    super_list = create_todo_list("Super", user)
+    books_list = create_todo_list("Books", user)
+    create_task("Milk", super_list)
+    create_task("Almond milk", books_list)
+    create_task("Eggs", super_list)
+
+    another_user = User.objects.create_user("SomeOtherUser", "someother@user.com", "something")
+    create_task("Milk", create_todo_list("Super", another_user))
+
+    response = client.get(reverse("search-tasks") + "?search=milk")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 2
+    assert {task["todo_list"] for task in response.data["results"]} == {super_list.id, books_list.id}
+
+
+@pytest.mark.django_db
+def test_search_results_are_ranked(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk chocolate with extra hazelnuts and almonds", todo_list)
+    create_task("Milk", todo_list)
+
+    response = client.get(reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + "?search=milk")
+
+    assert [task["name"] for task in response.data["results"]] == [
+        "Milk",
+        "Milk chocolate with extra hazelnuts and almonds",
+    ]
+
+
+@pytest.mark.django_db
+def test_search_requires_every_term(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Whole milk", todo_list)
+    create_task("Skimmed milk", todo_list)
+    create_task("Whole wheat bread", todo_list)
+
+    response = client.get(reverse("search-tasks") + "?search=whole milk")
+
+    assert [task["name"] for task in response.data["results"]] == ["Whole milk"]
+
+
+@pytest.mark.django_db
+def test_search_matches_inside_words_and_short_terms(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Buttermilk", todo_list)
+    create_task("AWS exam", todo_list)
+
+    assert [task["name"] for task in client.get(reverse("search-tasks") + "?search=MILK").data["results"]] == [
+        "Buttermilk"
+    ]
+    assert [task["name"] for task in client.get(reverse("search-tasks") + "?search=ws").data["results"]] == ["AWS exam"]
+
+
+@pytest.mark.django_db
+def test_search_todo_lists(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    create_todo_list("Groceries", user)
+    create_todo_list("Books to read", user)
+
+    response = client.get(reverse("filter-todo-lists") + "?search=book")
+
+    assert [todo_list["name"] for todo_list in response.data["results"]] == ["Books to read"]
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_search_index_follows_renames_and_deletes(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    task = create_task("Milk", todo_list)
+    create_task("Eggs", todo_list)
+
+    Task.objects.filter(pk=task.pk).update(name="Oat drink")
+    assert list(search(Task.objects.all(), ["milk"])) == []
+    assert [task.name for task in search(Task.objects.all(), ["drink"])] == ["Oat drink"]
+
+    Task.objects.filter(name="Oat drink").delete()
+    assert list(search(Task.objects.all(), ["drink"])) == []
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_search_uses_full_text_index(create_user):
+    plan = search(Task.objects.filter(todo_list__owner=create_user()), ["milk"]).explain()
+
+    assert "VIRTUAL TABLE INDEX" in plan
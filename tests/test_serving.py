@@ -0,0 +1,51 @@
+import os
+
+import pytest
+from django.urls import reverse
+
+from drf_project import gunicorn_config
+from todo_app.warmup import warm_up
+
+
+@pytest.mark.django_db
+def test_health_check_skips_auth_throttling_and_database(client, django_assert_num_queries, throttle_store, settings):
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"anon": "1/hour"}}
+
+    with django_assert_num_queries(0):
+        responses = [client.get(reverse("health")) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert responses[0].json() == {"status": "ok"}
+    assert "no-cache" in responses[0]["Cache-Control"]
+    assert throttle_store.states == {}
+
+
+@pytest.mark.django_db
+def test_warm_up_doesnt_query_the_database(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert warm_up() >= 0
+
+
+def test_gunicorn_config_sizes_workers_from_cores():
+    config = gunicorn_config.server_settings({}, cores=3)
+
+    assert config["workers"] == 4
+    assert config["threads"] == 4
+    assert config["worker_class"] == "gthread"
+    assert config["max_requests_jitter"] == config["max_requests"] // 10
+
+
+def test_gunicorn_config_reads_the_environment():
+    environ = {"GUNICORN_WORKERS": "2", "GUNICORN_THREADS": "1", "GUNICORN_MAX_REQUESTS": "500"}
+
+    config = gunicorn_config.server_settings(environ, cores=3)
+
+    assert (config["workers"], config["threads"], config["worker_class"]) == (2, 1, "sync")
+    assert (config["max_requests"], config["max_requests_jitter"]) == (500, 50)
+
+
+def test_gunicorn_config_module_exposes_the_settings():
+    config = gunicorn_config.server_settings(os.environ, gunicorn_config.available_cores())
+
+    assert gunicorn_config.preload_app is True
+    assert {name: getattr(gunicorn_config, name) for name in config} == config
@@ -0,0 +1,273 @@
+import io
+import json
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db.models import Count, Max
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from tests.settings import TEST_SHARDS
+from todo_app import sharding
+from todo_app.models import Task, TodoList, User
+from todo_app.routers import ShardRouter
+from todo_app.sharding import MergedQuerySet, fan_out, shard_scope
+from todo_app.touches import coalesce_touches
+
+sharded_db = pytest.mark.django_db(databases=TEST_SHARDS)
+
+
+@pytest.fixture
+def shards(settings):
+    settings.TODO_APP_SHARDS = TEST_SHARDS
+
+    return TEST_SHARDS
+
+
+def _user(username, shard, **kwargs):
+    user = User.objects.create_user(username, f"{username}@test.com", "blahblah", **kwargs)
+    user.shard = shard
+    user.save()
+
+    return user
+
+
+def _todo_list(name, owner, updated=None, tasks=()):
+    # Saved as instances, so they follow their owner to their shard.
+    with coalesce_touches():
+        todo_list = TodoList(name=name, owner=owner)
+        todo_list.save()
+
+        for task in tasks:
+            Task(name=task, todo_list=todo_list).save()
+
+    if updated is not None:
+        TodoList.objects.using(todo_list._state.db).filter(pk=todo_list.pk).update(updated=updated)
+
+    return todo_list
+
+
+def _shard_of(todo_list_id):
+    return [alias for alias in TEST_SHARDS if TodoList.objects.using(alias).filter(pk=todo_list_id).exists()]
+
+
+@sharded_db
+def test_new_users_get_a_shard_and_are_mirrored(shards):
+    users = [User.objects.create_user(f"User{number}", f"user{number}@test.com", "blahblah") for number in range(3)]
+
+    assert sorted(user.shard for user in users) == sorted(shards)
+    assert User.objects.get(pk=users[0].pk).shard == users[0].shard
+
+    for alias in ["shard1", "shard2"]:
+        assert set(User.objects.using(alias).values_list("username", flat=True)) == {"User0", "User1", "User2"}
+
+    users[0].delete()
+
+    assert not User.objects.using("shard1").filter(pk=users[0].pk).exists()
+
+
+@sharded_db
+def test_todo_lists_and_tasks_are_written_to_the_shard_of_their_owner(shards, create_authenticated_client):
+    user = _user("Owner", "shard1")
+    client = create_authenticated_client(user)
+
+    todo_list_id = client.post("/api/todo-lists/", {"name": "Sharded"}, format="json").json()["id"]
+    client.post(f"/api/todo-lists/{todo_list_id}/tasks/", {"name": "Task"}, format="json")
+    client.post(f"/api/todo-lists/{todo_list_id}/tasks/", [{"name": "Bulk", "done": True}], format="json")
+
+    assert _shard_of(todo_list_id) == ["shard1"]
+    assert Task.objects.using("shard1").filter(todo_list_id=todo_list_id).count() == 2
+
+    todo_list = TodoList.objects.using("shard1").get(pk=todo_list_id)
+    assert (todo_list.task_count, todo_list.done_count) == (2, 1)
+
+    response = client.get(f"/api/todo-lists/{todo_list_id}/tasks/")
+    assert [task["name"] for task in response.json()["results"]] == ["Task", "Bulk"]
+
+    response = client.get("/api/todo-lists/")
+    assert sorted(response.json()["results"][0]["todo_tasks"]) == ["Bulk", "Task"]
+
+
+@sharded_db
+def test_superusers_list_the_todo_lists_of_every_shard(shards, create_authenticated_client):
+    now = timezone.now()
+    owners = [_user(f"Owner{number}", alias) for number, alias in enumerate(shards)]
+
+    for number in range(6):
+        _todo_list(f"List {number}", owners[number % 3], updated=now - timedelta(hours=number), tasks=[f"T{number}"])
+
+    admin = _user("Admin", "default", is_superuser=True)
+    client = create_authenticated_client(admin)
+
+    first_page = client.get("/api/todo-lists/?page_size=4").json()
+    second_page = client.get("/api/todo-lists/?page_size=4&page=2").json()
+
+    assert first_page["count"] == 6
+    assert [row["name"] for row in first_page["results"] + second_page["results"]] == [
+        f"List {number}" for number in range(6)
+    ]
+    assert [row["todo_tasks"] for row in first_page["results"]] == [["T0"], ["T1"], ["T2"], ["T3"]]
+
+    cursor_page = client.get("/api/todo-lists/?pagination=cursor&page_size=4").json()
+    next_page = client.get(cursor_page["next"]).json()
+
+    assert [row["name"] for row in cursor_page["results"] + next_page["results"]] == [
+        f"List {number}" for number in range(6)
+    ]
+
+    etag = client.get("/api/todo-lists/")["ETag"]
+    assert client.get("/api/todo-lists/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@sharded_db
+def test_superusers_reach_todo_lists_on_other_shards(shards, create_authenticated_client):
+    todo_list = _todo_list("Elsewhere", _user("Owner", "shard2"), tasks=["Task"])
+    client = create_authenticated_client(_user("Admin", "default", is_superuser=True))
+
+    assert client.get(f"/api/todo-lists/{todo_list.id}/").json()["todo_tasks"] == ["Task"]
+    assert client.patch(f"/api/todo-lists/{todo_list.id}/", {"name": "Renamed"}, format="json").status_code == 200
+    assert client.post(f"/api/todo-lists/{todo_list.id}/tasks/", {"name": "Other"}, format="json").status_code == 201
+
+    assert TodoList.objects.using("shard2").get(pk=todo_list.pk).name == "Renamed"
+    assert Task.objects.using("shard2").filter(todo_list=todo_list).count() == 2
+    assert _shard_of(todo_list.pk) == ["shard2"]
+
+
+@sharded_db
+def test_async_superuser_list_matches_the_sync_one(shards, create_authenticated_client):
+    for number, alias in enumerate(shards):
+        _todo_list(f"List {number}", _user(f"Owner{number}", alias), tasks=[f"T{number}"])
+
+    admin = _user("Admin", "default", is_superuser=True)
+    expected = create_authenticated_client(admin).get("/api/todo-lists/?page_size=2")
+    client = AsyncClient()
+    client.force_login(admin)
+
+    async def request():
+        return await client.get("/api/todo-lists/?page_size=2")
+
+    with override_settings(ROOT_URLCONF="drf_project.async_urls"):
+        response = async_to_sync(request)()
+
+    assert response.status_code == 200
+    assert response.content == expected.content
+
+
+@sharded_db
+def test_move_user_shard_command(shards, create_authenticated_client):
+    user = _user("Mover", "shard1")
+    updated = timezone.now() - timedelta(days=1)
+    todo_list = _todo_list("Moving", user, updated=updated, tasks=["One", "Two"])
+    out = io.StringIO()
+
+    call_command("move_user_shard", "shard2", "Mover", stdout=out)
+
+    assert "2 tasks" in out.getvalue()
+    assert _shard_of(todo_list.pk) == ["shard2"]
+    assert not Task.objects.using("shard1").exists()
+
+    moved = TodoList.objects.using("shard2").get(pk=todo_list.pk)
+    assert (moved.updated, moved.task_count) == (updated, 2)
+
+    client = create_authenticated_client(User.objects.get(pk=user.pk))
+    assert client.get(f"/api/todo-lists/{todo_list.pk}/").json()["todo_tasks"] == ["One", "Two"]
+
+
+@sharded_db
+def test_writes_are_turned_down_while_the_user_moves(shards, create_authenticated_client, monkeypatch):
+    user = _user("Mover", "shard1")
+    todo_list = _todo_list("Moving", user, tasks=["One"])
+    client = create_authenticated_client(User.objects.get(pk=user.pk))
+    coalesce_touches = sharding.coalesce_touches
+    statuses = []
+
+    @contextmanager
+    def write_then_coalesce_touches():
+        statuses.append(client.post(f"/api/todo-lists/{todo_list.pk}/tasks/", {"name": "Two"}).status_code)
+
+        with coalesce_touches():
+            yield
+
+    monkeypatch.setattr(sharding, "coalesce_touches", write_then_coalesce_touches)
+
+    assert sharding.move_user(user, "shard2", 100) == (1, 1)
+    assert statuses == [503]
+    assert not sharding.user_moving(user.pk)
+    assert client.post(f"/api/todo-lists/{todo_list.pk}/tasks/", {"name": "Two"}).status_code == 201
+    assert list(Task.objects.using("shard2").order_by("name").values_list("name", flat=True)) == ["One", "Two"]
+
+
+@sharded_db
+def test_token_users_are_served_from_their_new_shard(shards):
+    user = _user("Mover", "shard1")
+    _todo_list("Moving", user, tasks=["One"])
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+
+    assert client.get("/api/todo-lists/").json()["count"] == 1
+
+    sharding.move_user(User.objects.get(pk=user.pk), "shard2", 100)
+
+    assert client.get("/api/todo-lists/").json()["count"] == 1
+
+
+@sharded_db
+def test_export_command_reads_every_shard(shards):
+    for number, alias in enumerate(shards):
+        _todo_list(f"List {number}", _user(f"Owner{number}", alias), tasks=[f"T{number}"])
+
+    out = io.StringIO()
+    call_command("export_todos", stdout=out)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(record["task_name"] for record in records) == ["T0", "T1", "T2"]
+
+
+@sharded_db
+def test_router_follows_instances_and_the_request_shard(shards):
+    user = _user("Owner", "shard2")
+    router = ShardRouter()
+
+    assert router.db_for_write(TodoList, instance=user) == "shard2"
+    assert router.db_for_write(TodoList, instance=TodoList(owner_id=user.pk)) == "shard2"
+    assert router.db_for_read(TodoList) is None
+    assert router.db_for_read(User) is None
+
+    with shard_scope(lambda: "shard1"):
+        assert router.db_for_read(Task) == "shard1"
+
+    todo_list = TodoList.objects.using("shard1").create(name="On shard1", owner=user)
+    assert router.db_for_write(Task, instance=todo_list) == "shard1"
+    assert router.allow_relation(todo_list, user)
+    assert not router.allow_relation(todo_list, TodoList.objects.using("shard2").create(name="On shard2", owner=user))
+
+
+@sharded_db
+def test_merged_queryset_combines_the_shards(shards):
+    now = timezone.now()
+    users = [_user(f"Owner{number}", alias) for number, alias in enumerate(shards)]
+
+    for number in range(9):
+        _todo_list(f"List {number}", users[number % 3], updated=now - timedelta(minutes=number))
+
+    merged = fan_out(TodoList.objects.order_by("-updated").values("name", "updated"))
+
+    assert isinstance(merged, MergedQuerySet)
+    assert merged.count() == 9
+    assert [row["name"] for row in merged[2:5]] == ["List 2", "List 3", "List 4"]
+    assert [row["name"] for row in merged[2:5][1:]] == ["List 3", "List 4"]
+    assert merged.first()["name"] == "List 0"
+    assert merged.order_by().aggregate(updated=Max("updated"), count=Count("id")) == {"updated": now, "count": 9}
+
+
+def test_fan_out_is_a_no_op_without_shards(settings):
+    settings.TODO_APP_SHARDS = []
+    queryset = TodoList.objects.all()
+
+    assert fan_out(queryset) is queryset
+    assert ShardRouter().db_for_read(TodoList) is None
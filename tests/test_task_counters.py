@@ -0,0 +1,177 @@
+from importlib import import_module
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.urls import reverse
+from rest_framework import status
+
+from todo_app.models import Task, TodoList
+from todo_app.touches import coalesce_touches
+
+
+def _counts(todo_list):
+    todo_list.refresh_from_db()
+    return todo_list.task_count, todo_list.done_count
+
+
+@pytest.mark.django_db
+def test_counters_follow_task_create_toggle_and_delete(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+
+    response = client.post(url, {"name": "Milk"}, format="json")
+    client.post(url, {"name": "Eggs", "done": True}, format="json")
+    assert _counts(todo_list) == (2, 1)
+
+    client.patch(f"{url}{response.data['id']}/", {"done": True}, format="json")
+    assert _counts(todo_list) == (2, 2)
+
+    client.patch(f"{url}{response.data['id']}/", {"done": False}, format="json")
+    assert _counts(todo_list) == (2, 1)
+
+    client.delete(f"{url}{response.data['id']}/")
+    assert _counts(todo_list) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_counters_follow_bulk_create_and_bulk_update(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    data = [{"name": "Milk"}, {"name": "Eggs", "done": True}, {"name": "Bread"}]
+    response = client.post(f"/api/todo-lists/{todo_list.id}/tasks/", data, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert _counts(todo_list) == (3, 1)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": task["id"], "done": True} for task in response.data]
+    response = client.patch(url, data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert _counts(todo_list) == (3, 3)
+
+
+@pytest.mark.django_db
+def test_counters_follow_task_moved_to_another_todo_list(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    another_todo_list = create_todo_list("Market", user)
+
+    with coalesce_touches():
+        task = create_task("Milk", todo_list, done=True)
+
+    with coalesce_touches():
+        task = Task.objects.get(pk=task.pk)
+        task.todo_list = another_todo_list
+        task.save()
+
+    assert _counts(todo_list) == (0, 0)
+    assert _counts(another_todo_list) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_counters_are_serialized_filterable_and_orderable(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_todo_list("Empty", user)
+
+    with coalesce_touches():
+        create_task("Milk", todo_list, done=True)
+        create_task("Eggs", todo_list)
+
+    response = client.get(f"/api/todo-lists/{todo_list.id}/")
+    assert (response.data["task_count"], response.data["done_count"]) == (2, 1)
+
+    response = client.get("/api/todo-lists/filter?task_count__gte=1")
+    assert [result["name"] for result in response.data["results"]] == ["Super"]
+
+    response = client.get("/api/todo-lists/filter?ordering=task_count")
+    assert [result["name"] for result in response.data["results"]] == ["Empty", "Super"]
+
+
+@pytest.mark.django_db
+def test_recount_tasks_repairs_drift(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    another_todo_list = create_todo_list("Market", user)
+
+    with coalesce_touches():
+        create_task("Milk", todo_list, done=True)
+        create_task("Eggs", todo_list)
+
+    TodoList.objects.filter(pk=todo_list.pk).update(task_count=7, done_count=0)
+
+    out = StringIO()
+    call_command("recount_tasks", "--dry-run", stdout=out)
+    assert out.getvalue().strip() == "2 todo lists checked, 1 would be repaired."
+    assert _counts(todo_list) == (7, 0)
+
+    out = StringIO()
+    call_command("recount_tasks", "--batch-size=1", stdout=out)
+    assert out.getvalue().strip() == "2 todo lists checked, 1 repaired."
+    assert _counts(todo_list) == (2, 1)
+    assert _counts(another_todo_list) == (0, 0)
+
+
+@pytest.fixture
+def fail_after_touch(monkeypatch):
+    """
+    Fixture making a write transaction fail once it has touched its todo list, as a deferred constraint would.
+    Usage: fail_after_touch(module: str)
+    """
+
+    def _fail_after_touch(module):
+        touch_todo_list = getattr(import_module(module), "touch_todo_list")
+
+        def failing_touch(*args, **kwargs):
+            touch_todo_list(*args, **kwargs)
+            raise IntegrityError("deferred constraint failed")
+
+        monkeypatch.setattr(f"{module}.touch_todo_list", failing_touch)
+
+    return _fail_after_touch
+
+
+@pytest.mark.django_db
+def test_counters_are_unchanged_by_failed_bulk_create(
+    create_user, create_authenticated_client, create_todo_list, fail_after_touch
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    client.post(f"/api/todo-lists/{todo_list.id}/tasks/", {"name": "Milk"}, format="json")
+
+    fail_after_touch("todo_app.api.serializers")
+    data = [{"name": "Eggs", "done": True}, {"name": "Bread"}]
+    response = client.post(f"/api/todo-lists/{todo_list.id}/tasks/", data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert _counts(todo_list) == (1, 0)
+    assert Task.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_counters_are_unchanged_by_failed_bulk_update(
+    create_user, create_authenticated_client, create_todo_list, fail_after_touch
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    response = client.post(
+        f"/api/todo-lists/{todo_list.id}/tasks/", [{"name": "Milk"}, {"name": "Eggs"}], format="json"
+    )
+
+    fail_after_touch("todo_app.api.views.tasks_bulk")
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    response = client.patch(url, [{"id": task["id"], "done": True} for task in response.data], format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert _counts(todo_list) == (2, 0)
+    assert not Task.objects.filter(done=True).exists()
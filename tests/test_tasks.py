@@ -1,4 +1,5 @@
 import pytest
+from django.db import IntegrityError
 from django.urls import reverse
 from rest_framework import status
 
@@ -304,8 +305,8 @@ def test_filter_done_tasks(create_user, create_authenticated_client, create_todo
     url = reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + search_param
 
     response = client.get(url)
-    assert len(response.data) == 1
-    assert response.data[0]["name"] == done_task.name
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["name"] == done_task.name
 
 
 @pytest.mark.django_db
@@ -322,5 +323,106 @@ def test_filter_undone_tasks(create_user, create_authenticated_client, create_to
 
     response = client.get(url)
     print(response.data)
-    assert len(response.data) == 1
-    assert response.data[0]["name"] == undone_task.name
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["name"] == undone_task.name
+
+
+@pytest.mark.django_db
+def test_list_of_tasks_is_created_at_once(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+    data = [{"name": "Milk"}, {"name": "Eggs", "done": True}, {"name": "Bread"}]
+
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [task["name"] for task in response.data] == ["Milk", "Eggs", "Bread"]
+    assert todo_list.todo_tasks.count() == 3
+    assert todo_list.todo_tasks.get(name="Eggs").done is True
+
+
+@pytest.mark.django_db
+def test_bulk_create_uses_constant_number_of_queries(
+    create_user, create_authenticated_client, create_todo_list, django_assert_num_queries, settings
+):
+    settings.TODO_APP_BULK_BATCH_SIZE = 50
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+    data = [{"name": f"Task {number}"} for number in range(100)]
+
+    # session, user, ownership check, duplicates check, savepoint, 2 insert batches, release savepoint, touch
+    with django_assert_num_queries(9):
+        response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert todo_list.todo_tasks.count() == 100
+
+
+@pytest.mark.django_db
+def test_bulk_create_with_names_already_on_list_bad_request(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk", todo_list)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+    data = [{"name": "Eggs"}, {"name": "Milk"}]
+
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert todo_list.todo_tasks.count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_create_with_repeated_names_bad_request(create_user, create_authenticated_client, create_todo_list):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/"
+    data = [{"name": "Eggs"}, {"name": "Eggs"}]
+
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert todo_list.todo_tasks.count() == 0
+
+
+@pytest.mark.django_db
+def test_rename_task_after_another_task_of_the_list_bad_request(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    create_task("Milk", todo_list)
+    task = create_task("Eggs", todo_list)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/{task.id}/"
+    data = {"name": "Milk"}
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Task.objects.get(id=task.id).name == "Eggs"
+
+
+@pytest.mark.django_db
+def test_task_name_is_unique_per_todo_list(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    another_todo_list = create_todo_list("Books", user)
+    create_task("Milk", todo_list)
+    create_task("Milk", another_todo_list)
+
+    with pytest.raises(IntegrityError):
+        create_task("Milk", todo_list)
@@ -0,0 +1,144 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from todo_app.models import Task, TodoList, User
+
+
+@pytest.mark.django_db
+def test_bulk_update_marks_tasks_done(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    milk = create_task("Milk", todo_list)
+    eggs = create_task("Eggs", todo_list)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(milk.id), "done": True}, {"id": str(eggs.id), "done": True, "name": "Free range eggs"}]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["status"] for result in response.data["results"]] == ["updated", "updated"]
+    assert response.data["results"][1]["task"]["name"] == "Free range eggs"
+    assert Task.objects.filter(done=True).count() == 2
+    assert Task.objects.get(id=eggs.id).name == "Free range eggs"
+
+
+@pytest.mark.django_db
+def test_bulk_update_reports_tasks_not_found(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    another_todo_list = create_todo_list("Books", user)
+    milk = create_task("Milk", todo_list)
+    book = create_task("Dune", another_todo_list)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [
+        {"id": str(milk.id), "done": True},
+        {"id": str(book.id), "done": True},
+        {"id": str(uuid.uuid4()), "done": True},
+    ]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["status"] for result in response.data["results"]] == ["updated", "not_found", "not_found"]
+    assert Task.objects.get(id=book.id).done is False
+
+
+@pytest.mark.django_db
+def test_bulk_update_invalid_item_writes_nothing(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    milk = create_task("Milk", todo_list)
+    eggs = create_task("Eggs", todo_list)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(milk.id), "done": True}, {"id": str(eggs.id)}]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Task.objects.filter(done=True).count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_update_repeated_task_returns_bad_request(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    milk = create_task("Milk", todo_list)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(milk.id), "done": True}, {"id": str(milk.id), "done": False}]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_update_payload_size_is_bounded(create_user, create_authenticated_client, create_todo_list, settings):
+    settings.TODO_APP_BULK_MAX_ITEMS = 2
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(uuid.uuid4()), "done": True} for _ in range(3)]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_update_restricted_if_not_owner_of_todo_list(
+    create_user, create_authenticated_client, create_todo_list, create_task
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list_owner = User.objects.create_user("Creator", "creator@list.com", "something")
+    todo_list = create_todo_list("Super", todo_list_owner)
+    milk = create_task("Milk", todo_list)
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(milk.id), "done": True}]
+
+    response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert Task.objects.get().done is False
+
+
+@pytest.mark.django_db
+def test_bulk_update_touches_todo_list_once(
+    create_user, create_authenticated_client, create_todo_list, create_task, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    tasks = [create_task(f"Task {number}", todo_list) for number in range(10)]
+    TodoList.objects.filter(pk=todo_list.pk).update(updated=timezone.now() - timedelta(days=1))
+
+    url = reverse("bulk-update-tasks", kwargs={"todo_list_pk": todo_list.id})
+    data = [{"id": str(task.id), "done": True} for task in tasks]
+
+    # session, user, ownership check, savepoint, select for update, bulk update, release savepoint, touch
+    with django_assert_num_queries(8):
+        response = client.patch(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert Task.objects.filter(done=True).count() == 10
+    assert TodoList.objects.get().updated > timezone.now() - timedelta(minutes=1)
@@ -0,0 +1,90 @@
+import pytest
+from rest_framework import status
+
+from todo_app.api.throttling import LocMemThrottleStore, SQLiteThrottleStore, sliding_window
+
+MINUTE = (3, 60)
+DAY = (5, 86400)
+
+
+def test_sliding_window_weights_previous_window():
+    state, wait = sliding_window((0, 3, 0), MINUTE, 1, 60)
+    assert wait is not None
+
+    # A quarter of the way into the next window, 3 * 0.75 = 2.25 requests are still in the sliding window.
+    state, wait = sliding_window((0, 3, 0), MINUTE, 1, 75)
+    assert wait is not None
+
+    state, wait = sliding_window((0, 3, 0), MINUTE, 1, 100)
+    assert (state, wait) == ((1, 1, 3), None)
+
+
+@pytest.mark.parametrize("store_class", [LocMemThrottleStore, SQLiteThrottleStore])
+def test_store_charges_every_scope_or_none(store_class, tmp_path):
+    store = store_class() if store_class is LocMemThrottleStore else store_class(tmp_path / "throttle.sqlite3")
+    keys = ["user_minute:user:1", "user_day:user:1"]
+
+    assert store.consume(keys, [MINUTE, DAY], 2, 0) is None
+    assert store.consume(keys, [MINUTE, DAY], 1, 1) is None
+
+    # The minute scope is full, so the day scope is not charged either.
+    assert store.consume(keys, [MINUTE, DAY], 1, 2) == pytest.approx(58)
+    assert store.consume(keys, [MINUTE, DAY], 2, 121) is None
+
+    # The day scope is full now: 5 requests charged today.
+    assert store.consume(keys, [MINUTE, DAY], 1, 122) == pytest.approx(86400 - 122)
+
+    store.clear()
+    assert store.consume(keys, [MINUTE, DAY], 3, 63) is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    keys = ["user_minute:user:1"]
+    SQLiteThrottleStore(tmp_path / "throttle.sqlite3").consume(keys, [MINUTE], 3, 0)
+
+    assert SQLiteThrottleStore(tmp_path / "throttle.sqlite3").consume(keys, [MINUTE], 1, 1) is not None
+
+
+def test_sqlite_store_deletes_expired_windows(tmp_path):
+    store = SQLiteThrottleStore(tmp_path / "throttle.sqlite3")
+    store.consume(["user_minute:user:1"], [MINUTE], 1, 0)
+    store.consume(["user_day:user:1"], [DAY], 1, 0)
+
+    # Two minutes later the first minute window, and the one after it, are over.
+    store.consume(["user_minute:user:2"], [MINUTE], 1, 120)
+    keys = [key for key, in store.connection.execute("SELECT key FROM throttle ORDER BY key")]
+
+    assert keys == ["user_day:user:1", "user_minute:user:2"]
+    assert store.connection.execute("PRAGMA synchronous").fetchone() == (1,)
+
+
+@pytest.mark.django_db
+def test_user_requests_are_throttled(create_user, create_authenticated_client, settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"anon": "10/hour", "user_day": "10000/day", "user_minute": "2/minute"},
+    }
+    client = create_authenticated_client(create_user())
+
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+    response = client.get("/api/todo-lists/")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "Retry-After" in response
+
+
+@pytest.mark.django_db
+def test_bulk_requests_are_charged_per_batch(
+    create_user, create_authenticated_client, create_todo_list, settings, throttle_store
+):
+    settings.TODO_APP_BULK_BATCH_SIZE = 10
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+
+    data = [{"name": f"Task {number}"} for number in range(25)]
+    response = client.post(f"/api/todo-lists/{todo_list.id}/tasks/", data, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert throttle_store.states[f"user_minute:user:{user.pk}"][1] == 3
@@ -256,8 +256,8 @@ def test_search_archived_todo_lists(create_user, create_authenticated_client):
     url = reverse("filter-todo-lists") + search_param
 
     response = client.get(url)
-    assert len(response.data) == 1
-    assert response.data[0]["name"] == "Books"
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["name"] == "Books"
 
 
 @pytest.mark.django_db
@@ -275,4 +275,61 @@ def test_search_returns_only_users_results(create_user, create_authenticated_cli
     url = reverse("filter-todo-lists") + search_param
 
     response = client.get(url)
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
+
+
+def _create_todo_lists_with_tasks(user, amount):
+    for number in range(amount):
+        todo_list = TodoList.objects.create(name=f"List {number}", owner=user)
+        Task.objects.bulk_create([Task(name=f"Task {task}", todo_list=todo_list) for task in range(3)])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("amount", [1, 10])
+def test_list_todo_lists_uses_constant_number_of_queries(
+    create_user, create_authenticated_client, django_assert_num_queries, amount
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    _create_todo_lists_with_tasks(user, amount)
+
+    # session, user, validators, count, todo lists with owners, task names
+    with django_assert_num_queries(6):
+        response = client.get("/api/todo-lists/")
+
+    assert len(response.data["results"]) == amount
+    assert all(len(todo_list["todo_tasks"]) == 3 for todo_list in response.data["results"])
+    assert response.data["results"][0]["owner"]["username"] == user.username
+
+
+@pytest.mark.django_db
+def test_retrieve_todo_list_uses_constant_number_of_queries(
+    create_user, create_authenticated_client, create_todo_list, create_task, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    for name in ["Milk", "Eggs", "Bread"]:
+        create_task(name, todo_list)
+
+    # session, user, validators, todo list with owner, task names
+    with django_assert_num_queries(5):
+        response = client.get(f"/api/todo-lists/{todo_list.id}/")
+
+    assert sorted(response.data["todo_tasks"]) == ["Bread", "Eggs", "Milk"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("amount", [1, 10])
+def test_filter_todo_lists_uses_constant_number_of_queries(
+    create_user, create_authenticated_client, django_assert_num_queries, amount
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    _create_todo_lists_with_tasks(user, amount)
+
+    # session, user, validators, count, todo lists with owners, task names
+    with django_assert_num_queries(6):
+        response = client.get(reverse("filter-todo-lists") + "?archived=False")
+
+    assert len(response.data["results"]) == amount
@@ -1,8 +1,14 @@
+from datetime import timedelta
+from unittest import mock
+
 import pytest
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from todo_app.api.authentication import CachedTokenAuthentication
 from todo_app.models import User
 
 
@@ -26,3 +32,102 @@ def test_call_with_token_authentication():
     response = client.get(url)
 
     assert response.status_code == status.HTTP_200_OK
+
+
+def _token_client(user):
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    return client, token
+
+
+@pytest.mark.django_db
+def test_verified_token_is_served_from_cache(create_user, django_assert_num_queries):
+    user = create_user()
+    token = Token.objects.create(user=user)
+    authentication = CachedTokenAuthentication()
+
+    with django_assert_num_queries(1):
+        assert authentication.authenticate_credentials(token.key)[0] == user
+
+    with django_assert_num_queries(0):
+        cached_user, cached_token = authentication.authenticate_credentials(token.key)
+
+    assert (cached_user, cached_token.key) == (user, token.key)
+
+
+@pytest.mark.django_db
+def test_revoked_token_stops_working_right_away(create_user):
+    client, _ = _token_client(create_user())
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+    response = client.post(reverse("api_token_revoke"))
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_deactivated_user_is_locked_out_right_away(create_user):
+    user = create_user()
+    client, _ = _token_client(user)
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+    user.is_active = False
+    user.save()
+
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_expired_token_is_rejected_and_replaced_on_login(settings):
+    settings.TODO_APP_TOKEN_TTL = 3600
+    User.objects.create_user("SoftwareDev", password="something")
+    client = APIClient()
+    token_url = reverse("api_token_auth")
+    data = {"username": "SoftwareDev", "password": "something"}
+    token = client.post(token_url, data, format="json").data["token"]
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+    with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(hours=2)):
+        response = client.get("/api/todo-lists/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data["detail"] == "Token has expired."
+
+        client.credentials()
+        new_token = client.post(token_url, data, format="json").data["token"]
+
+    assert new_token != token
+    client.credentials(HTTP_AUTHORIZATION=f"Token {new_token}")
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_only_credential_changes_evict_cached_tokens(create_user, django_assert_num_queries):
+    user = create_user()
+    Token.objects.create(user=user)
+    user = User.objects.get(pk=user.pk)
+
+    # The user update only.
+    with django_assert_num_queries(1):
+        user.last_login = timezone.now()
+        user.save()
+
+    user.set_password("something else")
+
+    # The user update, then the tokens to evict.
+    with django_assert_num_queries(2):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_deleted_user_is_locked_out_right_away(create_user):
+    user = create_user()
+    client, _ = _token_client(user)
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_200_OK
+
+    user.delete()
+
+    assert client.get("/api/todo-lists/").status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,192 @@
+from datetime import timedelta
+
+import pytest
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from todo_app import touches
+from todo_app.models import Task, TodoList
+from todo_app.touches import coalesce_touches, suspend_touches
+
+
+class Rollback(Exception):
+    pass
+
+
+def _age(todo_list, days=1):
+    TodoList.objects.filter(pk=todo_list.pk).update(updated=timezone.now() - timedelta(days=days))
+
+
+def _todo_list_updates(queries):
+    return [
+        query
+        for query in queries
+        if query["sql"].startswith('UPDATE "todo_app_todolist"') and '"updated" =' in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+def test_task_update_touches_todo_list_once(
+    create_user, create_authenticated_client, create_todo_list, create_task, django_assert_num_queries
+):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    task = create_task("Milk", todo_list)
+    _age(todo_list)
+
+    url = f"/api/todo-lists/{todo_list.id}/tasks/{task.id}/"
+
+    # session, user, ownership check, task, savepoint, update, release savepoint, touch
+    with django_assert_num_queries(8):
+        response = client.patch(url, {"done": True}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert TodoList.objects.get().updated > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+def test_task_delete_touches_todo_list(create_user, create_authenticated_client, create_todo_list, create_task):
+    user = create_user()
+    client = create_authenticated_client(user)
+    todo_list = create_todo_list("Super", user)
+    task = create_task("Milk", todo_list)
+    _age(todo_list)
+
+    response = client.delete(f"/api/todo-lists/{todo_list.id}/tasks/{task.id}/")
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert TodoList.objects.get().updated > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+def test_touches_are_coalesced_in_one_statement(create_user, create_todo_list, create_task):
+    user = create_user()
+    todo_lists = [create_todo_list(f"List {number}", user) for number in range(3)]
+    tasks = [create_task(f"Task {number}", todo_list) for todo_list in todo_lists for number in range(5)]
+
+    with CaptureQueriesContext(connection) as context:
+        with coalesce_touches():
+            for task in tasks:
+                task.name += " renamed"
+                task.save()
+
+    assert len(_todo_list_updates(context.captured_queries)) == 1
+
+
+@pytest.mark.django_db
+def test_touch_outside_scope_is_deferred_to_commit(
+    create_user, create_todo_list, create_task, django_capture_on_commit_callbacks
+):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+    task = create_task("Milk", todo_list)
+    _age(todo_list)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        task.name = "Eggs"
+        task.save()
+
+    assert TodoList.objects.get().updated < timezone.now() - timedelta(hours=1)
+
+    for callback in callbacks:
+        callback()
+
+    assert TodoList.objects.get().updated > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+def test_suspended_touches_do_not_update_todo_list(create_user, create_todo_list):
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+
+    with CaptureQueriesContext(connection) as context:
+        with coalesce_touches(), suspend_touches():
+            Task.objects.create(name="Milk", todo_list=todo_list)
+
+    assert _todo_list_updates(context.captured_queries) == []
+    assert TodoList.objects.get().task_count == 1
+
+
+@pytest.mark.django_db
+def test_touches_can_be_disabled_by_settings(create_user, create_todo_list, settings):
+    settings.TODO_APP_TOUCH_TODO_LISTS = False
+    user = create_user()
+    todo_list = create_todo_list("Super", user)
+
+    with CaptureQueriesContext(connection) as context:
+        with coalesce_touches():
+            Task.objects.create(name="Milk", todo_list=todo_list)
+
+    assert _todo_list_updates(context.captured_queries) == []
+
+
+@pytest.mark.django_db
+def test_touches_of_a_rolled_back_savepoint_are_dropped(create_user, create_todo_list):
+    todo_list = create_todo_list("Super", create_user())
+
+    with coalesce_touches():
+        Task.objects.create(name="Milk", todo_list=todo_list)
+
+        with pytest.raises(Rollback), transaction.atomic():
+            Task.objects.create(name="Eggs", todo_list=todo_list, done=True)
+            raise Rollback
+
+    todo_list.refresh_from_db()
+    assert (todo_list.task_count, todo_list.done_count) == (1, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_touches_of_a_rolled_back_transaction_are_dropped(create_user, create_todo_list):
+    todo_list = create_todo_list("Super", create_user())
+    _age(todo_list)
+
+    with coalesce_touches():
+        with pytest.raises(Rollback), transaction.atomic():
+            Task.objects.create(name="Milk", todo_list=todo_list)
+            raise Rollback
+
+        assert TodoList.objects.get().updated < timezone.now() - timedelta(hours=1)
+
+        with transaction.atomic():
+            Task.objects.create(name="Eggs", todo_list=todo_list, done=True)
+
+        # Flushed on commit, before the scope ends.
+        todo_list.refresh_from_db()
+
+    assert (todo_list.task_count, todo_list.done_count) == (1, 1)
+    assert todo_list.updated > timezone.now() - timedelta(minutes=1)
+    assert list(Task.objects.values_list("name", flat=True)) == ["Eggs"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failing_counter_update_rolls_back_the_task_write(create_user, create_todo_list, monkeypatch):
+    todo_list = create_todo_list("Super", create_user())
+
+    def fail(*args, **kwargs):
+        raise DatabaseError("database is locked")
+
+    monkeypatch.setattr(touches, "update_todo_lists", fail)
+
+    with pytest.raises(DatabaseError), transaction.atomic():
+        Task.objects.create(name="Milk", todo_list=todo_list)
+
+    todo_list.refresh_from_db()
+    assert not Task.objects.exists()
+    assert (todo_list.task_count, todo_list.done_count) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_tasks_deleted_with_their_todo_list_do_not_update_it(create_user, create_todo_list, create_task):
+    todo_list = create_todo_list("Super", create_user())
+
+    for number in range(3):
+        create_task(f"Task {number}", todo_list)
+
+    with CaptureQueriesContext(connection) as context:
+        todo_list.delete()
+
+    assert not [query for query in context.captured_queries if query["sql"].startswith('UPDATE "todo_app_todolist"')]
+    assert not Task.objects.exists()
@@ -0,0 +1,82 @@
+import zoneinfo
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from todo_app.api.serializers import TaskSerializer, TodoListSerializer
+from todo_app.api.values import datetime_representation
+from todo_app.models import Task, TodoList
+from todo_app.touches import coalesce_touches
+
+
+def _assert_same_output(results, expected):
+    assert JSONRenderer().render(results) == JSONRenderer().render(expected)
+
+
+@pytest.fixture
+def todo_lists_with_tasks(create_user, create_todo_list, create_task):
+    user = create_user()
+
+    for number in range(3):
+        with coalesce_touches():
+            todo_list = create_todo_list(f"List {number}", user, archived=number == 1)
+
+            for task_number in range(4):
+                create_task(f"Task {task_number} ñ", todo_list, done=task_number % 2 == 0)
+
+    return user
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?pagination=cursor"])
+def test_todo_list_list_matches_serializer(todo_lists_with_tasks, create_authenticated_client, query):
+    client = create_authenticated_client(todo_lists_with_tasks)
+
+    response = client.get("/api/todo-lists/" + query)
+
+    expected = TodoListSerializer(TodoList.objects.order_by("-updated", "-id"), many=True).data
+    _assert_same_output(response.data["results"], expected)
+
+
+@pytest.mark.django_db
+def test_filter_todo_lists_matches_serializer(todo_lists_with_tasks, create_authenticated_client):
+    client = create_authenticated_client(todo_lists_with_tasks)
+
+    response = client.get(reverse("filter-todo-lists") + "?archived=false&ordering=name")
+
+    expected = TodoListSerializer(TodoList.objects.filter(archived=False).order_by("name"), many=True).data
+    _assert_same_output(response.data["results"], expected)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?pagination=cursor"])
+def test_task_list_matches_serializer(todo_lists_with_tasks, create_authenticated_client, query):
+    client = create_authenticated_client(todo_lists_with_tasks)
+    todo_list = TodoList.objects.get(name="List 0")
+
+    response = client.get(f"/api/todo-lists/{todo_list.id}/tasks/" + query)
+
+    tasks = Task.objects.filter(todo_list=todo_list).order_by("done", "created", "id")
+    _assert_same_output(response.data["results"], TaskSerializer(tasks, many=True).data)
+
+
+@pytest.mark.django_db
+def test_filter_tasks_matches_serializer_when_streamed(todo_lists_with_tasks, create_authenticated_client):
+    client = create_authenticated_client(todo_lists_with_tasks)
+    todo_list = TodoList.objects.get(name="List 2")
+
+    response = client.get(reverse("filter-tasks", kwargs={"todo_list_pk": todo_list.id}) + "?done=true&stream=true")
+
+    tasks = Task.objects.filter(todo_list=todo_list, done=True).order_by("done", "created", "id")
+    assert b"".join(response.streaming_content) == JSONRenderer().render(TaskSerializer(tasks, many=True).data)
+
+
+@pytest.mark.parametrize("zone", ["UTC", "America/Argentina/Buenos_Aires"])
+def test_datetime_representation_matches_datetime_field(zone):
+    value = timezone.now()
+
+    with timezone.override(zoneinfo.ZoneInfo(zone)):
+        assert datetime_representation()(value) == serializers.DateTimeField().to_representation(value)
@@ -0,0 +1,147 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+VALIDATORS_AGGREGATE = {
+    "updated": Max("updated"),
+    "count": Count("id"),
+    "tasks": Sum("task_count"),
+    "done": Sum("done_count"),
+}
+
+
+class ConditionalGetMixin:
+    """
+    Answers `If-None-Match` / `If-Modified-Since` GET requests with a 304 before running the view.
+
+    The validators come from one aggregate over the todo lists the response depends on (see
+    `get_conditional_queryset`): the greatest `updated`, the number of lists and the totals of their task
+    counters. Every list or task change refreshes `TodoList.updated` (see `todo_app.touches`), so the
+    aggregate changes whenever the response would. The counters cover the writes that change them without
+    refreshing `updated`: tasks written inside `suspend_touches()` and the repairs of `recount_tasks`. The
+    strong ETag also covers the full URL, the media type and the user, so every page, filter and format gets
+    its own.
+
+    Last-Modified, the greatest `updated`, is only sent when the response depends on a single todo list (see
+    `conditional_scope_is_single`): when a list is deleted or leaves a collection scope, e.g. archived out
+    of `?archived=false`, the greatest `updated` of the others doesn't move forward, while the ETag does.
+
+    Conditional responses are turned off along with the touches (`TODO_APP_TOUCH_TODO_LISTS`), as the
+    validators would go stale.
+    """
+
+    def get_conditional_queryset(self):
+        """Todo lists whose changes change the response, or None to skip the conditional handling."""
+        raise NotImplementedError
+
+    def conditional_scope_is_single(self):
+        """Whether `get_conditional_queryset` is a single todo list, which the response gets a Last-Modified of."""
+        return False
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(super().aretrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators(request)
+
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+            if response.status_code != 200:
+                return response
+
+        return set_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, handler, request, *args, **kwargs):
+        """Async `conditional_response`, for async handlers."""
+        validators = await self.aget_validators(request)
+
+        if validators is None:
+            return await handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+
+            if response.status_code != 200:
+                return response
+
+        return set_validators(response, etag, last_modified)
+
+    def get_validators(self, request):
+        """Returns the (ETag, Last-Modified timestamp) pair of the response, or None."""
+        queryset = self.get_validators_queryset(request)
+
+        if queryset is None:
+            return None
+
+        return self.make_validators(request, queryset.aggregate(**VALIDATORS_AGGREGATE))
+
+    async def aget_validators(self, request):
+        queryset = self.get_validators_queryset(request)
+
+        if queryset is None:
+            return None
+
+        return self.make_validators(request, await queryset.aaggregate(**VALIDATORS_AGGREGATE))
+
+    def make_validators(self, request, aggregate):
+        etag, last_modified = make_validators(request, aggregate)
+
+        return etag, last_modified if self.conditional_scope_is_single() else None
+
+    def get_validators_queryset(self, request):
+        if request.method not in ("GET", "HEAD") or not settings.TODO_APP_TOUCH_TODO_LISTS:
+            return None
+
+        queryset = self.get_conditional_queryset()
+
+        return None if queryset is None else queryset.order_by()
+
+
+def make_validators(request, aggregate):
+    """Builds the (ETag, Last-Modified timestamp) pair of a response from its `VALIDATORS_AGGREGATE`."""
+    updated = aggregate["updated"]
+    key = "|".join(
+        [
+            updated.isoformat() if updated else "",
+            str(aggregate["count"]),
+            str(aggregate["tasks"]),
+            str(aggregate["done"]),
+            request.get_full_path(),
+            request.accepted_media_type or "",
+            str(request.user.pk),
+        ]
+    )
+    etag = '"{}"'.format(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    return etag, int(updated.timestamp()) if updated else None
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+    return response
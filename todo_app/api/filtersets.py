@@ -1,7 +1,12 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import DateFilter
+from rest_framework.filters import SearchFilter
 
 from todo_app.models import Task
+from todo_app.search import search
 
 
 class TaskFilterSet(filters.FilterSet):
@@ -15,12 +20,38 @@ class TaskFilterSet(filters.FilterSet):
 
     Example usage: /api/todo-lists/{list_id}/tasks/filter?done=true&name=example&created=2023-05-01
 
-    Note: The `created` field supports date filtering using lookup expressions like `date`, `lte`, `gte`, etc.
+    Note: The `created` field filters by the day of creation in the current time zone. It is translated to a
+    range over the `created` column so the (todo_list, created) index can be used.
     """
 
-    created = DateFilter(field_name="created", lookup_expr="date")
+    created = DateFilter(field_name="created", method="filter_created_date")
     done = filters.BooleanFilter(field_name="done")
 
     class Meta:
         model = Task
         fields = ["done", "name", "created"]
+
+    def filter_created_date(self, queryset, name, value):
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        end = timezone.make_aware(datetime.combine(value + timedelta(days=1), time.min))
+
+        return queryset.filter(**{f"{name}__gte": start, f"{name}__lt": end})
+
+
+class RankedSearchFilter(SearchFilter):
+    """
+    Search filter backed by the indexed text search of the database (see `todo_app.search`).
+
+    Every term of the `search` parameter must appear in the name, and results are ordered by relevance,
+    best first, before the ordering of the view. Example usage: /api/tasks/search?search=milk
+
+    Note: In cursor pagination and streaming modes the keyset order of the view is kept instead.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+
+        if not terms:
+            return queryset
+
+        return search(queryset, terms)
@@ -1,7 +1,248 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
 
 class LargerResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 20
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async `paginate_queryset`: the count and the page are fetched with the async ORM."""
+        page_size = self.get_page_size(request)
+
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        self.request = request
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        return list(self.page)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination over a stable composite key.
+
+    The key is read from the `cursor_ordering` attribute of the view, e.g. ("-updated", "-id"), and must end
+    with a unique field. Each page is fetched with a `WHERE key > last_key` condition on the key columns, so
+    there is no `COUNT(*)` nor `OFFSET` scan and every page costs the same however deep it is.
+
+    The cursor encodes the key of the last (or first, for the previous page) row of the page.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 20
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async `paginate_queryset`: the page is fetched with the async ORM."""
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request, view)])
+
+    def get_page_queryset(self, queryset, request, view):
+        """Queryset of the page, plus one row to tell whether there is more."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = get_keys(view.cursor_ordering)
+        self.model = queryset.model
+        self.reverse, self.values = self.decode_cursor(request)
+
+        return keyset_queryset(queryset, self.keys, self.values, self.reverse)[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = self.values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.values is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor((False, self.get_key(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor((True, self.get_key(self.page[0])))
+
+    def get_key(self, row):
+        return get_key(row, self.keys)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return False, None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+
+            if len(cursor["k"]) != len(self.keys):
+                raise ValueError("Cursor doesn't match the ordering key.")
+
+            values = [
+                self.model._meta.get_field(field).to_python(value) for (field, _), value in zip(self.keys, cursor["k"])
+            ]
+            return bool(cursor["r"]), values
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        reverse, values = cursor
+        payload = json.dumps({"r": int(reverse), "k": [_cursor_value(value) for value in values]})
+        encoded = urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+def get_keys(ordering):
+    """Parses an ordering such as ("-updated", "-id") into (field, descending) pairs."""
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def get_key(row, keys):
+    """Key of a row, either a model instance or a `values()` dict."""
+    if isinstance(row, dict):
+        return [row[field] for field, _ in keys]
+
+    return [getattr(row, field) for field, _ in keys]
+
+
+def keyset_queryset(queryset, keys, values=None, reverse=False):
+    """
+    Orders the queryset by the keys and keeps the rows strictly after `values` (before them when `reverse`).
+
+    The condition is expanded as `k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...` and bounded by `k1 >= v1`, so
+    the index range stays tight.
+    """
+    queryset = queryset.order_by(*[f"-{field}" if descending != reverse else field for field, descending in keys])
+
+    if values is None:
+        return queryset
+
+    condition = Q()
+    equal = {}
+
+    for (field, descending), value in zip(keys, values):
+        lookup = "lt" if descending != reverse else "gt"
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+
+    first_field, first_descending = keys[0]
+    bound = "lte" if first_descending != reverse else "gte"
+
+    return queryset.filter(Q(**{f"{first_field}__{bound}": values[0]}) & condition)
+
+
+def iterate_keyset(queryset, ordering, chunk_size):
+    """Yields every row of the queryset in chunks, walking the keyset so each chunk costs the same."""
+    keys = get_keys(ordering)
+    values = None
+
+    while True:
+        chunk = list(keyset_queryset(queryset, keys, values)[:chunk_size])
+
+        if chunk:
+            yield chunk
+
+        if len(chunk) < chunk_size:
+            return
+
+        values = get_key(chunk[-1], keys)
+
+
+def _cursor_value(value):
+    """JSON value of a key column, keeping the full precision of datetimes."""
+    if isinstance(value, date):
+        return value.isoformat()
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    return value
+
+
+class PageOrCursorPagination(BasePagination):
+    """
+    Page number pagination by default, keyset pagination when the request asks for it.
+
+    Clients opt into keyset pagination with `?pagination=cursor` and then follow the `next` and `previous`
+    links, which carry the `cursor` parameter. Filters keep working in both modes, but in cursor mode the
+    order is always the `cursor_ordering` key of the view.
+    """
+
+    page_pagination_class = LargerResultsSetPagination
+    cursor_pagination_class = KeysetPagination
+    pagination_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_paginator(request).paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await self.get_paginator(request).apaginate_queryset(queryset, request, view)
+
+    def get_paginator(self, request):
+        cursor_mode = (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+        self.paginator = self.cursor_pagination_class() if cursor_mode else self.page_pagination_class()
+
+        return self.paginator
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_pagination_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = {}
+
+        for pagination_class in [self.page_pagination_class, self.cursor_pagination_class]:
+            for parameter in pagination_class().get_schema_operation_parameters(view):
+                parameters.setdefault(parameter["name"], parameter)
+
+        return [
+            *parameters.values(),
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to walk the results with keyset pagination.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+        ]
@@ -0,0 +1,28 @@
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses JSON-serialized data with orjson.
+
+    Bodies orjson rejects, non UTF-8 bodies and non strict parsing go through `JSONParser`, so invalid
+    JSON gets the same error and anything `JSONParser` accepts, like integers over 64 bits, still parses.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if not self.strict or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -1,7 +1,7 @@
 from rest_framework import permissions
 from rest_framework.exceptions import PermissionDenied
 
-from todo_app.models import TodoList
+from todo_app.ownership import get_todo_list_owner_id
 
 
 class TodoListOwnerOnly(permissions.BasePermission):
@@ -17,8 +17,7 @@ class TodoListOwnerOnly(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        print(obj.owner)
-        if request.user.is_superuser or (request.user == obj.owner):
+        if request.user.is_superuser or (request.user.pk == obj.owner_id):
             return True
 
         raise PermissionDenied("You do not have permission to access this TodoList.")
@@ -37,7 +36,7 @@ class TaskTodoListOwnerOnly(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        if request.user.is_superuser or (request.user == obj.todo_list.owner):
+        if request.user.is_superuser or (request.user.pk == get_todo_list_owner_id(obj.todo_list_id)):
             return True
 
         raise PermissionDenied({"detail": "You do not have permission to access this TodoList."})
@@ -56,9 +55,8 @@ class AllTasksTodoListOwnerOnly(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        if (
-            request.user.is_superuser
-            or TodoList.objects.filter(pk=view.kwargs.get("todo_list_pk"), owner=request.user).exists()
+        if request.user.is_superuser or (
+            request.user.is_authenticated and request.user.pk == get_todo_list_owner_id(view.kwargs.get("todo_list_pk"))
         ):
             return True
 
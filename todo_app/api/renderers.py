@@ -0,0 +1,41 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer which serializes to JSON with orjson, writing bytes directly.
+
+    The output is byte-for-byte the one of DRF's `JSONRenderer` with the default settings (compact, unicode
+    and strict JSON): values orjson doesn't encode the same way, like datetimes or lazy strings, go through
+    the DRF encoder, and \\u2028 / \\u2029 are escaped. Known differences: floats with an exponent are
+    written as `1e16` instead of `1e+16`, and NaN / infinity as null instead of raising an error. The API
+    doesn't serialize floats.
+
+    Indented output (`application/json; indent=4`), other JSON settings and data orjson can't encode, such
+    as integers over 64 bits, fall back to `JSONRenderer`.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
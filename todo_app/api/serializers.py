@@ -1,9 +1,34 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
 from rest_framework import serializers
+from rest_framework.fields import empty
 
+from todo_app.metrics import timed
 from todo_app.models import Task, TodoList, User
+from todo_app.sharding import fan_out
+from todo_app.touches import touch_todo_list
+
+from .values import ValuesSerializer, datetime_representation
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent validating and representing data to the serializer phase of the request metrics
+    (see `todo_app.metrics`).
+    """
+
+    def run_validation(self, data=empty):
+        with timed("serializer"):
+            return super().run_validation(data)
+
+    def to_representation(self, instance):
+        with timed("serializer"):
+            return super().to_representation(instance)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for User model.
 
@@ -25,7 +50,45 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {"password": {"write_only": True}}
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    List serializer used to create many tasks of a todo list at once.
+
+    Duplicated names are detected within the payload and against the database with a single `IN`
+    query, and tasks are inserted with `bulk_create` in batches of `TODO_APP_BULK_BATCH_SIZE`.
+    """
+
+    def validate(self, attrs):
+        names = Counter(item["name"] for item in attrs)
+        repeated = sorted(name for name, count in names.items() if count > 1)
+
+        if repeated:
+            raise serializers.ValidationError(f"Tasks repeated in the payload: {', '.join(repeated)}.")
+
+        todo_list_id = self.context["view"].kwargs["todo_list_pk"]
+        existing = Task.objects.filter(todo_list_id=todo_list_id, name__in=names).values_list("name", flat=True)
+
+        if existing:
+            raise serializers.ValidationError(f"These tasks are already on the list: {', '.join(sorted(existing))}.")
+
+        return attrs
+
+    def create(self, validated_data):
+        todo_list_id = self.context["view"].kwargs["todo_list_pk"]
+        tasks = [Task(todo_list_id=todo_list_id, **item) for item in validated_data]
+        using = router.db_for_write(Task)
+
+        try:
+            with transaction.atomic(using=using):
+                Task.objects.using(using).bulk_create(tasks, batch_size=settings.TODO_APP_BULK_BATCH_SIZE)
+                touch_todo_list(todo_list_id, tasks=len(tasks), done=sum(task.done for task in tasks), using=using)
+        except IntegrityError:
+            raise serializers.ValidationError("Some of these tasks are already on the list!")
+
+        return tasks
+
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for TodoList model.
 
@@ -46,19 +109,79 @@ class TaskSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "id",
         ]
+        list_serializer_class = TaskListSerializer
 
     def create(self, validated_data, **kwargs):
         """Validates that a Task can't be duplicated in the same todo list."""
-        todo_list_id = self.context["view"].kwargs["todo_list_pk"]
+        validated_data["todo_list_id"] = self.context["view"].kwargs["todo_list_pk"]
+
+        try:
+            with transaction.atomic(using=router.db_for_write(Task)):
+                return super(TaskSerializer, self).create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError("This task is already on the list!")
 
-        if Task.objects.filter(todo_list_id=todo_list_id, name=validated_data["name"]).exists():
+    def update(self, instance, validated_data):
+        """Validates that a Task can't be renamed after another task of the same todo list."""
+        try:
+            with transaction.atomic(using=instance._state.db):
+                return super(TaskSerializer, self).update(instance, validated_data)
+        except IntegrityError:
             raise serializers.ValidationError("This task is already on the list!")
 
-        validated_data["todo_list_id"] = todo_list_id
-        return super(TaskSerializer, self).create(validated_data)
+
+class BulkTaskUpdateListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """Validates that a bulk update payload doesn't repeat task ids."""
+
+    def validate(self, attrs):
+        ids = [item["id"] for item in attrs]
+
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("The same task can't be updated twice in one request.")
+
+        return attrs
+
+
+class BulkTaskUpdateSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Serializer for a single item of a bulk task update payload.
+
+    It includes the following fields:
+    - id: The unique identifier of the task to update.
+    - name: The new name of the task (optional).
+    - done: The new done status of the task (optional).
+
+    At least one of `name` or `done` must be provided. Used with `many=True`, the whole payload is
+    validated in one pass and task ids can't be repeated.
+    """
+
+    id = serializers.UUIDField()
+    name = serializers.CharField(max_length=100, required=False)
+    done = serializers.BooleanField(required=False)
+
+    class Meta:
+        list_serializer_class = BulkTaskUpdateListSerializer
+
+    def validate(self, attrs):
+        if attrs.keys() == {"id"}:
+            raise serializers.ValidationError("At least one field to update is required.")
+
+        return attrs
+
+
+class SearchTaskSerializer(TaskSerializer):
+    """
+    Read-only serializer for task search results across todo lists.
+
+    It adds the todo list each task belongs to to the `TaskSerializer` fields.
+    """
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ["todo_list"]
+        read_only_fields = fields
 
 
-class TodoListSerializer(serializers.ModelSerializer):
+class TodoListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Task model.
 
@@ -79,4 +202,100 @@ class TodoListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TodoList
-        fields = ["id", "name", "todo_tasks", "owner", "archived"]
+        fields = ["id", "name", "todo_tasks", "owner", "archived", "task_count", "done_count"]
+        read_only_fields = ["task_count", "done_count"]
+
+
+class TaskValuesSerializer(ValuesSerializer):
+    """Read-only fast path of `TaskSerializer` for task lists, over `values()` rows."""
+
+    values_fields = ["id", "name", "done", "created"]
+
+    def get_representation(self, rows):
+        represent_datetime = datetime_representation()
+
+        def represent(row):
+            return {
+                "id": str(row["id"]),
+                "name": row["name"],
+                "done": row["done"],
+                "created": represent_datetime(row["created"]),
+            }
+
+        return represent
+
+
+class TodoListValuesSerializer(ValuesSerializer):
+    """
+    Read-only fast path of `TodoListSerializer` for todo list lists, over `values()` rows.
+
+    The task names of the whole page are fetched with one extra query, like the prefetch does (one per shard
+    when the rows come from every shard).
+    """
+
+    values_fields = ["id", "name", "owner_id", "owner__username", "archived", "task_count", "done_count", "updated"]
+
+    def get_task_names(self, rows):
+        """Returns the task names of every todo list of the rows, by todo list id."""
+        task_names = {row["id"]: [] for row in rows}
+
+        if task_names:
+            for todo_list_id, name in self.get_tasks(task_names):
+                task_names[todo_list_id].append(name)
+
+        return task_names
+
+    async def aget_task_names(self, rows):
+        task_names = {row["id"]: [] for row in rows}
+
+        if task_names:
+            async for todo_list_id, name in self.get_tasks(task_names):
+                task_names[todo_list_id].append(name)
+
+        return task_names
+
+    def get_tasks(self, todo_list_ids):
+        tasks = Task.objects.filter(todo_list_id__in=todo_list_ids).values_list("todo_list_id", "name")
+
+        return fan_out(tasks) if self.context.get("fan_out") else tasks.using(self.context.get("shard"))
+
+    def get_representation(self, rows):
+        return self.make_representation(self.get_task_names(rows))
+
+    async def aget_representation(self, rows):
+        return self.make_representation(await self.aget_task_names(rows))
+
+    def make_representation(self, task_names):
+        def represent(row):
+            return {
+                "id": str(row["id"]),
+                "name": row["name"],
+                "todo_tasks": task_names[row["id"]],
+                "owner": {"username": row["owner__username"]},
+                "archived": row["archived"],
+                "task_count": row["task_count"],
+                "done_count": row["done_count"],
+            }
+
+        return represent
+
+
+class ImportRowSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Serializer for a single record of a todo list import.
+
+    It includes the following fields:
+    - owner: The username of the owner of the todo list (only read when the import isn't made for a user).
+    - todo_list_name: The name of the todo list, which is created when the owner has none with that name.
+    - archived: Indicates whether a new todo list is archived or not.
+    - task_name: The name of the task (optional, records without it only make sure the todo list exists).
+    - done: Indicates whether the task is marked as done or not.
+    - created: The date and time of task creation (optional, now by default).
+    """
+
+    owner = serializers.CharField(max_length=150, required=False, allow_null=True)
+    todo_list_name = serializers.CharField(max_length=100)
+    archived = serializers.BooleanField(default=False)
+    task_name = serializers.CharField(max_length=100, required=False, allow_null=True, default=None)
+    done = serializers.BooleanField(default=False, allow_null=True)
+    created = serializers.DateTimeField(required=False, allow_null=True)
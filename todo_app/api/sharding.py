@@ -0,0 +1,54 @@
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS
+from todo_app.sharding import shard_scope, sharding_enabled, todo_list_shard, user_moving, user_shard
+
+
+class UserMoving(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Your todo lists are being moved, try again shortly."
+    default_code = "user_moving"
+
+
+class ShardedViewMixin:
+    """
+    Serves a todo list or task view from the shard holding its data (see `todo_app.sharding`).
+
+    The shard is the one of the todo list named by the `shard_url_kwarg` of the URL, if any, else the one of
+    the user. It is resolved once the request is authenticated, and `get_queryset` must use it. Every other
+    todo list and task query made while handling the request is routed there too, so serializers and signal
+    receivers write to the right shard.
+
+    Writes of a user whose todo lists are being moved to another shard (see `move_user`) get a 503.
+    """
+
+    shard_url_kwarg = "todo_list_pk"
+
+    def dispatch(self, request, *args, **kwargs):
+        with shard_scope(self.get_shard):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if (
+            request.method not in SAFE_METHODS
+            and sharding_enabled()
+            and request.user.is_authenticated
+            and user_moving(request.user.pk)
+        ):
+            raise UserMoving()
+
+        # Resolved now, as async actions can't query for it.
+        self.get_shard()
+
+    def get_shard(self):
+        """Alias of the shard of the request, or None when sharding is off."""
+        if not hasattr(self, "shard"):
+            todo_list_id = self.kwargs.get(self.shard_url_kwarg)
+            shard = todo_list_shard(todo_list_id) if todo_list_id is not None else None
+            self.shard = shard or user_shard(self.request.user)
+
+        return self.shard
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "shard": self.get_shard()}
@@ -1,4 +1,305 @@
-from rest_framework.throttling import UserRateThrottle
+"""
+Rate limiting with fixed-size sliding window counters kept in a store shared by every worker.
+
+Each (scope, user) pair keeps three numbers: the current fixed window, the requests counted in it and the
+requests counted in the previous one. The request rate is estimated as the previous count, weighted by how
+much of the previous window still overlaps the sliding window, plus the current count. A throttle evaluates
+and charges all of its scopes at once, in one atomic store operation, and charges nothing when any scope is
+over its rate.
+
+The store is chosen with `TODO_APP_THROTTLE_STORE`:
+
+- `SQLiteThrottleStore` (default) keeps the counters in the SQLite file `TODO_APP_THROTTLE_SQLITE_PATH`, so
+  every worker of a single host shares them. Deployments on several hosts need a networked store.
+- `LocMemThrottleStore` keeps them in process memory, for tests and single process servers.
+
+Other stores (e.g. Redis) only need to implement `ThrottleStore.consume`.
+"""
+import math
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from todo_app.metrics import timed
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Parses a rate such as "200/minute" into (number of requests, duration in seconds)."""
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+def sliding_window(state, limit, cost, now):
+    """
+    Charges `cost` requests to the (window, current, previous) counters of a scope.
+
+    Returns the new counters and the seconds to wait before the request would fit, None when it fits.
+    """
+    num_requests, duration = limit
+    window = int(now // duration)
+    current, previous = 0, 0
+
+    if state is not None:
+        if state[0] == window:
+            current, previous = state[1], state[2]
+        elif state[0] == window - 1:
+            previous = state[1]
+
+    elapsed = now - window * duration
+    overlap = 1 - elapsed / duration
+
+    if previous * overlap + current + cost <= num_requests:
+        return (window, current + cost, previous), None
+
+    if current + cost > num_requests or not previous:
+        return (window, current, previous), duration - elapsed
+
+    # Wait until enough of the previous window has slid out.
+    return (window, current, previous), duration * (1 - (num_requests - current - cost) / previous) - elapsed
+
+
+class ThrottleStore:
+    """Keeps the sliding window counters of every (scope, ident) key."""
+
+    def consume(self, keys, limits, cost, now):
+        """
+        Charges `cost` requests to every key, each under its (number of requests, duration) limit, as one
+        atomic operation.
+
+        Returns None when every key had room, otherwise the seconds to wait, and then nothing is charged.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+def _charge(states, keys, limits, cost, now):
+    """Evaluates every key and returns (new states, longest wait), the wait being None when all fit."""
+    new_states = {}
+    waits = []
+
+    for key, limit in zip(keys, limits):
+        new_states[key], wait = sliding_window(states.get(key), limit, cost, now)
+
+        if wait is not None:
+            waits.append(wait)
+
+    return new_states, max(waits) if waits else None
+
+
+class LocMemThrottleStore(ThrottleStore):
+    """Counters kept in the memory of the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states = {}
+
+    def consume(self, keys, limits, cost, now):
+        with self.lock:
+            new_states, wait = _charge(self.states, keys, limits, cost, now)
+
+            if wait is None:
+                self.states.update(new_states)
+
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+
+class SQLiteThrottleStore(ThrottleStore):
+    """
+    Counters kept in a SQLite file, shared by every process of the host; it doesn't fit deployments on
+    several hosts, which need a networked store.
+
+    Every call reads and writes the rows of its keys in one `BEGIN IMMEDIATE` transaction, which serializes
+    concurrent calls across processes, and deletes the rows of the keys whose windows are over, which would
+    count nothing anymore. The file is in WAL mode with `synchronous=NORMAL`, so commits don't wait for a
+    sync to disk: a power loss may drop the last counts, which is fine for rate limiting.
+    """
+
+    def __init__(self, path=None, timeout=5.0):
+        self.path = str(path or settings.TODO_APP_THROTTLE_SQLITE_PATH)
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(throttle)")]
+
+            # The counters are short-lived: a table of an older layout is replaced rather than migrated.
+            if columns and "expires" not in columns:
+                connection.execute("DROP TABLE throttle")
+
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, window INTEGER NOT NULL, "
+                "current INTEGER NOT NULL, previous INTEGER NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS throttle_expires ON throttle (expires)")
+            self.local.connection = connection
+
+        return connection
+
+    def consume(self, keys, limits, cost, now):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            connection.execute("DELETE FROM throttle WHERE expires <= ?", [now])
+            rows = connection.execute(
+                f"SELECT key, window, current, previous FROM throttle WHERE key IN ({', '.join('?' * len(keys))})",
+                keys,
+            )
+            states = {key: (window, current, previous) for key, window, current, previous in rows}
+            new_states, wait = _charge(states, keys, limits, cost, now)
+
+            if wait is None:
+                # Once the window after it is over too, a window counts nothing anymore.
+                durations = {key: duration for key, (_, duration) in zip(keys, limits)}
+                connection.executemany(
+                    "INSERT INTO throttle (key, window, current, previous, expires) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET window = excluded.window, current = excluded.current, "
+                    "previous = excluded.previous, expires = excluded.expires",
+                    [(key, *state, (state[0] + 2) * durations[key]) for key, state in new_states.items()],
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+        return wait
+
+    def clear(self):
+        self.connection.execute("DELETE FROM throttle")
+
+
+_stores = {}
+
+
+def get_throttle_store():
+    """Returns the store configured by `TODO_APP_THROTTLE_STORE`, created once per process."""
+    path = settings.TODO_APP_THROTTLE_STORE
+
+    if path not in _stores:
+        try:
+            _stores[path] = import_string(path)()
+        except ImportError as error:
+            raise ImproperlyConfigured(f"Invalid TODO_APP_THROTTLE_STORE {path!r}: {error}")
+
+    return _stores[path]
+
+
+def batch_throttle_cost(request, items=None, batch_size=None):
+    """
+    Cost of a bulk request: one token per write batch of its items, which default to the list sent as the
+    request data, in batches of `TODO_APP_BULK_BATCH_SIZE`.
+    """
+    if items is None:
+        if not isinstance(request.data, list):
+            return 1
+
+        items = len(request.data)
+
+    return max(1, math.ceil(items / (batch_size or settings.TODO_APP_BULK_BATCH_SIZE)))
+
+
+class StoreRateThrottle(BaseThrottle):
+    """
+    Throttles a request under every rate of `scopes` (see `DEFAULT_THROTTLE_RATES`) with one store call.
+
+    Views can charge more than one token per request by defining `get_throttle_cost(request)`.
+    """
+
+    scopes = []
+
+    def __init__(self):
+        self.limits = []
+        self.wait_time = None
+
+        for scope in self.scopes:
+            try:
+                self.limits.append((scope, parse_rate(api_settings.DEFAULT_THROTTLE_RATES[scope])))
+            except KeyError:
+                raise ImproperlyConfigured(f"No default throttle rate set for '{scope}' scope")
+
+    def get_ident_key(self, request):
+        """Identity the requests are counted for, or None to skip throttling."""
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+
+        return f"anon:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request)
+
+        if ident is None or not self.limits:
+            return True
+
+        get_throttle_cost = getattr(view, "get_throttle_cost", None)
+        cost = get_throttle_cost(request) if get_throttle_cost else 1
+        keys = [f"{scope}:{ident}" for scope, _ in self.limits]
+
+        with timed("throttle"):
+            self.wait_time = get_throttle_store().consume(keys, [limit for _, limit in self.limits], cost, time.time())
+
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserRateThrottle(StoreRateThrottle):
+    """
+    Throttling class for rate limiting the API requests of authenticated users.
+
+    Both user scopes are checked and charged together, with a single store operation.
+
+    Throttle Scopes:
+    - user_minute: Restricts the number of requests per minute for each user.
+    - user_day: Restricts the number of requests per day for each user.
+    """
+
+    scopes = ["user_minute", "user_day"]
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return super().get_ident_key(request)
+
+        return None
+
+
+class AnonRateThrottle(StoreRateThrottle):
+    """
+    Throttling class for rate limiting the API requests of anonymous users, by client address.
+
+    Throttle Scope:
+    - anon: Restricts the number of requests per hour for each client address.
+    """
+
+    scopes = ["anon"]
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+
+        return super().get_ident_key(request)
 
 
 class MinuteRateThrottle(UserRateThrottle):
@@ -11,7 +312,7 @@ class MinuteRateThrottle(UserRateThrottle):
     - user_minute: Restricts the number of requests per minute for each user.
     """
 
-    scope = "user_minute"
+    scopes = ["user_minute"]
 
 
 class DailyRateThrottle(UserRateThrottle):
@@ -24,4 +325,4 @@ class DailyRateThrottle(UserRateThrottle):
     - user_day: Restricts the number of requests per day for each user.
     """
 
-    scope = "user_day"
+    scopes = ["user_day"]
@@ -0,0 +1,140 @@
+"""
+Read-only fast path for list endpoints.
+
+A `ValuesSerializer` stands in for a `ModelSerializer` on list GETs: rows are fetched with `values()` as
+dicts holding only the columns the output needs, and turned into the very same output by a representation
+function built once per response, instead of a model instance and a tree of serializer fields per row.
+"""
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.serializers import ReturnList
+from rest_framework.settings import api_settings
+
+from todo_app.metrics import timed
+
+
+def datetime_representation():
+    """Returns a function representing datetimes exactly like `serializers.DateTimeField`."""
+    if api_settings.DATETIME_FORMAT is None or api_settings.DATETIME_FORMAT.lower() != ISO_8601 or not settings.USE_TZ:
+        return serializers.DateTimeField().to_representation
+
+    current_timezone = timezone.get_current_timezone()
+
+    def represent(value):
+        if value is None:
+            return None
+
+        value = value.astimezone(current_timezone) if timezone.is_aware(value) else value
+        value = value.isoformat()
+
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return represent
+
+
+class ValuesSerializer:
+    """
+    Read-only `many=True` serializer of the `values()` rows fetched by `values_queryset`.
+
+    Subclasses list the columns to fetch in `values_fields` and build the representation function of a row
+    in `get_representation`.
+    """
+
+    values_fields = []
+
+    def __init__(self, instance=None, many=True, context=None, **kwargs):
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def values_queryset(cls, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*cls.values_fields)
+
+    def get_representation(self, rows):
+        raise NotImplementedError
+
+    async def aget_representation(self, rows):
+        """Async `get_representation`, to override when building the representation queries the database."""
+        return self.get_representation(rows)
+
+    @property
+    def data(self):
+        rows = list(self.instance)
+
+        with timed("serializer"):
+            represent = self.get_representation(rows)
+
+            return ReturnList([represent(row) for row in rows], serializer=self)
+
+    async def adata(self):
+        """Async `data`: the rows, when still a queryset, and anything else needed are fetched asynchronously."""
+        rows = self.instance if isinstance(self.instance, list) else [row async for row in self.instance]
+
+        with timed("serializer"):
+            represent = await self.aget_representation(rows)
+
+            return ReturnList([represent(row) for row in rows], serializer=self)
+
+
+class ValuesListMixin:
+    """
+    Serves the list action of a view with its `values_serializer_class`, from `values()` rows.
+
+    Filtering, pagination (both modes) and streaming keep working, as they only need the ordering columns,
+    which the values serializer must fetch.
+
+    `alist` and `aretrieve` are the async versions of the list and retrieve actions, fetching the rows with
+    the async ORM (see `todo_app.api.views.async_reads`). The object of `aretrieve` is checked against the
+    object permissions as a model instance holding only its values fields, which must include the ones the
+    permissions read.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        self.values_list_action = True
+
+        return super().list(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        self.values_list_action = True
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+
+            if page is not None:
+                return self.get_paginated_response(await self.get_serializer(page, many=True).adata())
+
+        return Response(await self.get_serializer(queryset, many=True).adata())
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.values_serializer_class.values_queryset(self.filter_queryset(self.get_queryset()))
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        row = await queryset.filter(**{self.lookup_field: lookup}).afirst()
+
+        if row is None:
+            raise Http404
+
+        self.check_object_permissions(request, queryset.model(**{k: v for k, v in row.items() if "__" not in k}))
+        serializer = self.values_serializer_class([row], context=self.get_serializer_context())
+
+        return Response((await serializer.adata())[0])
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        if getattr(self, "values_list_action", False):
+            return self.values_serializer_class.values_queryset(queryset)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if getattr(self, "values_list_action", False):
+            kwargs.setdefault("context", self.get_serializer_context())
+            return self.values_serializer_class(*args, **kwargs)
+
+        return super().get_serializer(*args, **kwargs)
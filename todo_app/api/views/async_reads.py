@@ -0,0 +1,93 @@
+"""
+Async read endpoints, for ASGI deployments.
+
+`AsyncAPIView` serves the GET and HEAD requests of a DRF view with the async version of its action (`alist`
+or `aretrieve`, see `ValuesListMixin` and `ConditionalGetMixin`), so the validators, the page, its count and
+the task names are fetched with the async ORM without blocking the event loop. Authentication, permissions
+and throttling still run synchronously, in one hop to the worker thread, and every other method (and
+streamed lists) is handed to the DRF view as it is.
+
+The async URLs (`todo_app.async_urls`) are routed when `TODO_APP_ASYNC_READS` is set, which `asgi.py` does.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework.response import Response
+
+
+class AsyncAPIView(View):
+    """
+    Async view serving the reads of `api_view_class`, e.g.
+
+        AsyncAPIView.as_view(api_view_class=TodoListViewSet, actions={"get": "list", "post": "create"})
+
+    `actions` is the method to action mapping of a viewset, like the one given to its `as_view`.
+    """
+
+    api_view_class = None
+    actions = None
+    api_view = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        api_view_class = initkwargs.get("api_view_class", cls.api_view_class)
+        actions = initkwargs.get("actions", cls.actions)
+        api_view = api_view_class.as_view(actions) if actions else api_view_class.as_view()
+
+        view = super().as_view(api_view=api_view, **initkwargs)
+        view.csrf_exempt = True
+
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        if getattr(self.api_view_class, "stream_requested", None) and self.api_view_class.stream_requested(request.GET):
+            return await self.delegate(request, *args, **kwargs)
+
+        view, response = await sync_to_async(self.initialize)(request, args, kwargs)
+
+        if response is None:
+            action = view.action_map[request.method.lower()] if self.actions else "list"
+
+            try:
+                response = await getattr(view, f"a{action}")(view.request, *args, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+
+        response = view.finalize_response(view.request, response, *args, **kwargs)
+
+        if not isinstance(response, Response):
+            return response
+
+        # Rendered into a plain response, as Django would otherwise render it from the worker thread.
+        response.render()
+
+        return HttpResponse(response.content, status=response.status_code, headers=response.headers)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.api_view)(request, *args, **kwargs)
+
+    post = put = patch = delete = options = delegate
+
+    def initialize(self, request, args, kwargs):
+        """
+        Sets up the DRF view like its `dispatch` does and runs its `initial` checks.
+
+        Returns the view and, when a check failed, the error response.
+        """
+        view = self.api_view_class()
+
+        if self.actions:
+            view.action_map = {"head": self.actions["get"], **self.actions}
+
+        view.args = args
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+
+        try:
+            view.initial(view.request, *args, **kwargs)
+        except Exception as exc:
+            return view, view.handle_exception(exc)
+
+        return view, None
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.http import Http404
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from todo_app.exports import EXPORT_CONTENT_TYPES, export
+from todo_app.models import TodoList
+
+from ..sharding import ShardedViewMixin
+from ..streaming import streaming_response
+
+
+class ExportView(ShardedViewMixin, APIView):
+    """
+    Export every todo list of the authenticated user, with its tasks, as NDJSON or CSV.
+
+    The export is streamed: rows are read and written in chunks of `TODO_APP_STREAM_CHUNK_SIZE`, so memory
+    use and time to first byte stay flat however big the account is.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses={
+            (status.HTTP_200_OK, "application/x-ndjson"): OpenApiResponse(
+                OpenApiTypes.STR, description="One task per line."
+            ),
+            (status.HTTP_200_OK, "text/csv"): OpenApiResponse(OpenApiTypes.STR, description="One task per row."),
+        },
+    )
+    def get(self, request, export_format, format=None):
+        if export_format not in EXPORT_CONTENT_TYPES:
+            raise Http404
+
+        todo_lists = TodoList.objects.filter(owner=request.user).using(self.get_shard())
+        response = streaming_response(
+            request,
+            export(todo_lists, export_format, settings.TODO_APP_STREAM_CHUNK_SIZE),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="todo-lists.{export_format}"'
+
+        return response
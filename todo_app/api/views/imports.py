@@ -0,0 +1,93 @@
+import io
+
+from django.conf import settings
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+from rest_framework import exceptions, serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from todo_app.imports import import_ndjson
+
+from ..sharding import ShardedViewMixin
+from ..throttling import batch_throttle_cost
+
+
+class PayloadTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Upload too large."
+    default_code = "payload_too_large"
+
+
+class ImportView(ShardedViewMixin, APIView):
+    """
+    Import todo lists and tasks for the authenticated user from NDJSON.
+
+    The NDJSON is either the request body (`Content-Type: application/x-ndjson`) or the `file` of a
+    multipart upload. Lines are validated and written in batches of `TODO_APP_IMPORT_BATCH_SIZE`, each in
+    its own transaction; after a failure, the import can be resumed by uploading the same file again with
+    `?skip_lines=` set to the lines the last report says were imported.
+
+    Uploads are capped at `TODO_APP_IMPORT_MAX_BYTES`, and charge the throttles one token per batch of lines.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_throttle_cost(self, request):
+        """One throttle token per batch of lines the import writes."""
+        lines = max(0, len(self.get_lines(request)) - self.get_skip_lines(request))
+
+        return batch_throttle_cost(request, items=lines, batch_size=settings.TODO_APP_IMPORT_BATCH_SIZE)
+
+    def get_skip_lines(self, request):
+        try:
+            return max(0, int(request.query_params.get("skip_lines", 0)))
+        except ValueError:
+            raise serializers.ValidationError({"skip_lines": ["A valid integer is required."]})
+
+    def get_lines(self, request):
+        """Lines of the upload, read once and at most `TODO_APP_IMPORT_MAX_BYTES` of it."""
+        if hasattr(self, "_lines"):
+            return self._lines
+
+        max_bytes = settings.TODO_APP_IMPORT_MAX_BYTES
+
+        if request.content_type.startswith("multipart/form-data"):
+            upload = request.FILES.get("file")
+
+            if upload is None:
+                raise serializers.ValidationError({"file": ["No file was submitted."]})
+
+            if upload.size > max_bytes:
+                raise PayloadTooLarge(f"Uploads are limited to {max_bytes} bytes.")
+
+            body = upload.read()
+        else:
+            if int(request.META.get("CONTENT_LENGTH") or 0) > max_bytes:
+                raise PayloadTooLarge(f"Uploads are limited to {max_bytes} bytes.")
+
+            body = request.stream.read(max_bytes + 1) if request.stream is not None else b""
+
+            if len(body) > max_bytes:
+                raise PayloadTooLarge(f"Uploads are limited to {max_bytes} bytes.")
+
+        self._lines = list(io.BytesIO(body))
+
+        return self._lines
+
+    @extend_schema(
+        request={"application/x-ndjson": {"type": "string", "format": "binary"}},
+        parameters=[OpenApiParameter("skip_lines", int, description="Lines of the upload already imported.")],
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(description="Import report, listing the invalid lines."),
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: OpenApiResponse(description="Upload too large."),
+        },
+    )
+    def post(self, request, format=None):
+        report = import_ndjson(
+            iter(self.get_lines(request)),
+            settings.TODO_APP_IMPORT_BATCH_SIZE,
+            owner=request.user,
+            skip_lines=self.get_skip_lines(request),
+        )
+
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
@@ -0,0 +1,24 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from todo_app.metrics import get_metrics_store, recorder, render_prometheus
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of every worker, in the Prometheus text format (see `todo_app.metrics`).
+
+    The metrics of the other workers are the ones they flushed, at most `TODO_APP_METRICS_FLUSH_INTERVAL`
+    seconds ago.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(exclude=True)
+    def get(self, request, format=None):
+        recorder.flush()
+
+        return HttpResponse(render_prometheus(get_metrics_store().totals()), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,54 @@
+import json
+
+from django.http import FileResponse, Http404
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from todo_app.profiling import profile_path, stored_profiles
+
+
+class ProfileListView(APIView):
+    """
+    List the stored request profiles, the latest first (see `todo_app.profiling`).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(exclude=True)
+    def get(self, request, format=None):
+        return Response(stored_profiles())
+
+
+class ProfileDetailView(APIView):
+    """
+    Retrieve a request profile: the request, its SQL queries with their origin and the top of its profile.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(exclude=True)
+    def get(self, request, profile_id, format=None):
+        path = profile_path(profile_id, ".json")
+
+        if path is None:
+            raise Http404
+
+        return Response(json.loads(path.read_text()))
+
+
+class ProfileStatsView(APIView):
+    """
+    Download the `pstats` data of a request profile, e.g. for `python -m pstats` or snakeviz.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(exclude=True)
+    def get(self, request, profile_id, format=None):
+        path = profile_path(profile_id, ".prof")
+
+        if path is None:
+            raise Http404
+
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
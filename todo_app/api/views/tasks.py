@@ -1,38 +1,98 @@
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, viewsets
-from todo_app.models import Task
+from rest_framework.permissions import IsAuthenticated
+from todo_app.models import Task, TodoList
 
-from ..filtersets import TaskFilterSet
-from ..pagination import LargerResultsSetPagination
-from ..permissions import AllTasksTodoListOwnerOnly, TaskTodoListOwnerOnly
-from ..serializers import TaskSerializer
+from ..conditional import ConditionalGetMixin
+from ..filtersets import RankedSearchFilter, TaskFilterSet
+from ..pagination import LargerResultsSetPagination, PageOrCursorPagination
+from ..permissions import AllTasksTodoListOwnerOnly
+from ..serializers import SearchTaskSerializer, TaskSerializer, TaskValuesSerializer
+from ..sharding import ShardedViewMixin
+from ..streaming import StreamingListMixin
+from ..throttling import batch_throttle_cost
+from ..values import ValuesListMixin
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ShardedViewMixin, ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     CRUD for tasks for a specific todo list, ordered by done status.
+
+    Posting a list of tasks instead of a single one creates all of them at once, and is charged one
+    throttling token per write batch. Reads carry an ETag and Last-Modified taken from the todo list, and
+    conditional reads of an unchanged list get a 304. Lists are serialized from `values()` rows.
     """
 
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
     permission_classes = [AllTasksTodoListOwnerOnly]
-    pagination_class = LargerResultsSetPagination
+    pagination_class = PageOrCursorPagination
+    cursor_ordering = ("done", "created", "id")
     lookup_field = "id"
 
     def get_queryset(self):
-        return Task.objects.filter(todo_list=self.kwargs["todo_list_pk"]).order_by("done")
+        return Task.objects.filter(todo_list=self.kwargs["todo_list_pk"]).order_by("done").using(self.get_shard())
+
+    def get_conditional_queryset(self):
+        return TodoList.objects.filter(pk=self.kwargs["todo_list_pk"]).using(self.get_shard())
+
+    def conditional_scope_is_single(self):
+        return True
+
+    def get_throttle_cost(self, request):
+        return batch_throttle_cost(request) if request.method == "POST" else 1
 
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get("data"), list):
+            kwargs["many"] = True
+            kwargs["max_length"] = settings.TODO_APP_BULK_MAX_ITEMS
 
-class FilterTask(generics.ListAPIView):
+        return super().get_serializer(*args, **kwargs)
+
+
+class FilterTask(ShardedViewMixin, ConditionalGetMixin, ValuesListMixin, StreamingListMixin, generics.ListAPIView):
     """
     Filter tasks by done status, name, or date of creation for a specific todo list.
+
+    Results are paginated; `?stream=true` streams every matching task instead. Conditional reads of an
+    unchanged todo list get a 304. Tasks are serialized from `values()` rows.
     """
 
     serializer_class = TaskSerializer
-    permission_classes = [TaskTodoListOwnerOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    values_serializer_class = TaskValuesSerializer
+    permission_classes = [AllTasksTodoListOwnerOnly]
+    pagination_class = PageOrCursorPagination
+    cursor_ordering = ("done", "created", "id")
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     filterset_fields = {"done": ["exact"], "name": ["exact"]}
-    search_fields = ["name", "done"]
+    search_fields = ["name"]
     filterset_class = TaskFilterSet
 
     def get_queryset(self):
-        return Task.objects.filter(todo_list=self.kwargs["todo_list_pk"])
+        return (
+            Task.objects.filter(todo_list=self.kwargs["todo_list_pk"])
+            .order_by(*self.cursor_ordering)
+            .using(self.get_shard())
+        )
+
+    def get_conditional_queryset(self):
+        return TodoList.objects.filter(pk=self.kwargs["todo_list_pk"]).using(self.get_shard())
+
+    def conditional_scope_is_single(self):
+        return True
+
+
+class SearchTasks(ShardedViewMixin, generics.ListAPIView):
+    """
+    Search the tasks of every todo list of the authenticated user, most relevant first.
+    """
+
+    serializer_class = SearchTaskSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = LargerResultsSetPagination
+    filter_backends = [RankedSearchFilter]
+    search_fields = ["name"]
+
+    def get_queryset(self):
+        return Task.objects.filter(todo_list__owner=self.request.user).order_by("-created").using(self.get_shard())
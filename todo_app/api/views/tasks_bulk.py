@@ -1,32 +1,88 @@
-# from rest_framework.views import APIView
-# from rest_framework.response import Response
-# from rest_framework import status
-# from drf_spectacular.utils import extend_schema
-
-# @extend_schema(
-#     description="Update multiple tasks at once.",
-#     request={
-#         "description": "List of task IDs and fields to update.",
-#         "type": "array",
-#         "items": {
-#             "type": "object",
-#             "properties": {
-#                 "id": {"type": "integer", "description": "Task ID."},
-#                 "done": {"type": "boolean", "description": "Updated done status."},
-#                 # Add more fields as needed
-#             },
-#         },
-#     },
-#     responses={
-#         status.HTTP_200_OK: {"description": "Tasks updated successfully."},
-#         status.HTTP_400_BAD_REQUEST: {"description": "Invalid request payload."},
-#         status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Internal server error."},
-#     },
-# )
-# class BulkUpdateTasksView(APIView):
-#     def put(self, request, format=None):
-#         tasks = request.data
-#         # Perform bulk update logic
-#         # ..."""  """
-
-#         return Response(status=status.HTTP_200_OK)
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from todo_app.models import Task
+from todo_app.touches import touch_todo_list
+
+from ..permissions import AllTasksTodoListOwnerOnly
+from ..serializers import BulkTaskUpdateSerializer, TaskSerializer
+from ..sharding import ShardedViewMixin
+from ..throttling import batch_throttle_cost
+
+
+class BulkUpdateTasksView(ShardedViewMixin, APIView):
+    """
+    Update multiple tasks of a specific todo list at once.
+
+    The whole payload is validated before anything is written, ownership of the todo list is checked
+    once, and every change is applied with batched UPDATEs inside a single transaction. The todo list
+    `updated` field is touched once per request instead of once per task. Each call is charged one
+    throttling token per write batch.
+    """
+
+    permission_classes = [AllTasksTodoListOwnerOnly]
+
+    def get_throttle_cost(self, request):
+        return batch_throttle_cost(request)
+
+    @extend_schema(
+        description="Update multiple tasks at once.",
+        request=BulkTaskUpdateSerializer(many=True),
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(description="Per-item results, in the order of the payload."),
+            status.HTTP_400_BAD_REQUEST: OpenApiResponse(description="Invalid request payload."),
+        },
+    )
+    def patch(self, request, todo_list_pk, format=None):
+        serializer = BulkTaskUpdateSerializer(data=request.data, many=True, max_length=settings.TODO_APP_BULK_MAX_ITEMS)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+
+        try:
+            with transaction.atomic(using=router.db_for_write(Task)):
+                tasks = self.apply_changes(todo_list_pk, changes)
+        except IntegrityError:
+            raise serializers.ValidationError("Tasks can't be renamed after another task of the same list.")
+
+        results = []
+
+        for item in changes:
+            task = tasks.get(item["id"])
+
+            if task is None:
+                results.append({"id": item["id"], "status": "not_found"})
+            else:
+                results.append({"id": item["id"], "status": "updated", "task": TaskSerializer(task).data})
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def apply_changes(self, todo_list_pk, changes):
+        """Writes the validated changes with batched UPDATEs and returns the updated tasks by id."""
+        tasks = (
+            Task.objects.select_for_update().filter(todo_list_id=todo_list_pk).in_bulk([item["id"] for item in changes])
+        )
+        fields = set()
+        done = 0
+
+        for item in changes:
+            task = tasks.get(item["id"])
+
+            if task is None:
+                continue
+
+            if "done" in item:
+                done += int(item["done"]) - int(task.done)
+
+            for field, value in item.items():
+                if field != "id":
+                    setattr(task, field, value)
+                    fields.add(field)
+
+        if tasks:
+            Task.objects.bulk_update(tasks.values(), sorted(fields), batch_size=settings.TODO_APP_BULK_BATCH_SIZE)
+            touch_todo_list(todo_list_pk, done=done, using=router.db_for_write(Task))
+
+        return tasks
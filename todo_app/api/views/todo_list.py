@@ -1,44 +1,110 @@
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, viewsets, generics
-from todo_app.models import TodoList
+from todo_app.models import Task, TodoList
+from todo_app.sharding import fan_out
 
-from ..pagination import LargerResultsSetPagination
+from ..conditional import ConditionalGetMixin
+from ..filtersets import RankedSearchFilter
+from ..pagination import PageOrCursorPagination
 from ..permissions import TodoListOwnerOnly
-from ..serializers import TodoListSerializer
+from ..serializers import TodoListSerializer, TodoListValuesSerializer
+from ..sharding import ShardedViewMixin
+from ..streaming import StreamingListMixin
+from ..values import ValuesListMixin
 
 
-class TodoListViewSet(viewsets.ModelViewSet):
+def todo_lists_for_serializer():
+    """
+    Todo lists queryset that loads everything `TodoListSerializer` renders with a constant number of queries:
+    the owner is joined and the task names are prefetched in one extra query per page.
+    """
+    return TodoList.objects.select_related("owner").prefetch_related(
+        Prefetch("todo_tasks", queryset=Task.objects.only("id", "name", "todo_list_id"))
+    )
+
+
+class TodoListViewSet(ShardedViewMixin, ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     CRUD for todo lists owned by the authenticated user.
+
+    Reads carry an ETag, and a Last-Modified for a single todo list, and conditional reads of unchanged todo
+    lists get a 304. Lists are serialized from `values()` rows. When todo lists are sharded, the list of every
+    todo list shown to superusers and staff is merged from all shards.
     """
 
     serializer_class = TodoListSerializer
+    values_serializer_class = TodoListValuesSerializer
     permission_classes = [TodoListOwnerOnly]
-    pagination_class = LargerResultsSetPagination
+    pagination_class = PageOrCursorPagination
+    cursor_ordering = ("-updated", "-id")
     lookup_field = "id"
+    shard_url_kwarg = "id"
 
     def get_queryset(self):
         user = self.request.user
 
         if user.is_superuser or user.is_staff:
-            return TodoList.objects.all().order_by("-updated")
+            queryset = todo_lists_for_serializer().order_by("-updated")
+
+            return fan_out(queryset) if self.fans_out() else queryset.using(self.get_shard())
+
+        return todo_lists_for_serializer().filter(owner=user).order_by("-updated").using(self.get_shard())
+
+    def fans_out(self):
+        """Whether the view lists the todo lists of every shard."""
+        user = self.request.user
+
+        return self.action == "list" and (user.is_superuser or user.is_staff)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "fan_out": self.fans_out()}
+
+    def get_conditional_queryset(self):
+        queryset = self.get_queryset()
 
-        return TodoList.objects.filter(owner=user).order_by("-updated")
+        if self.action == "retrieve":
+            return queryset.filter(id=self.kwargs["id"])
+
+        return queryset
+
+    def conditional_scope_is_single(self):
+        return self.action == "retrieve"
 
     def perform_create(self, serializer):
         return serializer.save(owner=self.request.user)
 
 
-class FilterTodoList(generics.ListAPIView):
+class FilterTodoList(ShardedViewMixin, ConditionalGetMixin, ValuesListMixin, StreamingListMixin, generics.ListAPIView):
     """
-    Filter todo lists by archived status and/or name for the authenticated user.
+    Filter todo lists by archived status, name and/or task counters for the authenticated user.
+
+    Results are paginated; `?stream=true` streams every matching todo list instead. Conditional reads get a
+    304 while none of the todo lists of the user changed. Todo lists are serialized from `values()` rows.
     """
 
     serializer_class = TodoListSerializer
+    values_serializer_class = TodoListValuesSerializer
     permission_classes = [TodoListOwnerOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
-    filterset_fields = {"archived": ["exact"], "name": ["exact"]}
+    pagination_class = PageOrCursorPagination
+    cursor_ordering = ("-updated", "-id")
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filterset_fields = {
+        "archived": ["exact"],
+        "name": ["exact"],
+        "task_count": ["exact", "gte", "lte"],
+        "done_count": ["exact", "gte", "lte"],
+    }
+    ordering_fields = ["id", "name", "archived", "updated", "task_count", "done_count"]
     search_fields = ["name"]
 
     def get_queryset(self):
-        return TodoList.objects.filter(owner=self.request.user)
+        return (
+            todo_lists_for_serializer()
+            .filter(owner=self.request.user)
+            .order_by(*self.cursor_ordering)
+            .using(self.get_shard())
+        )
+
+    def get_conditional_queryset(self):
+        return TodoList.objects.filter(owner=self.request.user).using(self.get_shard())
@@ -0,0 +1,50 @@
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..authentication import revoke_token, token_expired
+
+
+class ObtainAuthTokenView(ObtainAuthToken):
+    """
+    Obtain the authentication token of a user, replacing it with a new one when it has expired.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+        token, created = Token.objects.get_or_create(user=user)
+
+        if not created and token_expired(token.created):
+            revoke_token(token.key)
+            token = Token.objects.create(user=user)
+
+        return Response({"token": token.key})
+
+
+class RevokeAuthTokenView(APIView):
+    """
+    Revoke the token the request is authenticated with. It stops working right away.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=None,
+        responses={
+            status.HTTP_204_NO_CONTENT: OpenApiResponse(description="Token revoked."),
+            status.HTTP_400_BAD_REQUEST: OpenApiResponse(description="Request not authenticated with a token."),
+        },
+    )
+    def post(self, request, format=None):
+        if not isinstance(request.auth, Token):
+            return Response({"detail": "Request not authenticated with a token."}, status=status.HTTP_400_BAD_REQUEST)
+
+        revoke_token(request.auth.key)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
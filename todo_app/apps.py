@@ -6,4 +6,7 @@ class TodoAppConfig(AppConfig):
     name = "todo_app"
 
     def ready(self):
+        import todo_app.checks
+        import todo_app.metrics
+        import todo_app.profiling
         import todo_app.signal_receivers
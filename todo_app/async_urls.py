@@ -0,0 +1,44 @@
+"""
+URLs of the ASGI deployment: the read endpoints are served by async views, everything else as in `urls`.
+
+The async routes mirror the router ones, names included, and are matched first.
+"""
+from django.urls import include, path, re_path
+
+from .api.views.async_reads import AsyncAPIView
+from .api.views.tasks import FilterTask, TaskViewSet
+from .api.views.todo_list import FilterTodoList, TodoListViewSet
+from .urls import urlpatterns as sync_urlpatterns
+
+LIST_ACTIONS = {"get": "list", "post": "create"}
+DETAIL_ACTIONS = {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+
+task_urlpatterns = [
+    re_path(r"^tasks/$", AsyncAPIView.as_view(api_view_class=TaskViewSet, actions=LIST_ACTIONS), name="tasks-list"),
+    re_path(
+        r"^tasks/(?P<id>[^/.]+)/$",
+        AsyncAPIView.as_view(api_view_class=TaskViewSet, actions=DETAIL_ACTIONS),
+        name="tasks-detail",
+    ),
+]
+
+urlpatterns = [
+    path("api/todo-lists/<uuid:todo_list_pk>/", include(task_urlpatterns)),
+    re_path(
+        r"^api/todo-lists/$",
+        AsyncAPIView.as_view(api_view_class=TodoListViewSet, actions=LIST_ACTIONS),
+        name="todo-lists-list",
+    ),
+    re_path(
+        r"^api/todo-lists/(?P<id>[^/.]+)/$",
+        AsyncAPIView.as_view(api_view_class=TodoListViewSet, actions=DETAIL_ACTIONS),
+        name="todo-lists-detail",
+    ),
+    path("api/todo-lists/filter", AsyncAPIView.as_view(api_view_class=FilterTodoList), name="filter-todo-lists"),
+    path(
+        "api/todo-lists/<uuid:todo_list_pk>/tasks/filter",
+        AsyncAPIView.as_view(api_view_class=FilterTask),
+        name="filter-tasks",
+    ),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,43 @@
+"""
+System checks of the todo app settings.
+
+Some caches hold entries that writes invalidate or set, such as the owners of todo lists and the shards of
+their users, the verified tokens or the replica pins of the users who just wrote. They must be shared by every
+process serving the API: an entry dropped or set by the worker that handled the write would be missed by the
+other workers until it expires. A per-process cache, like the local memory one, is only right when a single
+process serves the API, as in the tests.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+def shared_cache_settings():
+    """Names of the settings of the caches in use that must be shared by every process."""
+    names = ["TODO_APP_OWNERSHIP_CACHE", "TODO_APP_TOKEN_CACHE"]
+
+    if settings.TODO_APP_DB_REPLICAS:
+        names.append("TODO_APP_REPLICA_PIN_CACHE")
+
+    return names
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+
+    for name in shared_cache_settings():
+        alias = getattr(settings, name)
+
+        if alias in settings.CACHES and isinstance(caches[alias], LocMemCache):
+            errors.append(
+                Error(
+                    f"{name} names {alias!r}, a cache local to each process.",
+                    hint="Use a cache shared by every process serving the API (see CACHE_BACKEND).",
+                    obj=name,
+                    id="todo_app.E001",
+                )
+            )
+
+    return errors
@@ -0,0 +1,37 @@
+"""
+Tuning of new database connections.
+
+Every SQLite connection gets the PRAGMAs of the `TODO_APP_SQLITE_PROFILE` profile when it is opened:
+
+- `wal` (default), for single-node installs: write-ahead logging, so readers never wait for the writer
+  and commits only append to the log; `synchronous=NORMAL`, which is durable in WAL mode save for the
+  last transactions on power loss; temporary tables in memory; a 16 MB page cache and 128 MB of
+  memory-mapped I/O per connection.
+- an empty profile leaves SQLite's defaults.
+
+With persistent connections (`CONN_MAX_AGE`) this runs once per connection, not once per request.
+"""
+from django.conf import settings
+
+SQLITE_PROFILES = {
+    "": [],
+    "wal": [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 134217728",
+    ],
+}
+
+
+def tune_sqlite_connection(connection):
+    """Runs the PRAGMAs of the configured profile on a new SQLite connection."""
+    pragmas = SQLITE_PROFILES[settings.TODO_APP_SQLITE_PROFILE]
+
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        for pragma in pragmas:
+            cursor.execute(pragma)
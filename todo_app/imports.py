@@ -0,0 +1,267 @@
+"""
+Bulk imports of todo lists and tasks from NDJSON.
+
+Every line is a JSON object with a `todo_list_name` and, optionally, `task_name`, `done`, `created`,
+`archived` and `owner` (the username, when the import isn't made for a given user). The records written by
+`todo_app.exports` can be imported back as they are.
+
+Lines are read in batches, and every batch is validated and written in its own transaction: todo lists are
+matched by owner and name and created when missing, tasks already on their list (or repeated in the import)
+are skipped, and new tasks are inserted with `bulk_create`, or with `COPY` on PostgreSQL. Task counters and
+`TodoList.updated` are updated once per todo list and batch. When todo lists are sharded, the rows of every
+owner are written to their shard, and a batch takes one transaction per shard.
+
+An import can be resumed after a failure from the last committed batch: the report tells how many lines
+were consumed, and `skip_lines` skips them on the next run.
+"""
+import csv
+import io
+import itertools
+import time
+import uuid
+from collections import Counter
+
+import orjson
+from django.db import connections, router
+from django.utils import timezone
+from rest_framework import serializers
+
+from .api.serializers import ImportRowSerializer
+from .models import Task, TodoList, User
+from .sharding import atomic_on_shards
+from .touches import coalesce_touches, touch_todo_list
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    """Running totals of an import."""
+
+    def __init__(self, skipped_lines=0):
+        self.lines = skipped_lines
+        self.created_todo_lists = 0
+        self.created_tasks = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    def add_error(self, line, errors):
+        self.invalid += 1
+
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        seconds = time.monotonic() - self.started
+
+        return {
+            "lines": self.lines,
+            "created_todo_lists": self.created_todo_lists,
+            "created_tasks": self.created_tasks,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "tasks_per_second": round(self.created_tasks / seconds, 1) if seconds else None,
+        }
+
+
+def import_ndjson(lines, batch_size, owner=None, skip_lines=0, on_batch=None):
+    """
+    Imports NDJSON `lines` (bytes or str) for `owner`, or for the `owner` username of every record.
+
+    `on_batch(report)` is called after every committed batch, e.g. to save a checkpoint. Returns the report.
+    """
+    report = ImportReport(skip_lines)
+    numbered = enumerate(itertools.islice(lines, skip_lines, None), start=skip_lines + 1)
+
+    while True:
+        batch = list(itertools.islice(numbered, batch_size))
+
+        if not batch:
+            return report
+
+        with atomic_on_shards(), coalesce_touches():
+            import_batch(batch, owner, report)
+
+        report.lines += len(batch)
+
+        if on_batch is not None:
+            on_batch(report)
+
+
+def import_batch(batch, owner, report):
+    """Validates and writes a batch of (line number, line) pairs."""
+    rows = _validate(batch, report)
+    rows = _resolve_owners(rows, owner, report)
+    rows_by_database = {}
+
+    for row in rows:
+        rows_by_database.setdefault(router.db_for_write(TodoList, instance=row[0]), []).append(row)
+
+    for using, database_rows in rows_by_database.items():
+        todo_lists = _get_or_create_todo_lists(database_rows, report, using)
+        _create_tasks(database_rows, todo_lists, report, using)
+
+
+def _validate(batch, report):
+    validator = ImportRowSerializer()
+    rows = []
+
+    for number, line in batch:
+        if not line.strip():
+            continue
+
+        try:
+            rows.append((number, validator.run_validation(orjson.loads(line))))
+        except orjson.JSONDecodeError as error:
+            report.add_error(number, {"non_field_errors": [f"Invalid JSON: {error}"]})
+        except serializers.ValidationError as error:
+            report.add_error(number, error.detail)
+
+    return rows
+
+
+def _resolve_owners(rows, owner, report):
+    """Pairs every row with its owner, the given one or the user of its `owner` username."""
+    if owner is not None:
+        return [(owner, data) for _, data in rows]
+
+    users = {user.username: user for user in User.objects.filter(username__in={data.get("owner") for _, data in rows})}
+    resolved = []
+
+    for number, data in rows:
+        if data.get("owner") in users:
+            resolved.append((users[data["owner"]], data))
+        else:
+            report.add_error(number, {"owner": ["Unknown user."]})
+
+    return resolved
+
+
+def _get_or_create_todo_lists(rows, report, using):
+    """Returns the todo lists of the rows by (owner id, name), creating the missing ones."""
+    wanted = {}
+
+    for owner, data in rows:
+        wanted.setdefault((owner.pk, data["todo_list_name"]), (owner, data))
+
+    if not wanted:
+        return {}
+
+    todo_lists = {}
+    existing = (
+        TodoList.objects.using(using)
+        .filter(owner__in={owner for owner, _ in wanted.values()}, name__in={name for _, name in wanted})
+        .order_by("-updated")
+    )
+
+    for todo_list in existing.only("id", "name", "owner_id"):
+        todo_lists.setdefault((todo_list.owner_id, todo_list.name), todo_list)
+
+    missing = [
+        TodoList(name=data["todo_list_name"], owner=owner, archived=data["archived"])
+        for key, (owner, data) in wanted.items()
+        if key not in todo_lists
+    ]
+    TodoList.objects.using(using).bulk_create(missing)
+    report.created_todo_lists += len(missing)
+
+    for todo_list in missing:
+        todo_lists[(todo_list.owner_id, todo_list.name)] = todo_list
+
+    return todo_lists
+
+
+def _create_tasks(rows, todo_lists, report, using):
+    """Inserts the tasks that aren't on their todo list yet, and counts them on their todo lists."""
+    rows = [(todo_lists[(owner.pk, data["todo_list_name"])].pk, data) for owner, data in rows if data["task_name"]]
+
+    if not rows:
+        return
+
+    seen = set(
+        Task.objects.using(using)
+        .filter(
+            todo_list_id__in={todo_list_id for todo_list_id, _ in rows},
+            name__in={data["task_name"] for _, data in rows},
+        )
+        .values_list("todo_list_id", "name")
+    )
+    now = timezone.now()
+    tasks = []
+
+    for todo_list_id, data in rows:
+        key = (todo_list_id, data["task_name"])
+
+        if key in seen:
+            report.duplicates += 1
+            continue
+
+        seen.add(key)
+        tasks.append(
+            Task(
+                id=uuid.uuid4(),
+                name=data["task_name"],
+                done=bool(data["done"]),
+                todo_list_id=todo_list_id,
+                created=data.get("created") or now,
+            )
+        )
+
+    inserted = insert_tasks(tasks, using)
+    report.created_tasks += len(inserted)
+    # Tasks written concurrently, e.g. by another run of the same import, are duplicates too.
+    report.duplicates += len(tasks) - len(inserted)
+    tasks = inserted
+
+    counts = Counter(task.todo_list_id for task in tasks)
+    done_counts = Counter(task.todo_list_id for task in tasks if task.done)
+
+    for todo_list_id, count in counts.items():
+        touch_todo_list(todo_list_id, tasks=count, done=done_counts[todo_list_id], using=using)
+
+
+def insert_tasks(tasks, using):
+    """
+    Inserts new tasks, skipping any that conflicts with a task written concurrently, and returns the tasks
+    actually inserted.
+
+    On PostgreSQL the rows are streamed with `COPY` into a temporary table and moved over with one
+    `INSERT ... ON CONFLICT DO NOTHING RETURNING id`; elsewhere they go through `bulk_create`, and the
+    inserted ones are told apart by their ids, which are new.
+    """
+    if not tasks:
+        return []
+
+    connection = connections[using]
+
+    if connection.vendor != "postgresql":
+        Task.objects.using(using).bulk_create(tasks, ignore_conflicts=True)
+        inserted = set(
+            Task.objects.using(using).filter(id__in=[task.id for task in tasks]).values_list("id", flat=True)
+        )
+
+        return [task for task in tasks if task.id in inserted]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for task in tasks:
+        writer.writerow([task.id, task.name, "t" if task.done else "f", task.todo_list_id, task.created.isoformat()])
+
+    buffer.seek(0)
+    table = Task._meta.db_table
+    columns = "id, name, done, todo_list_id, created"
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMPORARY TABLE "import_task" (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DROP')
+        cursor.cursor.copy_expert(f'COPY "import_task" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "import_task" ON CONFLICT DO NOTHING RETURNING id'
+        )
+        inserted = {str(task_id) for task_id, in cursor.fetchall()}
+        cursor.execute('DROP TABLE "import_task"')
+
+    return [task for task in tasks if str(task.id) in inserted]
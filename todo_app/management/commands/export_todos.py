@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from todo_app.exports import EXPORT_FORMATS, export
+from todo_app.models import TodoList, User
+from todo_app.sharding import fan_out
+
+
+class Command(BaseCommand):
+    help = "Streams the todo lists and tasks of every user, or of one user, as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson", help="Export format.")
+        parser.add_argument("--output", help="File to write the export to, standard output by default.")
+        parser.add_argument("--user", help="Only export the todo lists of the user with this username.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.TODO_APP_STREAM_CHUNK_SIZE,
+            help="Rows read and written at a time.",
+        )
+
+    def handle(self, *args, format, output, user, chunk_size, **options):
+        todo_lists = TodoList.objects.all()
+
+        if user is not None:
+            if not User.objects.filter(username=user).exists():
+                raise CommandError(f"User {user!r} does not exist.")
+
+            todo_lists = todo_lists.filter(owner__username=user)
+
+        chunks = export(fan_out(todo_lists), format, chunk_size)
+
+        if output is None:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
+            return
+
+        with open(output, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from todo_app.imports import import_ndjson
+from todo_app.models import User
+
+
+class Command(BaseCommand):
+    help = "Imports todo lists and tasks from an NDJSON file, in batches, reporting the throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file to import, - for standard input.")
+        parser.add_argument("--user", help="Import every record for the user with this username.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TODO_APP_IMPORT_BATCH_SIZE,
+            help="Lines validated and written per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording the lines already imported, to resume an import that failed.",
+        )
+
+    def handle(self, *args, path, user, batch_size, checkpoint, **options):
+        owner = None
+
+        if user is not None:
+            owner = User.objects.filter(username=user).first()
+
+            if owner is None:
+                raise CommandError(f"User {user!r} does not exist.")
+
+        skip_lines = self.read_checkpoint(checkpoint, path)
+
+        if skip_lines:
+            self.stderr.write(f"Resuming after line {skip_lines}.")
+
+        def on_batch(report):
+            if checkpoint:
+                self.write_checkpoint(checkpoint, path, report.lines)
+
+            self.stderr.write(f"{report.lines} lines imported.")
+
+        if path == "-":
+            report = import_ndjson(sys.stdin.buffer, batch_size, owner=owner, skip_lines=skip_lines, on_batch=on_batch)
+        else:
+            with open(path, "rb") as lines:
+                report = import_ndjson(lines, batch_size, owner=owner, skip_lines=skip_lines, on_batch=on_batch)
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
+
+    def read_checkpoint(self, checkpoint, path):
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+
+        with open(checkpoint) as file:
+            saved = json.load(file)
+
+        if saved["path"] != path:
+            raise CommandError(f"Checkpoint {checkpoint!r} belongs to the import of {saved['path']!r}.")
+
+        return saved["lines"]
+
+    def write_checkpoint(self, checkpoint, path, lines):
+        # Written aside and renamed, so a crash never leaves a truncated checkpoint.
+        with open(f"{checkpoint}.tmp", "w") as file:
+            json.dump({"path": path, "lines": lines}, file)
+
+        os.replace(f"{checkpoint}.tmp", checkpoint)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from todo_app.models import User
+from todo_app.sharding import get_shards, move_user, user_shard
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the todo lists and tasks of users to another shard (TODO_APP_SHARDS). The writes of a user "
+        "are turned down while they are moved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("shard", help="Database alias of the target shard.")
+        parser.add_argument("usernames", nargs="+", help="Usernames of the users to move.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TODO_APP_BULK_BATCH_SIZE,
+            help="Rows copied per INSERT.",
+        )
+
+    def handle(self, *args, shard, usernames, batch_size, **options):
+        if shard not in get_shards():
+            raise CommandError(f"{shard!r} is not one of the shards in TODO_APP_SHARDS.")
+
+        users = {user.username: user for user in User.objects.filter(username__in=usernames)}
+        missing = [username for username in usernames if username not in users]
+
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(missing)}.")
+
+        for username in usernames:
+            user = users[username]
+            source = user_shard(user)
+            todo_lists, tasks = move_user(user, shard, batch_size)
+            self.stdout.write(f"Moved {username} from {source} to {shard}: {todo_lists} todo lists, {tasks} tasks.")
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from todo_app.models import TodoList
+
+
+class Command(BaseCommand):
+    help = "Recomputes the task counters of every todo list and repairs the ones that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Todo lists recounted per transaction.")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to recount.")
+        parser.add_argument("--dry-run", action="store_true", help="Report the drift without repairing it.")
+
+    def handle(self, *args, batch_size, database, dry_run, **options):
+        checked = repaired = 0
+        last_id = None
+
+        while True:
+            with transaction.atomic(using=database):
+                todo_lists = TodoList.objects.using(database).order_by("id")
+
+                if last_id is not None:
+                    todo_lists = todo_lists.filter(id__gt=last_id)
+
+                batch = list(todo_lists.select_for_update().values_list("id", "task_count", "done_count")[:batch_size])
+
+                if not batch:
+                    break
+
+                last_id = batch[-1][0]
+                actual = (
+                    TodoList.objects.using(database)
+                    .filter(id__in=[todo_list_id for todo_list_id, *_ in batch])
+                    .annotate(tasks=Count("todo_tasks"), done=Count("todo_tasks", filter=Q(todo_tasks__done=True)))
+                    .values_list("id", "tasks", "done")
+                )
+                actual = {todo_list_id: (tasks, done) for todo_list_id, tasks, done in actual}
+                now = timezone.now()
+                drifted = [
+                    TodoList(
+                        id=todo_list_id,
+                        task_count=actual[todo_list_id][0],
+                        done_count=actual[todo_list_id][1],
+                        updated=now,
+                    )
+                    for todo_list_id, task_count, done_count in batch
+                    if actual[todo_list_id] != (task_count, done_count)
+                ]
+
+                # The repaired lists are served with new counters: `updated` moves their Last-Modified along.
+                if drifted and not dry_run:
+                    TodoList.objects.using(database).bulk_update(drifted, ["task_count", "done_count", "updated"])
+
+            checked += len(batch)
+            repaired += len(drifted)
+
+        action = "would be repaired" if dry_run else "repaired"
+        self.stdout.write(f"{checked} todo lists checked, {repaired} {action}.")
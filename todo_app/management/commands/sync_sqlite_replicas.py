@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_sqlite_database(source, target):
+    """Copies the SQLite database `source` over `target` with the online backup API, safe while in use."""
+    with sqlite3.connect(str(source)) as source_connection, sqlite3.connect(str(target)) as target_connection:
+        source_connection.backup(target_connection)
+
+    source_connection.close()
+    target_connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the SQLite primary database over its SQLite read replicas (TODO_APP_DB_REPLICAS), to test "
+        "replica routing locally. With --interval it keeps copying, which simulates replication lag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Seconds between copies; copies once when not given.")
+
+    def handle(self, *args, interval, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        replicas = [connections[alias] for alias in settings.TODO_APP_DB_REPLICAS]
+
+        if primary.vendor != "sqlite" or not replicas or any(replica.vendor != "sqlite" for replica in replicas):
+            raise CommandError("The primary and every replica in TODO_APP_DB_REPLICAS must be SQLite databases.")
+
+        while True:
+            for replica in replicas:
+                copy_sqlite_database(primary.settings_dict["NAME"], replica.settings_dict["NAME"])
+                self.stdout.write(f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}.")
+
+            if interval is None:
+                return
+
+            time.sleep(interval)
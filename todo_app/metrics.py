@@ -0,0 +1,448 @@
+"""
+Per-request performance metrics, aggregated into histograms shared by every worker.
+
+`MetricsMiddleware` measures every request: its wall time, the SQL queries it runs and their time, the time
+spent in serializers, authentication and throttling (the code of each phase runs in a `timed(phase)` block)
+and the size of the response. The numbers go to the `Server-Timing` header of the response, and are added
+to histograms labelled with the view name (e.g. `todo-lists-list`) and the method. Streamed responses are
+measured until their last chunk is sent, so their header only covers the time to the first one.
+
+Histograms are aggregated in process memory and flushed to the store chosen with `TODO_APP_METRICS_STORE`
+at most every `TODO_APP_METRICS_FLUSH_INTERVAL` seconds, with one write:
+
+- `SQLiteMetricsStore` (default) adds them up in the SQLite file `TODO_APP_METRICS_SQLITE_PATH`, so the
+  metrics endpoint reports the totals of every worker of the host.
+- `LocMemMetricsStore` keeps them in process memory, for tests and single process servers.
+
+`render_prometheus` writes the totals in the Prometheus text format.
+"""
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "todo_app"
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Histograms of every request: name -> (help, buckets).
+HISTOGRAMS = {
+    "request_duration_seconds": ("Wall time of the requests.", DURATION_BUCKETS),
+    "db_queries": ("SQL queries run by the requests.", QUERY_BUCKETS),
+    "db_duration_seconds": ("Time the requests spent running SQL queries.", DURATION_BUCKETS),
+    "serializer_duration_seconds": ("Time the requests spent in serializers.", DURATION_BUCKETS),
+    "auth_duration_seconds": ("Time the requests spent authenticating.", DURATION_BUCKETS),
+    "throttle_duration_seconds": ("Time the requests spent in throttles.", DURATION_BUCKETS),
+    "response_size_bytes": ("Size of the response bodies.", SIZE_BUCKETS),
+}
+COUNTERS = {"requests_total": "Requests handled, by status code."}
+
+# Phases reported in `Server-Timing`, besides the total and the database.
+PHASES = ["serializer", "auth", "throttle"]
+
+_request_metrics = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Numbers collected while handling a request."""
+
+    __slots__ = ["started", "queries", "durations", "open_phases", "size"]
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.durations = dict.fromkeys(["db", *PHASES], 0.0)
+        self.open_phases = set()
+        self.size = 0
+
+    def server_timing(self, total):
+        durations = [f"total;dur={total * 1000:.3f}", f'db;dur={self.durations["db"] * 1000:.3f};desc="{self.queries}"']
+
+        return ", ".join(durations + [f"{phase};dur={self.durations[phase] * 1000:.3f}" for phase in PHASES])
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to a phase of the current request. Nested blocks are counted once."""
+    metrics = _request_metrics.get()
+
+    if metrics is None or phase in metrics.open_phases:
+        yield
+        return
+
+    metrics.open_phases.add(phase)
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        metrics.durations[phase] += time.perf_counter() - started
+        metrics.open_phases.discard(phase)
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _request_metrics.get()
+
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.durations["db"] += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def install_query_counter(connection):
+    # First in line, as `execute_wrapper()` blocks pop the last wrapper when they exit.
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    # Connected when the app is ready (see `TodoAppConfig`), before any connection is opened.
+    install_query_counter(connection)
+
+
+@contextmanager
+def collect_metrics():
+    """Collects the metrics of the request handled in the block, yielding its `RequestMetrics`."""
+    metrics = RequestMetrics()
+    token = _request_metrics.set(metrics)
+
+    try:
+        yield metrics
+    finally:
+        _request_metrics.reset(token)
+
+
+def finish_request(request, response, metrics):
+    """Sets the `Server-Timing` header of the response and records its metrics, once it's fully sent."""
+    response["Server-Timing"] = metrics.server_timing(time.perf_counter() - metrics.started)
+    match = request.resolver_match
+    labels = (match.view_name if match else "unresolved", request.method)
+
+    if not response.streaming:
+        metrics.size = len(response.content)
+        recorder.observe(labels, response.status_code, metrics)
+    elif response.is_async:
+        response.streaming_content = _astream(response.streaming_content, labels, response.status_code, metrics)
+    else:
+        response.streaming_content = _stream(response.streaming_content, labels, response.status_code, metrics)
+
+    return response
+
+
+def _stream(content, labels, status, metrics):
+    # The chunks are produced with the metrics of the request current, so their queries are counted.
+    chunks = iter(content)
+
+    try:
+        while True:
+            token = _request_metrics.set(metrics)
+
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _request_metrics.reset(token)
+
+            metrics.size += len(chunk)
+            yield chunk
+    finally:
+        recorder.observe(labels, status, metrics)
+
+        if recorder.due():
+            recorder.flush()
+
+
+async def _astream(content, labels, status, metrics):
+    chunks = aiter(content)
+
+    try:
+        while True:
+            token = _request_metrics.set(metrics)
+
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                return
+            finally:
+                _request_metrics.reset(token)
+
+            metrics.size += len(chunk)
+            yield chunk
+    finally:
+        recorder.observe(labels, status, metrics)
+
+        if recorder.due():
+            await sync_to_async(recorder.flush)()
+
+
+class MetricsStore:
+    """
+    Keeps the totals of every sample: a (metric name, labels) key mapped to its values, the count of each
+    bucket then the sum for a histogram, the count for a counter.
+    """
+
+    def add(self, samples):
+        """Adds the values of the samples to the totals, as one atomic operation."""
+        raise NotImplementedError
+
+    def totals(self):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+def _add_values(totals, key, values):
+    current = totals.get(key)
+
+    if current is None:
+        totals[key] = list(values)
+    else:
+        for position, value in enumerate(values):
+            current[position] += value
+
+
+class LocMemMetricsStore(MetricsStore):
+    """Totals kept in the memory of the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, samples):
+        with self.lock:
+            for key, values in samples.items():
+                _add_values(self.samples, key, values)
+
+    def totals(self):
+        with self.lock:
+            return {key: list(values) for key, values in self.samples.items()}
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+class SQLiteMetricsStore(MetricsStore):
+    """
+    Totals kept in a SQLite file, shared by every process of the host.
+
+    A flush adds every value with a single upsert statement, in one `BEGIN IMMEDIATE` transaction.
+    """
+
+    def __init__(self, path=None, timeout=5.0):
+        self.path = str(path or settings.TODO_APP_METRICS_SQLITE_PATH)
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics (name TEXT NOT NULL, labels TEXT NOT NULL, "
+                "position INTEGER NOT NULL, value REAL NOT NULL, PRIMARY KEY (name, labels, position))"
+            )
+            self.local.connection = connection
+
+        return connection
+
+    def add(self, samples):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            connection.executemany(
+                "INSERT INTO metrics (name, labels, position, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name, labels, position) DO UPDATE SET value = value + excluded.value",
+                [
+                    (name, json.dumps(labels), position, value)
+                    for (name, labels), values in samples.items()
+                    for position, value in enumerate(values)
+                ],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
+
+    def totals(self):
+        totals = {}
+
+        for name, labels, position, value in self.connection.execute(
+            "SELECT name, labels, position, value FROM metrics ORDER BY name, labels, position"
+        ):
+            totals.setdefault((name, tuple(json.loads(labels))), []).append(value)
+
+        return totals
+
+    def clear(self):
+        self.connection.execute("DELETE FROM metrics")
+
+    def forget_connections(self):
+        self.local = threading.local()
+
+
+_stores = {}
+
+
+def get_metrics_store():
+    """Returns the store configured by `TODO_APP_METRICS_STORE`, created once per process."""
+    path = settings.TODO_APP_METRICS_STORE
+
+    if path not in _stores:
+        try:
+            _stores[path] = import_string(path)()
+        except ImportError as error:
+            raise ImproperlyConfigured(f"Invalid TODO_APP_METRICS_STORE {path!r}: {error}")
+
+    return _stores[path]
+
+
+class Recorder:
+    """Aggregates the metrics of the requests of the process, until they are flushed to the store."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flushed = time.monotonic()
+
+    def observe(self, labels, status, metrics):
+        observations = {
+            "request_duration_seconds": time.perf_counter() - metrics.started,
+            "db_queries": metrics.queries,
+            "db_duration_seconds": metrics.durations["db"],
+            "serializer_duration_seconds": metrics.durations["serializer"],
+            "auth_duration_seconds": metrics.durations["auth"],
+            "throttle_duration_seconds": metrics.durations["throttle"],
+            "response_size_bytes": metrics.size,
+        }
+
+        with self.lock:
+            for name, value in observations.items():
+                buckets = HISTOGRAMS[name][1]
+                values = self.pending.get((name, labels))
+
+                if values is None:
+                    values = self.pending[(name, labels)] = [0] * (len(buckets) + 2)
+
+                values[bisect_left(buckets, value)] += 1
+                values[-1] += value
+
+            _add_values(self.pending, ("requests_total", (*labels, str(status))), [1])
+
+    def due(self):
+        """Whether the pending metrics should be flushed, which callers do after handling a request."""
+        return time.monotonic() - self.flushed >= settings.TODO_APP_METRICS_FLUSH_INTERVAL
+
+    def flush(self):
+        """Adds the pending metrics to the store. They are kept for the next flush when the store fails."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed = time.monotonic()
+
+        if not pending:
+            return
+
+        try:
+            get_metrics_store().add(pending)
+        except Exception:
+            logger.exception("Could not flush the request metrics")
+
+            with self.lock:
+                for key, values in pending.items():
+                    _add_values(self.pending, key, values)
+
+    def clear(self):
+        with self.lock:
+            self.pending = {}
+            self.flushed = time.monotonic()
+
+
+recorder = Recorder()
+
+
+def _after_fork():
+    # Workers forked from a preloaded master start with nothing pending and their own store connections.
+    recorder.clear()
+
+    for store in _stores.values():
+        if isinstance(store, SQLiteMetricsStore):
+            store.forget_connections()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _format_labels(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    value = float(value)
+
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_prometheus(totals):
+    """Writes the totals of a store in the Prometheus text exposition format."""
+    lines = []
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        metric = f"{NAMESPACE}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+
+        for (sample_name, labels), values in sorted(totals.items()):
+            if sample_name != name:
+                continue
+
+            count = 0
+
+            for bound, bucket_count in zip([*buckets, "+Inf"], values):
+                count += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(['view', 'method'], labels, le=bound)} {_number(count)}")
+
+            lines.append(f"{metric}_sum{_format_labels(['view', 'method'], labels)} {_number(values[-1])}")
+            lines.append(f"{metric}_count{_format_labels(['view', 'method'], labels)} {_number(count)}")
+
+    for name, help_text in COUNTERS.items():
+        metric = f"{NAMESPACE}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+
+        for (sample_name, labels), values in sorted(totals.items()):
+            if sample_name == name:
+                lines.append(f"{metric}{_format_labels(['view', 'method', 'status'], labels)} {_number(values[0])}")
+
+    return "\n".join(lines) + "\n"
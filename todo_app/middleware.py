@@ -0,0 +1,187 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import collect_metrics, finish_request, recorder
+from .profiling import ProfileSession, finish_profile, requested_profile, sampler
+from .routers import SAFE_METHODS, known_user, pin_to_primary, replica_reads
+from .touches import acoalesce_touches, coalesce_touches
+
+
+class TodoListTouchMiddleware:
+    """
+    Coalesces the todo list touches made while handling a request.
+
+    The todo lists touched by the request are updated with a single statement per transaction when it
+    commits, and after the view returns for the writes made in autocommit mode. Under ASGI the middleware
+    runs async, so async views don't hop to a worker thread for requests that touched nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with coalesce_touches():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with acoalesce_touches():
+            return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the reads of safe-method requests go to the read replicas, and pins the reads of a user to the
+    primary for a while after each of their unsafe requests, so they read their own writes (see
+    `todo_app.routers`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with replica_reads(request):
+            response = self.get_response(request)
+
+        if self.wrote(request):
+            self.pin_writer(request)
+
+        return response
+
+    async def __acall__(self, request):
+        with replica_reads(request):
+            response = await self.get_response(request)
+
+        if self.wrote(request):
+            await sync_to_async(self.pin_writer)(request)
+
+        return response
+
+    def wrote(self, request):
+        return bool(settings.TODO_APP_DB_REPLICAS) and request.method not in SAFE_METHODS
+
+    def pin_writer(self, request):
+        user = known_user(request)
+
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+
+class MetricsMiddleware:
+    """
+    Measures every request and records its metrics, setting its `Server-Timing` header (see
+    `todo_app.metrics`). It goes first, so the time spent in the other middlewares is measured too.
+
+    Turned off, it's removed from the stack, with the `TODO_APP_METRICS` setting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TODO_APP_METRICS:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with collect_metrics() as metrics:
+            response = finish_request(request, self.get_response(request), metrics)
+
+        if recorder.due():
+            recorder.flush()
+
+        return response
+
+    async def __acall__(self, request):
+        with collect_metrics() as metrics:
+            response = finish_request(request, await self.get_response(request), metrics)
+
+        if recorder.due():
+            await sync_to_async(recorder.flush)()
+
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests staff users ask to profile, and a sample of every view's requests when
+    `TODO_APP_PROFILE_SAMPLE_RATE` is set (see `todo_app.profiling`).
+
+    It goes after the authentication middleware, which session authentication relies on, and costs nothing
+    but the flag and sampler checks to the other requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        kind = self.profile_kind(request)
+
+        if kind is None:
+            return self.get_response(request)
+
+        session = ProfileSession(request, kind)
+
+        with session.active():
+            response = self.get_response(request)
+
+        return finish_profile(session, response)
+
+    async def __acall__(self, request):
+        kind = await sync_to_async(self.profile_kind)(request)
+
+        if kind is None:
+            return await self.get_response(request)
+
+        session = ProfileSession(request, kind)
+
+        with session.active():
+            response = await self.get_response(request)
+
+        if response.streaming:
+            return finish_profile(session, response)
+
+        return await sync_to_async(finish_profile)(session, response)
+
+    def profile_kind(self, request):
+        if requested_profile(request):
+            return "requested"
+
+        if sampler.sample(request):
+            return "sampled"
+
+        return None
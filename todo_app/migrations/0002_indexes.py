@@ -0,0 +1,45 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["todo_list", "done", "created"], name="task_list_done_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["todo_list", "created"], name="task_list_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="todolist",
+            index=models.Index(fields=["owner", "-updated"], name="todolist_owner_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="todolist",
+            index=models.Index(
+                condition=models.Q(("archived", True)), fields=["owner", "-updated"], name="todolist_owner_archived_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="todo_list",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="todo_tasks",
+                to="todo_app.todolist",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="todolist",
+            name="owner",
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="todo_app.user"),
+        ),
+    ]
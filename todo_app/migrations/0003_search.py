@@ -0,0 +1,38 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("task_name_trgm_idx", "todo_app_task"),
+    ("todolist_name_trgm_idx", "todo_app_todolist"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """PostgreSQL only: the SQLite FTS5 index is installed after migrate by todo_app.search."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for name, table in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ((UPPER("name"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo_app", "0002_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tasks(apps, schema_editor):
+    """Fills the new counters of the existing todo lists with one UPDATE."""
+    TodoList = apps.get_model("todo_app", "TodoList")
+    Task = apps.get_model("todo_app", "Task")
+
+    counts = Task.objects.filter(todo_list=OuterRef("pk")).order_by().values("todo_list")
+    TodoList.objects.using(schema_editor.connection.alias).update(
+        task_count=Coalesce(Subquery(counts.annotate(count=Count("pk")).values("count")), 0),
+        done_count=Coalesce(Subquery(counts.annotate(count=Count("pk", filter=Q(done=True))).values("count")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo_app", "0003_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="todolist",
+            name="done_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="todolist",
+            name="task_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
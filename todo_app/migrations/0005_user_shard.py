@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todo_app", "0004_task_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="shard",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+    ]
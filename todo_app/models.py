@@ -16,13 +16,31 @@ class TodoList(models.Model):
     - owner (ForeignKey): The owner of the todo list.
     - archived (BooleanField): Indicates if the todo list is archived.
     - updated (DateTimeField): The last updated timestamp of the todo list.
+    - task_count (IntegerField): The number of tasks of the todo list.
+    - done_count (IntegerField): The number of done tasks of the todo list.
+
+    Task counters are maintained incrementally as tasks change (see `todo_app.touches`); the
+    `recount_tasks` management command repairs any drift.
+
+    Indexes follow the hot access paths: lists of an owner by most recently updated, and the (much
+    smaller) set of archived lists of an owner.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     name = models.CharField(max_length=100)
-    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     archived = models.BooleanField(default=False)
     updated = models.DateTimeField(auto_now=True)
+    task_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "-updated"], name="todolist_owner_updated_idx"),
+            models.Index(
+                fields=["owner", "-updated"], condition=models.Q(archived=True), name="todolist_owner_archived_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -38,14 +56,37 @@ class Task(models.Model):
     - name (CharField): The name of the task.
     - done (BooleanField): Indicates if the task is completed.
     - created (DateTimeField): The creation timestamp of the task.
+
+    A task name is unique within its todo list, enforced by the database. Indexes follow the hot access
+    paths: tasks of a list ordered by done status, and tasks of a list filtered by creation date.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     name = models.CharField(max_length=100)
     done = models.BooleanField(default=False)
-    todo_list = models.ForeignKey(TodoList, on_delete=models.CASCADE, related_name="todo_tasks")
+    todo_list = models.ForeignKey(TodoList, on_delete=models.CASCADE, related_name="todo_tasks", db_index=False)
     created = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["todo_list", "name"], name="unique_task_name_per_todo_list"),
+        ]
+        indexes = [
+            models.Index(fields=["todo_list", "done", "created"], name="task_list_done_idx"),
+            models.Index(fields=["todo_list", "created"], name="task_list_created_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the stored todo list and done status, so saves can tell how the task counters change."""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+
+        if "todo_list_id" in loaded and "done" in loaded:
+            instance._counted_state = (loaded["todo_list_id"], loaded["done"])
+
+        return instance
+
     def __str__(self) -> str:
         return self.name
 
@@ -56,6 +97,26 @@ class User(AbstractUser):
 
     This model is used for authentication and authorization purposes.
     It inherits from Django's built-in AbstractUser model.
+
+    Fields:
+    - shard (CharField): The database alias holding the todo lists and tasks of the user, when they are
+      sharded (see `todo_app.sharding`); blank for the first shard.
     """
 
-    pass
+    shard = models.CharField(max_length=100, blank=True, default="")
+
+    # Fields the cached token bindings depend on (see `todo_app.api.authentication`).
+    TOKEN_FIELDS = ["password", "is_active", "is_staff", "is_superuser", "shard"]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the stored token fields, so saves can tell whether the cached tokens of the user go stale."""
+        instance = super().from_db(db, field_names, values)
+
+        if all(field in field_names for field in cls.TOKEN_FIELDS):
+            instance._token_state = instance.token_state()
+
+        return instance
+
+    def token_state(self):
+        return tuple(getattr(self, field) for field in self.TOKEN_FIELDS)
@@ -0,0 +1,53 @@
+"""
+Cached ownership of todo lists.
+
+Permission checks only need to know who owns a todo list, so the owner id of every list checked is kept in
+the `TODO_APP_OWNERSHIP_CACHE` cache, and the checks of a hot list cost no query. Lists that don't exist
+aren't cached, as they may be created by another process right after.
+
+Entries are invalidated by the `TodoList` save and delete signal receivers, right away and again once the
+transaction commits, so a concurrent check can't cache the ownership being replaced. Writes that skip the
+signals, like `TodoList.objects.update(owner=...)`, must call `forget_todo_list_owner` themselves. The
+cache must be shared by every process serving the API, so an invalidation reaches all of them: a
+per-process one fails the system checks (see `todo_app.checks`).
+
+When todo lists are sharded, a list missing from the cache is looked up on every shard in turn.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import TodoList
+from .sharding import get_shards
+
+
+def _cache():
+    return caches[settings.TODO_APP_OWNERSHIP_CACHE]
+
+
+def _cache_key(todo_list_id):
+    return f"todo_app:todo_list_owner:{todo_list_id}"
+
+
+def get_todo_list_owner_id(todo_list_id):
+    """Returns the id of the owner of the todo list, or None when there is no such list."""
+    cache = _cache()
+    key = _cache_key(todo_list_id)
+    owner_id = cache.get(key)
+
+    if owner_id is None:
+        for alias in get_shards() or [None]:
+            owner_id = TodoList.objects.using(alias).filter(pk=todo_list_id).values_list("owner_id", flat=True).first()
+
+            if owner_id is not None:
+                cache.set(key, owner_id, settings.TODO_APP_OWNERSHIP_CACHE_TIMEOUT)
+                break
+
+    return owner_id
+
+
+def forget_todo_list_owner(todo_list_id, using=DEFAULT_DB_ALIAS):
+    """Drops the cached owner of the todo list, now and when the current transaction commits."""
+    key = _cache_key(todo_list_id)
+    _cache().delete(key)
+    transaction.on_commit(lambda: _cache().delete(key), using=using)
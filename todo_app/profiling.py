@@ -0,0 +1,291 @@
+"""
+On-demand and sampled profiles of individual requests.
+
+A staff user gets a profile of a request by sending it with the `X-Profile: 1` header or the `profile=1`
+query parameter, and `ProfilingMiddleware` runs it under `cProfile`. The user of a flagged request is
+authenticated before the profiler starts, once: the view reuses the outcome. With
+`TODO_APP_PROFILE_SAMPLE_RATE` set to N, every Nth request of each view is profiled too, whoever makes it
+(counted per process).
+
+Besides the function profile, every SQL query is captured with its duration and its origin: the innermost
+frames of the project code that ran it, such as a signal receiver or a serializer field. Query parameters
+are left out, as they may hold credentials.
+
+A profile is stored as two files in `TODO_APP_PROFILE_DIR`, in a `requested` or `sampled` subdirectory:
+`<id>.json` (request, SQL and the top of the profile as text) and `<id>.prof` (`pstats` data, for
+snakeviz and the like). Each subdirectory is a ring buffer keeping the last `TODO_APP_PROFILE_RING_SIZE`
+profiles. The id is sent back in the `X-Profile-Id` header, and staff users download the files from the
+profile endpoints. Streamed responses are profiled until their last chunk is sent.
+
+`cProfile` only follows the thread it runs in: under ASGI the profile of an async view covers the event
+loop, with whatever else runs there meanwhile, while its SQL capture stays exact.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from .api.authentication import authenticate_ahead
+
+KINDS = ["requested", "sampled"]
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+FLAG_VALUES = {"1", "true", "yes"}
+
+# Frames of the project code kept as the origin of a query, innermost first.
+ORIGIN_FRAMES = 8
+SUMMARY_FUNCTIONS = 40
+
+_profile_session = contextvars.ContextVar("profile_session", default=None)
+
+
+def requested_profile(request):
+    """Whether the request asks to be profiled, which only staff users may do."""
+    flag = request.headers.get("X-Profile") or request.GET.get("profile")
+
+    return flag is not None and flag.lower() in FLAG_VALUES and _staff_request(request)
+
+
+def _staff_request(request):
+    # The API authenticates in the view: the user is authenticated ahead, the same way.
+    user = authenticate_ahead(request)
+
+    return user is not None and user.is_staff
+
+
+class Sampler:
+    """Picks every Nth request of each view of the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+
+    def sample(self, request):
+        rate = settings.TODO_APP_PROFILE_SAMPLE_RATE
+
+        if not rate:
+            return False
+
+        try:
+            view_name = resolve(request.path_info, getattr(request, "urlconf", None)).view_name
+        except Resolver404:
+            view_name = "unresolved"
+
+        with self.lock:
+            self.counts[view_name] += 1
+
+            return self.counts[view_name] % rate == 0
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+sampler = Sampler()
+
+
+def _origin(stack):
+    """The innermost frames of the project code, outside of this module, as "path:line in function"."""
+    root = str(settings.BASE_DIR) + os.sep
+    frames = []
+
+    for frame in reversed(stack):
+        if frame.filename.startswith(root) and "site-packages" not in frame.filename and frame.filename != __file__:
+            frames.append(f"{frame.filename[len(root):]}:{frame.lineno} in {frame.name}")
+
+            if len(frames) == ORIGIN_FRAMES:
+                break
+
+    return frames
+
+
+def _capture_query(execute, sql, params, many, context):
+    session = _profile_session.get()
+
+    if session is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        session.queries.append(
+            {
+                "sql": sql,
+                "many": many,
+                "database": context["connection"].alias,
+                "duration_ms": round(duration * 1000, 3),
+                "origin": _origin(traceback.extract_stack()),
+            }
+        )
+
+
+@receiver(connection_created)
+def capture_queries(sender, connection, **kwargs):
+    # First in line, as `execute_wrapper()` blocks pop the last wrapper when they exit.
+    if _capture_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _capture_query)
+
+
+class ProfileSession:
+    """The profile of a request being handled, saved once its response is sent."""
+
+    def __init__(self, request, kind):
+        self.id = "{}-{}".format(timezone.now().strftime("%Y%m%dT%H%M%S%f"), uuid.uuid4().hex[:8])
+        self.kind = kind
+        self.request = request
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.duration = 0.0
+        self.status = None
+
+    @contextmanager
+    def active(self):
+        """Profiles the block and captures its queries."""
+        token = _profile_session.set(self)
+        started = time.perf_counter()
+        self.profiler.enable()
+
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+            self.duration += time.perf_counter() - started
+            _profile_session.reset(token)
+
+    def artifact(self):
+        match = self.request.resolver_match
+        user = getattr(self.request, "user", None)
+        summary = io.StringIO()
+        pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_FUNCTIONS)
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "created": timezone.now().isoformat(),
+            "view": match.view_name if match else None,
+            "method": self.request.method,
+            "path": self.request.get_full_path(),
+            "user": user.pk if user is not None and user.is_authenticated else None,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3),
+            "query_count": len(self.queries),
+            "sql_ms": round(sum(query["duration_ms"] for query in self.queries), 3),
+            "queries": self.queries,
+            "profile": summary.getvalue(),
+        }
+
+    def save(self):
+        """Writes the profile files, then drops the oldest profiles of its kind past the ring size."""
+        directory = profile_dir(self.kind)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(directory / f"{self.id}.prof")
+
+        # The JSON file, which lists the profile, is written last and atomically.
+        partial = directory / f"{self.id}.json.partial"
+        partial.write_text(json.dumps(self.artifact(), indent=2))
+        os.replace(partial, directory / f"{self.id}.json")
+
+        for stale in sorted(directory.glob("*.json"))[: -settings.TODO_APP_PROFILE_RING_SIZE or None]:
+            for path in [stale, stale.with_suffix(".prof")]:
+                # Another worker may be dropping it too.
+                path.unlink(missing_ok=True)
+
+
+def profile_dir(kind):
+    return Path(settings.TODO_APP_PROFILE_DIR) / kind
+
+
+def profile_path(profile_id, suffix):
+    """Path of a file of a stored profile, or None when there is no such profile."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+
+    for kind in KINDS:
+        path = profile_dir(kind) / f"{profile_id}{suffix}"
+
+        if path.exists():
+            return path
+
+    return None
+
+
+def stored_profiles():
+    """Summaries of the stored profiles, the latest first."""
+    profiles = []
+
+    for kind in KINDS:
+        for path in profile_dir(kind).glob("*.json"):
+            try:
+                artifact = json.loads(path.read_text())
+            except (FileNotFoundError, ValueError):
+                continue
+
+            profiles.append({key: value for key, value in artifact.items() if key not in ["queries", "profile"]})
+
+    return sorted(profiles, key=lambda profile: profile["id"], reverse=True)
+
+
+def finish_profile(session, response):
+    """Sends the profile id back, and saves the profile once the response is fully sent."""
+    session.status = response.status_code
+    response["X-Profile-Id"] = session.id
+
+    if not response.streaming:
+        session.save()
+    elif response.is_async:
+        response.streaming_content = _astream(response.streaming_content, session)
+    else:
+        response.streaming_content = _stream(response.streaming_content, session)
+
+    return response
+
+
+def _stream(content, session):
+    chunks = iter(content)
+
+    try:
+        while True:
+            with session.active():
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+
+            yield chunk
+    finally:
+        session.save()
+
+
+async def _astream(content, session):
+    chunks = aiter(content)
+
+    try:
+        while True:
+            with session.active():
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+
+            yield chunk
+    finally:
+        await sync_to_async(session.save)()
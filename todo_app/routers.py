@@ -0,0 +1,291 @@
+"""
+Read-replica routing.
+
+The databases listed in `TODO_APP_DB_REPLICAS` are read-only replicas of `default`. `ReplicaRouter` sends
+the reads of safe-method requests (GET, HEAD, OPTIONS) to one of them, marked by `ReplicaRoutingMiddleware`;
+every write, every read of other requests and every read inside a transaction on the primary go to the
+primary.
+
+A replica is picked once per request, at its first replica read, with the `TODO_APP_REPLICA_POLICY`, so all
+the reads of a request see the same state of the data:
+
+- `round_robin` (default) cycles through the replicas.
+- `least_lag` picks the replica with the lowest replication lag, measured at most every
+  `TODO_APP_REPLICA_LAG_INTERVAL` seconds, and falls back to the primary when every replica lags more than
+  `TODO_APP_REPLICA_MAX_LAG` seconds or can't be reached.
+
+Users read their own writes: every unsafe request of an authenticated user pins their reads to the primary
+for `TODO_APP_REPLICA_PIN_SECONDS`, through the `TODO_APP_REPLICA_PIN_CACHE` cache, which must be shared by
+every process (see `todo_app.checks`). Reads made before the view knows the user, such as the authentication
+lookups themselves, go to the primary.
+
+For local testing, replicas can be SQLite files refreshed from the primary with the `sync_sqlite_replicas`
+command, which makes the replication lag visible to `least_lag`:
+
+    TODO_APP_DB_REPLICAS=replica SQL_REPLICA_DATABASE=replica.sqlite3 python manage.py sync_sqlite_replicas --interval 5
+
+or a local PostgreSQL primary and streaming replica (see docker-compose.replicas.yml).
+
+`ShardRouter`, listed first in `DATABASE_ROUTERS`, sends the queries on todo lists and tasks to the shard of
+their owner when they are sharded (see `todo_app.sharding`).
+"""
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import empty
+
+from .models import Task, TodoList, User
+from .sharding import SHARDED_MODELS, current_shard, shard_for_user_id, sharding_enabled, todo_list_shard, user_shard
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_routed_request = contextvars.ContextVar("replica_routed_request", default=None)
+
+
+def _pin_cache():
+    return caches[settings.TODO_APP_REPLICA_PIN_CACHE]
+
+
+def _pin_key(user_id):
+    return f"todo_app:replica_pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Sends the reads of the user to the primary for `TODO_APP_REPLICA_PIN_SECONDS`."""
+    _pin_cache().set(_pin_key(user_id), True, settings.TODO_APP_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return bool(_pin_cache().get(_pin_key(user_id)))
+
+
+def known_user(request):
+    """
+    User of the request once it is known, else None.
+
+    Never queries the database: the lazy user of `AuthenticationMiddleware` is only read once evaluated, and
+    DRF replaces it with the user it authenticated (or an anonymous one).
+    """
+    user = request.__dict__.get("user")
+
+    if user is None:
+        return None
+
+    user = getattr(user, "_wrapped", user)
+
+    return None if user is empty else user
+
+
+class RoutedRequest:
+    """Routing state of a safe-method request: whether its reads may go to a replica, and which one."""
+
+    def __init__(self, request):
+        self.request = request
+        self.pinned = None
+        self.replica = None
+
+    def use_replica(self):
+        if self.pinned is None:
+            user = known_user(self.request)
+
+            if user is None:
+                return False
+
+            self.pinned = user.is_authenticated and is_pinned_to_primary(user.pk)
+
+        return not self.pinned
+
+
+@contextmanager
+def replica_reads(request):
+    """Lets the reads made inside the block go to a replica, if `request` is a safe-method request."""
+    token = _routed_request.set(RoutedRequest(request) if request.method in SAFE_METHODS else None)
+
+    try:
+        yield
+    finally:
+        _routed_request.reset(token)
+
+
+class ReplicaLagMonitor:
+    """Replication lag of every replica, measured at most every `TODO_APP_REPLICA_LAG_INTERVAL` seconds."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lags = {}
+        self.measured = None
+
+    def get_lags(self, aliases):
+        with self.lock:
+            now = time.monotonic()
+
+            if self.measured is None or now - self.measured >= settings.TODO_APP_REPLICA_LAG_INTERVAL:
+                self.lags = {alias: measure_lag(alias) for alias in aliases}
+                self.measured = now
+
+            return self.lags
+
+
+def measure_lag(alias):
+    """Seconds the replica is behind the primary, None when it can't be reached."""
+    connection = connections[alias]
+
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )
+                return float(cursor.fetchone()[0])
+
+        if connection.vendor == "sqlite":
+            primary = connections[DEFAULT_DB_ALIAS]
+            return sqlite_replica_lag(primary.settings_dict["NAME"], connection.settings_dict["NAME"])
+    except (DatabaseError, OSError, ValueError):
+        return None
+
+    return 0.0
+
+
+def _last_write(path):
+    """Last modification of a SQLite database file, its write-ahead log included."""
+    path = str(path)
+
+    return max(os.path.getmtime(name) for name in [path, path + "-wal"] if os.path.exists(name))
+
+
+def sqlite_replica_lag(primary_path, replica_path):
+    """How far a SQLite replica copied from the primary is behind it."""
+    return max(0.0, _last_write(primary_path) - _last_write(replica_path))
+
+
+class ReplicaRouter:
+    """Routes the reads of safe-method requests to the replicas (see the module docstring)."""
+
+    def __init__(self):
+        self.cycle_lock = threading.Lock()
+        self.cycles = {}
+        self.lag_monitor = ReplicaLagMonitor()
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.TODO_APP_DB_REPLICAS
+        routed = _routed_request.get()
+
+        if not replicas or routed is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        if not routed.use_replica():
+            return DEFAULT_DB_ALIAS
+
+        if routed.replica is None:
+            routed.replica = self.pick_replica(replicas)
+
+        return routed.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS if settings.TODO_APP_DB_REPLICAS else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.TODO_APP_DB_REPLICAS}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary.
+        return False if db in settings.TODO_APP_DB_REPLICAS else None
+
+    def pick_replica(self, replicas):
+        if settings.TODO_APP_REPLICA_POLICY == "least_lag":
+            return self.least_lagging(replicas)
+
+        return self.next_replica(replicas)
+
+    def next_replica(self, replicas):
+        with self.cycle_lock:
+            key = tuple(replicas)
+
+            if key not in self.cycles:
+                self.cycles[key] = itertools.cycle(replicas)
+
+            return next(self.cycles[key])
+
+    def least_lagging(self, replicas):
+        lags = self.lag_monitor.get_lags(replicas)
+        reachable = [(lag, alias) for alias, lag in lags.items() if lag is not None]
+
+        if not reachable:
+            return DEFAULT_DB_ALIAS
+
+        lag, alias = min(reachable)
+
+        return alias if lag <= settings.TODO_APP_REPLICA_MAX_LAG else DEFAULT_DB_ALIAS
+
+
+class ShardRouter:
+    """
+    Routes the queries on todo lists and tasks to their shard, when `TODO_APP_SHARDS` is set.
+
+    Queries on an instance go to the database it was read from. New instances go to the shard of their owner
+    or todo list, or of the instance they are related to. Any other query goes to the shard of the request
+    (see `todo_app.sharding.shard_scope`), or is left to the next router.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self.db_for_model(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_model(model, hints.get("instance"))
+
+    def db_for_model(self, model, instance):
+        if model not in SHARDED_MODELS or not sharding_enabled():
+            return None
+
+        if instance is not None:
+            shard = self.db_for_instance(instance)
+
+            if shard is not None:
+                return shard
+
+        return current_shard()
+
+    def db_for_instance(self, instance):
+        if isinstance(instance, User):
+            return user_shard(instance)
+
+        if instance._state.db is not None:
+            return instance._state.db
+
+        if isinstance(instance, TodoList) and instance.owner_id is not None:
+            return shard_for_user_id(instance.owner_id)
+
+        if isinstance(instance, Task) and instance.todo_list_id is not None:
+            return todo_list_shard(instance.todo_list_id)
+
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not sharding_enabled():
+            return None
+
+        sharded = [isinstance(obj, SHARDED_MODELS) for obj in (obj1, obj2)]
+
+        if all(sharded):
+            return obj1._state.db == obj2._state.db
+
+        # Users are mirrored to every shard.
+        if any(sharded):
+            return True
+
+        return None
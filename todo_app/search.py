@@ -0,0 +1,130 @@
+"""
+Indexed text search over task and todo list names.
+
+Every search term must appear somewhere in the name (like `icontains`), but matches are found through an
+index and ranked best first:
+
+- PostgreSQL: `pg_trgm` GIN indexes on `UPPER(name)` serve the `icontains` lookups, and results are ranked
+  by trigram word similarity. The indexes are created by migration 0003.
+- SQLite: FTS5 shadow tables using the trigram tokenizer, kept in sync by triggers, serve the matches and
+  rank them with bm25. They are (re)installed after every migrate by `install_sqlite_search_index`, because
+  SQLite drops triggers whenever Django remakes a table. Run `INSERT INTO <table>_fts(<table>_fts)
+  VALUES('rebuild')` after a VACUUM, which may renumber rowids.
+
+Any other database falls back to unindexed `icontains` lookups.
+"""
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Task, TodoList
+
+SEARCH_RANK = "search_rank"
+
+# The trigram tokenizer can only match terms of at least three characters.
+MIN_SQLITE_TERM_LENGTH = 3
+
+
+def search(queryset, terms):
+    """Keeps the rows whose name contains every term, annotated with `search_rank` and ordered best first."""
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        return _search_postgresql(queryset, terms)
+
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, terms)
+
+    return _search_unindexed(queryset, terms)
+
+
+def _order_by_rank(queryset, rank_ordering):
+    return queryset.order_by(rank_ordering, *queryset.query.order_by, "pk")
+
+
+def _search_unindexed(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(name__icontains=term)
+
+    return _order_by_rank(queryset.annotate(**{SEARCH_RANK: Value(0.0, output_field=FloatField())}), SEARCH_RANK)
+
+
+def _search_postgresql(queryset, terms):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    for term in terms:
+        queryset = queryset.filter(name__icontains=term)
+
+    queryset = queryset.annotate(**{SEARCH_RANK: TrigramWordSimilarity(" ".join(terms), "name")})
+
+    return _order_by_rank(queryset, F(SEARCH_RANK).desc())
+
+
+def _search_sqlite(queryset, terms):
+    table = queryset.model._meta.db_table
+    fts_table = f"{table}_fts"
+    indexed_terms = [term for term in terms if len(term) >= MIN_SQLITE_TERM_LENGTH]
+
+    for term in terms:
+        if len(term) < MIN_SQLITE_TERM_LENGTH:
+            queryset = queryset.filter(name__icontains=term)
+
+    if not indexed_terms:
+        return _order_by_rank(queryset.annotate(**{SEARCH_RANK: Value(0.0, output_field=FloatField())}), SEARCH_RANK)
+
+    match = " ".join('"{}"'.format(term.replace('"', '""')) for term in indexed_terms)
+    queryset = queryset.filter(
+        RawSQL(
+            f'"{table}".rowid IN (SELECT rowid FROM "{fts_table}" WHERE "{fts_table}" MATCH %s)',
+            (match,),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        **{
+            SEARCH_RANK: RawSQL(
+                f'SELECT bm25("{fts_table}") FROM "{fts_table}" '
+                f'WHERE "{fts_table}" MATCH %s AND "{fts_table}".rowid = "{table}".rowid',
+                (match,),
+                output_field=FloatField(),
+            )
+        }
+    )
+
+    return _order_by_rank(queryset, SEARCH_RANK)
+
+
+def install_sqlite_search_index(connection):
+    """
+    Creates the FTS5 shadow tables and their sync triggers when they are missing, rebuilding the index of
+    any table whose triggers had to be (re)created.
+    """
+    with connection.cursor() as cursor:
+        for model in [Task, TodoList]:
+            table = model._meta.db_table
+            fts_table = f"{table}_fts"
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s AND name LIKE %s",
+                [table, f"{fts_table}_%"],
+            )
+
+            if cursor.fetchone()[0] == 3:
+                continue
+
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts_table}" '
+                f"USING fts5(name, content='{table}', tokenize='trigram')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_insert" AFTER INSERT ON "{table}" BEGIN '
+                f'INSERT INTO "{fts_table}"(rowid, name) VALUES (new.rowid, new.name); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_delete" AFTER DELETE ON "{table}" BEGIN '
+                f'INSERT INTO "{fts_table}"("{fts_table}", rowid, name) VALUES (\'delete\', old.rowid, old.name); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_update" AFTER UPDATE OF name ON "{table}" BEGIN '
+                f'INSERT INTO "{fts_table}"("{fts_table}", rowid, name) VALUES (\'delete\', old.rowid, old.name); '
+                f'INSERT INTO "{fts_table}"(rowid, name) VALUES (new.rowid, new.name); END'
+            )
+            cursor.execute(f'INSERT INTO "{fts_table}"("{fts_table}") VALUES (\'rebuild\')')
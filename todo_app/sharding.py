@@ -0,0 +1,419 @@
+"""
+Owner-based sharding of todo lists and tasks.
+
+The databases listed in `TODO_APP_SHARDS` (e.g. "default,shard1,shard2") each hold the todo lists of some
+users, along with their tasks. Every user has a home shard, recorded in `User.shard` (blank for the first
+shard) and assigned round robin by id when the user is created. Users themselves stay on `default`, which
+handles authentication, and are mirrored to every other shard, so the owner of a todo list can be joined
+on every shard.
+
+Queries reach the right shard in three ways:
+
+- The views set the shard of the request (see `todo_app.api.sharding.ShardedViewMixin`): their querysets
+  use it explicitly, and `ShardRouter` sends every other todo list and task query made while handling the
+  request there.
+- Saves and deletes of model instances follow the instance, and new instances the shard of their owner or
+  todo list (see `ShardRouter`).
+- Queries over every shard, like the todo lists listed to superusers, go through `fan_out`, which merges
+  the ordered rows of all shards.
+
+Users are moved to another shard with the `move_user_shard` command (see `move_user`). The shards of the
+users are cached in the `TODO_APP_OWNERSHIP_CACHE`, shared by every process (see `todo_app.checks`), so a
+move is seen by every worker at once.
+
+For local testing, the shards can be SQLite files:
+
+    TODO_APP_SHARDS=default,shard1,shard2 python manage.py migrate --database shard1
+"""
+import contextvars
+import functools
+import heapq
+import itertools
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Task, TodoList, User
+from .touches import coalesce_touches
+
+SHARDED_MODELS = (TodoList, Task)
+
+# Seconds a user stays marked as moving if the move never gets to clear the mark, e.g. as the process died
+MOVING_TIMEOUT = 60 * 60
+
+_request_shard = contextvars.ContextVar("request_shard", default=None)
+
+
+def get_shards():
+    """Database aliases of the shards, empty when sharding is off."""
+    return settings.TODO_APP_SHARDS
+
+
+def sharding_enabled():
+    return bool(settings.TODO_APP_SHARDS)
+
+
+def _cache():
+    return caches[settings.TODO_APP_OWNERSHIP_CACHE]
+
+
+def _cache_key(user_id):
+    return f"todo_app:user_shard:{user_id}"
+
+
+def _moving_key(user_id):
+    return f"todo_app:user_moving:{user_id}"
+
+
+def user_moving(user_id):
+    """Whether the todo lists of the user are being moved to another shard, which holds off their writes."""
+    return bool(_cache().get(_moving_key(user_id)))
+
+
+def user_shard(user):
+    """Shard of the todo lists of the user, None when sharding is off or the user is anonymous."""
+    if not sharding_enabled() or not user.is_authenticated:
+        return None
+
+    return user.shard or get_shards()[0]
+
+
+def shard_for_user_id(user_id):
+    """
+    Shard of the todo lists of the user with this id, read from the directory on `default` and cached. Unknown
+    users aren't cached, as they may be created right after.
+    """
+    if not sharding_enabled():
+        return None
+
+    cache = _cache()
+    key = _cache_key(user_id)
+    shard = cache.get(key)
+
+    if shard is None:
+        shard = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).values_list("shard", flat=True).first()
+
+        if shard is not None:
+            cache.set(key, shard, settings.TODO_APP_OWNERSHIP_CACHE_TIMEOUT)
+
+    return shard or get_shards()[0]
+
+
+def forget_user_shard(user_id):
+    _cache().delete(_cache_key(user_id))
+
+
+def todo_list_shard(todo_list_id):
+    """Shard of the todo list, or None when sharding is off or there is no such list."""
+    from .ownership import get_todo_list_owner_id
+
+    if not sharding_enabled():
+        return None
+
+    owner_id = get_todo_list_owner_id(todo_list_id)
+
+    return None if owner_id is None else shard_for_user_id(owner_id)
+
+
+def assign_shard(user):
+    """Gives a new user a home shard, round robin by id."""
+    shards = get_shards()
+
+    if shards and not user.shard:
+        user.shard = shards[user.pk % len(shards)]
+        User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user.pk).update(shard=user.shard)
+
+
+def mirror_user(user):
+    """Copies the user row to every shard but `default`, without sending any signal."""
+    values = {field.attname: getattr(user, field.attname) for field in User._meta.concrete_fields}
+
+    for alias in get_shards():
+        if alias != DEFAULT_DB_ALIAS and not User.objects.using(alias).filter(pk=user.pk).update(**values):
+            User.objects.using(alias).bulk_create([User(**values)])
+
+
+def delete_mirrored_user(user):
+    """Deletes the user from every shard but `default`, along with their todo lists and tasks."""
+    for alias in get_shards():
+        if alias != DEFAULT_DB_ALIAS:
+            User.objects.using(alias).filter(pk=user.pk).delete()
+
+
+@contextmanager
+def shard_scope(get_shard):
+    """
+    Sends the todo list and task queries of the block that don't follow an instance to the shard returned by
+    `get_shard()`, called for every such query (None lets the other routers decide).
+    """
+    token = _request_shard.set(get_shard)
+
+    try:
+        yield
+    finally:
+        _request_shard.reset(token)
+
+
+def current_shard():
+    get_shard = _request_shard.get()
+
+    return None if get_shard is None else get_shard()
+
+
+@contextmanager
+def atomic_on_shards():
+    """One transaction on every shard (on `default` when sharding is off), committed one after the other."""
+    with ExitStack() as stack:
+        for alias in get_shards() or [DEFAULT_DB_ALIAS]:
+            stack.enter_context(transaction.atomic(using=alias))
+
+        yield
+
+
+def move_user(user, target, batch_size):
+    """
+    Moves the todo lists and tasks of the user to the `target` shard.
+
+    The user is marked as moving for the whole move, which makes the API turn their writes down (see
+    `todo_app.api.sharding`). On the source, the todo lists are locked before they are read, which waits for
+    the writes already in flight and holds off their tasks until the move is over. The rows are copied to the
+    target in one transaction, the directory is switched over, and only the copied todo lists are deleted from
+    the source, along with their tasks.
+    """
+    source = user_shard(user)
+
+    if source == target:
+        return 0, 0
+
+    cache = _cache()
+    cache.set(_moving_key(user.pk), True, MOVING_TIMEOUT)
+
+    try:
+        with transaction.atomic(using=source):
+            todo_lists = list(TodoList.objects.using(source).filter(owner=user).select_for_update())
+            updated = {todo_list.pk: todo_list.updated for todo_list in todo_lists}
+
+            with transaction.atomic(using=target):
+                TodoList.objects.using(target).bulk_create(todo_lists, batch_size=batch_size)
+
+                # `updated` is set on insert, put the copied value back.
+                for todo_list in todo_lists:
+                    todo_list.updated = updated[todo_list.pk]
+
+                TodoList.objects.using(target).bulk_update(todo_lists, ["updated"], batch_size=batch_size)
+
+                tasks = (
+                    Task.objects.using(source)
+                    .filter(todo_list_id__in=list(updated))
+                    .order_by()
+                    .iterator(chunk_size=batch_size)
+                )
+                moved_tasks = 0
+
+                while chunk := list(itertools.islice(tasks, batch_size)):
+                    Task.objects.using(target).bulk_create(chunk)
+                    moved_tasks += len(chunk)
+
+            user.shard = target
+            user.save(update_fields=["shard"])
+
+            with coalesce_touches():
+                TodoList.objects.using(source).filter(pk__in=list(updated)).delete()
+    finally:
+        cache.delete(_moving_key(user.pk))
+
+    return len(todo_lists), moved_tasks
+
+
+def fan_out(queryset):
+    """The queryset run on every shard, as a `MergedQuerySet`; the queryset itself when sharding is off."""
+    if not sharding_enabled():
+        return queryset
+
+    return MergedQuerySet([queryset.using(alias) for alias in get_shards()])
+
+
+def _row_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def _compare(keys, first, second):
+    """Compares two rows by the (field, descending) keys, NULLs first like SQLite."""
+    for field, descending in keys:
+        a, b = _row_value(first, field), _row_value(second, field)
+
+        if a == b:
+            continue
+
+        smaller = b is not None and (a is None or a < b)
+
+        return (1 if smaller else -1) if descending else (-1 if smaller else 1)
+
+    return 0
+
+
+def combine_aggregates(aggregates, results):
+    """Combines the aggregates computed on every shard: MAX, MIN, COUNT and SUM are supported."""
+    combined = {}
+
+    for name, aggregate in aggregates.items():
+        values = [result[name] for result in results if result[name] is not None]
+        function = getattr(aggregate, "function", None)
+
+        if function == "MAX":
+            combined[name] = max(values, default=None)
+        elif function == "MIN":
+            combined[name] = min(values, default=None)
+        elif function == "COUNT":
+            combined[name] = sum(values)
+        elif function == "SUM":
+            combined[name] = sum(values) if values else None
+        else:
+            raise TypeError(f"{aggregate!r} can't be combined across shards.")
+
+    return combined
+
+
+class MergedQuerySet:
+    """
+    A queryset run on every shard, whose rows are merged.
+
+    Chained calls are applied to the queryset of every shard. Rows are merged in the order of the querysets
+    (only plain field names are supported, and the fields must be on the rows), or chained when they are
+    not ordered; slices fetch the first rows of every shard and merge them. `count`, `exists` and
+    `aggregate` combine the results of the shards. Rows are fetched once, like a queryset caches them, and
+    async iteration, `acount` and `aaggregate` use the async ORM.
+    """
+
+    def __init__(self, querysets, low=0, high=None):
+        self.querysets = querysets
+        self.low = low
+        self.high = high
+        self.result_cache = None
+
+    @property
+    def model(self):
+        return self.querysets[0].model
+
+    @property
+    def ordered(self):
+        return self.querysets[0].ordered
+
+    def _chain(self, method, *args, **kwargs):
+        if self.low or self.high is not None:
+            raise TypeError("Cannot filter a query once a slice has been taken.")
+
+        return MergedQuerySet([getattr(queryset, method)(*args, **kwargs) for queryset in self.querysets])
+
+    def all(self):
+        return self._chain("all")
+
+    def filter(self, *args, **kwargs):
+        return self._chain("filter", *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._chain("exclude", *args, **kwargs)
+
+    def order_by(self, *fields):
+        return self._chain("order_by", *fields)
+
+    def values(self, *fields, **expressions):
+        return self._chain("values", *fields, **expressions)
+
+    def values_list(self, *fields, **kwargs):
+        return self._chain("values_list", *fields, **kwargs)
+
+    def only(self, *fields):
+        return self._chain("only", *fields)
+
+    def select_related(self, *fields):
+        return self._chain("select_related", *fields)
+
+    def prefetch_related(self, *lookups):
+        return self._chain("prefetch_related", *lookups)
+
+    def get_keys(self):
+        """(field, descending) pairs of the ordering, or None when the rows can't be merged in order."""
+        query = self.querysets[0].query
+        ordering = query.order_by or (query.get_meta().ordering if query.default_ordering else [])
+
+        if not ordering or not all(isinstance(field, str) for field in ordering):
+            return None
+
+        return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+    def shard_querysets(self):
+        """The querysets of the shards, limited to the rows the slice can take from each."""
+        if self.high is None:
+            return self.querysets
+
+        return [queryset[: self.high] for queryset in self.querysets]
+
+    def merge(self, rows_of_shards):
+        keys = self.get_keys()
+
+        if keys is None:
+            rows = itertools.chain.from_iterable(rows_of_shards)
+        else:
+            rows = heapq.merge(*rows_of_shards, key=functools.cmp_to_key(functools.partial(_compare, keys)))
+
+        return itertools.islice(rows, self.low, self.high)
+
+    def fetch(self):
+        if self.result_cache is None:
+            self.result_cache = list(self.merge(self.shard_querysets()))
+
+        return self.result_cache
+
+    def __iter__(self):
+        return iter(self.fetch())
+
+    async def __aiter__(self):
+        if self.result_cache is None:
+            rows_of_shards = [[row async for row in queryset] for queryset in self.shard_querysets()]
+            self.result_cache = list(self.merge(rows_of_shards))
+
+        for row in self.result_cache:
+            yield row
+
+    def __len__(self):
+        return len(self.fetch())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is not None or (index.start or 0) < 0 or (index.stop is not None and index.stop < 0):
+                raise ValueError("Only non-negative slices without a step are supported.")
+
+            low = self.low + (index.start or 0)
+            high = self.high if index.stop is None else self.low + index.stop
+
+            if self.high is not None and high is not None:
+                high = min(high, self.high)
+
+            return MergedQuerySet(self.querysets, low, high)
+
+        return list(self[index : index + 1])[0]
+
+    def iterator(self, chunk_size=None):
+        """Rows of every shard, shard after shard when unordered, read with each queryset `iterator()`."""
+        return self.merge([queryset.iterator(chunk_size=chunk_size) for queryset in self.shard_querysets()])
+
+    def first(self):
+        return next(iter(self[:1]), None)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    async def acount(self):
+        return sum([await queryset.acount() for queryset in self.querysets])
+
+    def exists(self):
+        return any(queryset.exists() for queryset in self.querysets)
+
+    def aggregate(self, **aggregates):
+        return combine_aggregates(aggregates, [queryset.aggregate(**aggregates) for queryset in self.querysets])
+
+    async def aaggregate(self, **aggregates):
+        return combine_aggregates(aggregates, [await queryset.aaggregate(**aggregates) for queryset in self.querysets])
@@ -1,14 +1,128 @@
-from django.db.models.signals import post_save
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
-from .models import Task, TodoList
+from .api.authentication import forget_token, forget_user_tokens
+from .database import tune_sqlite_connection
+from .models import Task, TodoList, User
+from .ownership import forget_todo_list_owner
+from .search import install_sqlite_search_index
+from .sharding import assign_shard, delete_mirrored_user, forget_user_shard, mirror_user
+from .touches import touch_todo_list
 
 
-@receiver(post_save, sender=Task)
-def interaction_with_todo_list(sender, instance, **kwargs):
+@receiver([post_save, post_delete], sender=Task)
+def interaction_with_todo_list(sender, instance, using, signal, created=False, **kwargs):
     """
-    Signal receiver for interacting with the associated todo list after a task is saved.
+    Signal receiver for interacting with the associated todo list after a task is saved or deleted.
 
-    When a task is saved, this receiver updates the `updated` field of the associated todo list.
+    When a task is saved or deleted, this receiver updates the task counters of the associated todo list
+    right away, in the transaction of the write, and marks it as touched, so its `updated` field is refreshed
+    once the write is committed; both are dropped if the write is rolled back. A task moved to another todo
+    list is counted out of the old list and into the new one. The tasks deleted along with their todo list
+    leave it alone.
     """
-    TodoList.objects.get(id=instance.todo_list.id).save(update_fields=["updated"])
+    previous = getattr(instance, "_counted_state", None)
+    current = (instance.todo_list_id, instance.done)
+
+    if signal is post_delete:
+        origin = kwargs.get("origin")
+
+        if (origin.model if isinstance(origin, QuerySet) else type(origin)) is not Task:
+            return
+
+        todo_list_id, done = previous or current
+        touch_todo_list(todo_list_id, tasks=-1, done=-int(done), using=using)
+        return
+
+    instance._counted_state = current
+
+    if created:
+        touch_todo_list(instance.todo_list_id, tasks=1, done=int(instance.done), using=using)
+    elif previous is None or previous == current:
+        touch_todo_list(instance.todo_list_id, using=using)
+    elif previous[0] != current[0]:
+        touch_todo_list(previous[0], tasks=-1, done=-int(previous[1]), using=using)
+        touch_todo_list(current[0], tasks=1, done=int(current[1]), using=using)
+    else:
+        touch_todo_list(instance.todo_list_id, done=int(current[1]) - int(previous[1]), using=using)
+
+
+@receiver([post_save, post_delete], sender=TodoList)
+def todo_list_ownership_changed(sender, instance, using, **kwargs):
+    """
+    Signal receiver for keeping the cached ownership of todo lists right.
+
+    When a todo list is created, saved (possibly with another owner) or deleted, its cached owner is dropped.
+    """
+    forget_todo_list_owner(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Token)
+def token_revoked(sender, instance, using, **kwargs):
+    """
+    Signal receiver for revoking a deleted token right away, evicting its cached binding.
+    """
+    forget_token(instance.key, using=using)
+
+
+@receiver(post_save, sender=User)
+def token_user_changed(sender, instance, using, created, **kwargs):
+    """
+    Signal receiver for dropping the cached bindings of the tokens of a user whose password, active or staff
+    status or shard changed, so a deactivated user is locked out right away and a moved one is served from
+    their new shard. Other saves, like the `last_login` update of every login, cost no query. The tokens of
+    a deleted user are deleted along with it, and evicted by `token_revoked`.
+    """
+    previous = getattr(instance, "_token_state", None)
+    instance._token_state = instance.token_state()
+
+    if not created and previous != instance._token_state:
+        forget_user_tokens(instance.pk, using=using)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_sharded(sender, instance, using, signal, created=False, **kwargs):
+    """
+    Signal receiver for keeping the users right on the shards of the todo lists.
+
+    A new user is given a home shard; the shard of a saved user is dropped from the cache, and every saved or
+    deleted user is mirrored to, or deleted from, the other shards. Only the users of `default` are
+    followed, as the mirrors are written without signals.
+    """
+    if using != DEFAULT_DB_ALIAS:
+        return
+
+    forget_user_shard(instance.pk)
+
+    if signal is post_delete:
+        delete_mirrored_user(instance)
+        return
+
+    if created:
+        assign_shard(instance)
+
+    mirror_user(instance)
+
+
+@receiver(post_migrate)
+def install_search_index(sender, app_config, using, **kwargs):
+    """
+    Signal receiver that installs the SQLite full-text search index after the todo_app tables are migrated.
+    """
+    connection = connections[using]
+
+    if app_config.label == "todo_app" and connection.vendor == "sqlite":
+        install_sqlite_search_index(connection)
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    """
+    Signal receiver that sets the PRAGMAs of the configured profile on every new SQLite connection.
+    """
+    if connection.vendor == "sqlite":
+        tune_sqlite_connection(connection)
@@ -0,0 +1,179 @@
+"""
+Coalesced updates of `TodoList.updated`, and updates of the `task_count` / `done_count` counters.
+
+Task writes that change the counters of their todo list update them right away, in the transaction of the
+write, so a counter change commits or rolls back with it. The other task writes only mark their todo list
+as touched instead of saving it right away. The touches are collected per transaction and flushed when it
+commits, with a single `UPDATE ... WHERE id IN (...)`; the touches of a transaction, or of a savepoint, that
+is rolled back are dropped along with its writes.
+
+Inside a touch scope (every request, through `TodoListTouchMiddleware`, or an explicit `coalesce_touches()` /
+`acoalesce_touches()` block) the touches of autocommit writes are collected too, and flushed when the scope
+ends, along with those of the transactions still open then, which are flushed inside them.
+
+Touches can be turned off with the `TODO_APP_TOUCH_TODO_LISTS` setting, or for a block of code with
+`suspend_touches()`, e.g. during bulk jobs. Counters are still kept up to date in both cases.
+"""
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TodoList
+
+_pending_touches = contextvars.ContextVar("pending_todo_list_touches", default=None)
+_touches_suspended = contextvars.ContextVar("todo_list_touches_suspended", default=False)
+
+
+class PendingTouches:
+    """
+    The todo lists touched by the writes of a transaction, or by the autocommit writes of a touch scope.
+
+    It's registered as the `on_commit` callback of its transaction, so it's dropped along with it on rollback.
+    It's flushed once, whichever of the commit and the end of the scope comes first.
+    """
+
+    def __init__(self, using, transactional):
+        self.using = using
+        self.transactional = transactional
+        self.todo_list_ids = set()
+        self.flushed = False
+
+    def registered(self):
+        """Whether its transaction is still open, with the callback waiting for the commit."""
+        return any(callback is self for _, callback, *_ in connections[self.using].run_on_commit)
+
+    def __call__(self):
+        if not self.flushed:
+            self.flushed = True
+            update_todo_lists(self.todo_list_ids, self.using, touched=True)
+
+
+def touch_todo_list(todo_list_id, tasks=0, done=0, using=DEFAULT_DB_ALIAS):
+    """
+    Marks a todo list as updated and adds `tasks` and `done` to its task counters.
+
+    Counter changes are applied right away, in the transaction of the write, and refresh `updated` in the
+    same statement; only plain touches are coalesced.
+    """
+    touched = settings.TODO_APP_TOUCH_TODO_LISTS and not _touches_suspended.get()
+
+    if tasks or done:
+        update_todo_lists([todo_list_id], using, tasks, done, touched)
+        return
+
+    if not touched:
+        return
+
+    scope = _pending_touches.get()
+    connection = connections[using]
+
+    if connection.in_atomic_block:
+        pending = _transaction_touches(connection, using)
+    elif scope is not None:
+        pending = next((pending for pending in scope if pending.using == using and not pending.transactional), None)
+
+        if pending is None:
+            pending = PendingTouches(using, transactional=False)
+    else:
+        # An autocommit write, already committed.
+        update_todo_lists([todo_list_id], using, touched=True)
+        return
+
+    if scope is not None and pending not in scope:
+        scope.append(pending)
+
+    pending.todo_list_ids.add(todo_list_id)
+
+
+def _transaction_touches(connection, using):
+    """The touches of the current transaction, at its current savepoint, registered on first use."""
+    savepoint_ids = set(connection.savepoint_ids)
+
+    for callback_savepoint_ids, callback, *_ in reversed(connection.run_on_commit):
+        if isinstance(callback, PendingTouches) and not callback.flushed and callback_savepoint_ids == savepoint_ids:
+            return callback
+
+    pending = PendingTouches(using, transactional=True)
+    transaction.on_commit(pending, using=using)
+
+    return pending
+
+
+def update_todo_lists(todo_list_ids, using, tasks=0, done=0, touched=False):
+    """Adds `tasks` and `done` to the counters of the todo lists and refreshes their `updated`, in one statement."""
+    values = {}
+
+    if touched:
+        values["updated"] = timezone.now()
+    if tasks:
+        values["task_count"] = F("task_count") + tasks
+    if done:
+        values["done_count"] = F("done_count") + done
+
+    if values and todo_list_ids:
+        TodoList.objects.using(using).filter(id__in=todo_list_ids).update(**values)
+
+
+def _flush_scope(scope):
+    # The touches of committed transactions are flushed already, and those of rolled back ones are dropped.
+    for pending in scope:
+        if not pending.flushed and (not pending.transactional or pending.registered()):
+            pending()
+
+
+@contextmanager
+def coalesce_touches():
+    """Collects the todo lists touched inside the block and updates them once on exit."""
+    if _pending_touches.get() is not None:
+        yield
+        return
+
+    scope = []
+    token = _pending_touches.set(scope)
+
+    try:
+        yield
+    finally:
+        _pending_touches.reset(token)
+        _flush_scope(scope)
+
+
+@asynccontextmanager
+async def acoalesce_touches():
+    """Async `coalesce_touches()`: the touched todo lists are updated from a worker thread, if there are any."""
+    if _pending_touches.get() is not None:
+        yield
+        return
+
+    scope = []
+    token = _pending_touches.set(scope)
+
+    try:
+        yield
+    finally:
+        _pending_touches.reset(token)
+
+        if scope:
+            await sync_to_async(_flush_scope)(scope)
+
+
+@contextmanager
+def suspend_touches():
+    """
+    Skips the `updated` refresh of every todo list touched inside the block; counters are still kept.
+
+    The conditional GET validators still change with the counters, but not with the other task changes made
+    inside the block, such as renames, and `Last-Modified` doesn't move at all.
+    """
+    token = _touches_suspended.set(True)
+
+    try:
+        yield
+    finally:
+        _touches_suspended.reset(token)
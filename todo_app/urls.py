@@ -1,11 +1,17 @@
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework import routers
 
-from .api.views.tasks import FilterTask, TaskViewSet
+from .api.views.export import ExportView
+from .api.views.imports import ImportView
+from .api.views.metrics import MetricsView
+from .api.views.profiles import ProfileDetailView, ProfileListView, ProfileStatsView
+from .api.views.tasks import FilterTask, SearchTasks, TaskViewSet
+from .api.views.tasks_bulk import BulkUpdateTasksView
+from .api.views.token import ObtainAuthTokenView, RevokeAuthTokenView
 from .api.views.todo_list import FilterTodoList, TodoListViewSet
 from .api.views.user import UserRegistrationView
+from .views import health
 
 
 # revisar
@@ -15,13 +21,23 @@ todo_list_router = routers.SimpleRouter()
 todo_list_router.register(r"todo-lists", TodoListViewSet, basename="todo-lists")
 
 urlpatterns = [
+    path("health/", health, name="health"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("profiles/", ProfileListView.as_view(), name="profiles"),
+    path("profiles/<str:profile_id>/", ProfileDetailView.as_view(), name="profile-detail"),
+    path("profiles/<str:profile_id>/pstats", ProfileStatsView.as_view(), name="profile-pstats"),
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
-    path("api-token-auth/", obtain_auth_token, name="api_token_auth"),
+    path("api-token-auth/", ObtainAuthTokenView.as_view(), name="api_token_auth"),
+    path("api-token-revoke/", RevokeAuthTokenView.as_view(), name="api_token_revoke"),
     path("users/", UserRegistrationView.as_view(), name="create-user"),
     path("api/todo-lists/<uuid:todo_list_pk>/", include(task_router.urls)),
     path("api/", include(todo_list_router.urls)),
     path("api/todo-lists/filter", FilterTodoList.as_view(), name="filter-todo-lists"),
+    path("api/tasks/search", SearchTasks.as_view(), name="search-tasks"),
     path("api/todo-lists/<uuid:todo_list_pk>/tasks/filter", FilterTask.as_view(), name="filter-tasks"),
+    path("api/todo-lists/<uuid:todo_list_pk>/tasks/bulk", BulkUpdateTasksView.as_view(), name="bulk-update-tasks"),
+    path("api/export/<str:export_format>", ExportView.as_view(), name="export"),
+    path("api/import", ImportView.as_view(), name="import"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
 ]
@@ -0,0 +1,13 @@
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+
+@never_cache
+def health(request):
+    """
+    Health check for load balancers and orchestrators.
+
+    A plain Django view: it skips DRF's authentication and throttling, and doesn't touch the database, so it
+    only tells the process is up and serving requests.
+    """
+    return JsonResponse({"status": "ok"})
@@ -0,0 +1,46 @@
+"""
+Warm-up of a freshly started server process.
+
+Django and DRF initialize a lot lazily, on the first request that needs it: the URL resolver compiles its
+patterns and builds its reverse lookups, DRF imports the classes named in its settings, models build their
+field caches and drf-spectacular introspects every view for the schema. `warm_up` does all of it ahead of
+time, without touching the database, so the first requests after boot don't pay for it. Under gunicorn with
+`preload_app` it runs in the master, before the workers are forked, and the workers share the result
+copy-on-write (see `drf_project/gunicorn_config.py`).
+"""
+import time
+
+from django.apps import apps
+from django.urls import get_resolver
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.settings import api_settings
+
+API_SETTINGS = [
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_FILTER_BACKENDS",
+    "DEFAULT_SCHEMA_CLASS",
+]
+
+
+def warm_up(schema=True):
+    """Runs the lazy initializations of the first requests, returning how long it took in seconds."""
+    started = time.monotonic()
+
+    # Compiles every URL pattern and populates the reverse lookups.
+    get_resolver().reverse_dict
+
+    for name in API_SETTINGS:
+        getattr(api_settings, name)
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    if schema:
+        SchemaGenerator().get_schema(request=None, public=True)
+
+    return time.monotonic() - started